@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from app.db import pool as db_pool
+from app.db.pool import TimedQueuePool, engine_options, pool_status
+from app.utils.metrics import latency_stats, reset_llm_call_stats
+
+class DummyConnection:
+    def rollback(self):
+        pass
+    def close(self):
+        pass
+
+class DummyEngine:
+    def __init__(self, pool):
+        self.pool = pool
+
+def test_checkout_wait_is_recorded_when_pool_is_exhausted():
+    reset_llm_call_stats()
+    pool = TimedQueuePool(DummyConnection, pool_size=1, max_overflow=0, timeout=0.1)
+    held = pool.connect()
+    assert pool_status(DummyEngine(pool))["checked_out"] == 1
+    with pytest.raises(PoolTimeout):
+        pool.connect()
+    held.close()
+    pool.connect().close()
+
+    stats = latency_stats()["db.pool_checkout.sync"]
+    assert stats["count"] == 3
+    assert stats["max"] >= 0.1
+
+def test_pgbouncer_mode_disables_prepared_statements_and_startup_parameters(monkeypatch):
+    monkeypatch.setattr(db_pool.settings, "DB_PGBOUNCER", True)
+    args = engine_options(is_async=True)["connect_args"]
+    assert args["statement_cache_size"] == 0
+    assert args["prepared_statement_cache_size"] == 0
+    assert args["prepared_statement_name_func"]() != args["prepared_statement_name_func"]()
+    assert "server_settings" not in args
+    assert engine_options(is_async=False)["connect_args"] == {}
+
+    monkeypatch.setattr(db_pool.settings, "DB_PGBOUNCER", False)
+    monkeypatch.setattr(db_pool.settings, "DB_STATEMENT_TIMEOUT_MS", 5000)
+    assert engine_options(is_async=True)["connect_args"]["server_settings"] == {"statement_timeout": "5000"}
+    assert engine_options(is_async=False)["connect_args"]["options"] == "-c statement_timeout=5000"
+
+def test_async_url_keeps_the_ssl_requirement():
+    url = db_pool.async_database_url("postgresql+psycopg2://u:p@db.example.com:5432/thrum?sslmode=require")
+    assert url.drivername == "postgresql+asyncpg"
+    assert dict(url.query) == {"ssl": "require"}
+    assert dict(db_pool.async_database_url("postgresql://u:p@localhost/thrum").query) == {}
@@ -0,0 +1,46 @@
+import numpy as np
+from app.services.embedding_service import EmbeddingService, get_embedding_service
+
+class DummyModel:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts):
+        self.calls.append(texts)
+        if isinstance(texts, str):
+            return np.array([len(texts), 1.0], dtype=np.float32)
+        return np.array([[len(t), 1.0] for t in texts], dtype=np.float32)
+
+def make_service(cache_size=2):
+    service = EmbeddingService("dummy", cache_size=cache_size)
+    service._model = DummyModel()
+    return service
+
+def test_encode_caches_repeated_text():
+    service = make_service()
+    first = service.encode("rpg")
+    second = service.encode("rpg")
+    assert first is second
+    assert service._model.calls == ["rpg"]
+    assert not first.flags.writeable
+
+def test_cache_evicts_least_recently_used():
+    service = make_service(cache_size=2)
+    service.encode("a")
+    service.encode("bb")
+    service.encode("a")
+    service.encode("ccc")
+    service.encode("a")
+    service.encode("bb")
+    assert service._model.calls == ["a", "bb", "ccc", "bb"]
+
+def test_encode_batch_encodes_only_misses_once():
+    service = make_service(cache_size=10)
+    service.encode("rpg")
+    result = service.encode_batch(["rpg", "shooter", "shooter", "puzzle"])
+    assert result.shape == (4, 2)
+    assert result[:, 0].tolist() == [3, 7, 7, 6]
+    assert service._model.calls == ["rpg", ["shooter", "puzzle"]]
+
+def test_service_is_shared_per_model_name():
+    assert get_embedding_service("dummy-shared") is get_embedding_service("dummy-shared")
@@ -0,0 +1,26 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from app.services.filler_bank import FillerBank, FILLER_SEEDS, filler_vibe, is_valid_filler
+
+def test_vibe_follows_tone_and_mood():
+    assert filler_vibe("frustrated", "happy") == "empathy"
+    assert filler_vibe("neutral", "sad") == "empathy"
+    assert filler_vibe("hyped", "neutral") == "hype"
+    assert filler_vibe("neutral", None) == "light"
+
+def test_seed_fillers_follow_filler_rules():
+    for vibes in FILLER_SEEDS.values():
+        for fillers in vibes.values():
+            assert all(is_valid_filler(f) for f in fillers)
+
+def test_pick_avoids_recent_and_falls_back_to_general_chat(tmp_path):
+    bank = FillerBank(str(tmp_path / "missing.json"))
+    recent = FILLER_SEEDS["general_chat"]["light"][:-1]
+    # No "farewell" bucket, so general_chat is used
+    assert bank.pick("farewell", "neutral", "neutral", avoid=recent) == FILLER_SEEDS["general_chat"]["light"][-1]
+
+def test_saved_bank_is_used(tmp_path):
+    path = str(tmp_path / "bank.json")
+    FillerBank(path).save({"greeting": {"hype": ["yo yo yo"]}})
+    assert FillerBank(path).pick("greeting", "excited", "neutral") == "yo yo yo"
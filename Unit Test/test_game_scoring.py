@@ -0,0 +1,105 @@
+import asyncio
+import numpy as np
+from scipy.spatial.distance import cosine
+from sqlalchemy import select
+from app.db.models.game import Game
+from app.services.game_scoring import CandidateScorer, top_k, rank_in_db, DISLIKE_THRESHOLD, MIN_SCORE
+
+class DummyGame:
+    def __init__(self, title, gameplay_embedding, preference_embedding):
+        self.title = title
+        self.gameplay_embedding = gameplay_embedding
+        self.preference_embedding = preference_embedding
+
+# Per-game scoring exactly as game_recommendation did it before vectorizing
+def reference_score(game, gameplay_vec, preference_vec, disliked_vec, penalty_weight):
+    gameplay_sim = 0
+    preference_sim = 0
+    dislike_sim = 0
+    if gameplay_vec is not None and game.gameplay_embedding is not None:
+        gameplay_sim = 1 - cosine(gameplay_vec, game.gameplay_embedding)
+    if preference_vec is not None and game.preference_embedding is not None:
+        preference_sim = 1 - cosine(preference_vec, game.preference_embedding)
+    if disliked_vec is not None and game.preference_embedding is not None:
+        dislike_sim = 1 - cosine(disliked_vec, game.preference_embedding)
+        if dislike_sim >= DISLIKE_THRESHOLD:
+            return 0
+    score = 0.6 * gameplay_sim + 0.4 * preference_sim
+    if disliked_vec is not None and dislike_sim < DISLIKE_THRESHOLD:
+        score -= penalty_weight * dislike_sim
+    return max(score, MIN_SCORE)
+
+def make_games(rng, n=300, dim=32):
+    games = []
+    for i in range(n):
+        gameplay = rng.normal(size=dim) if i % 17 else None
+        preference = rng.normal(size=dim) if i % 23 else None
+        games.append(DummyGame(f"game-{i}", gameplay, preference))
+    return games
+
+def test_scores_match_reference():
+    rng = np.random.default_rng(7)
+    games = make_games(rng)
+    gameplay_vec, preference_vec = rng.normal(size=32), rng.normal(size=32)
+    disliked_vec = games[5].preference_embedding + rng.normal(scale=0.1, size=32)
+
+    scores, excluded = CandidateScorer(games).score(gameplay_vec, preference_vec, disliked_vec, penalty_weight=0.8)
+    expected = np.array([reference_score(g, gameplay_vec, preference_vec, disliked_vec, 0.8) for g in games])
+
+    assert np.allclose(scores, expected, atol=1e-5)
+    assert excluded[5]
+
+def test_ranking_matches_reference_sort():
+    rng = np.random.default_rng(11)
+    games = make_games(rng)
+    gameplay_vec, preference_vec = rng.normal(size=32), None
+
+    scores, _ = CandidateScorer(games).score(gameplay_vec, preference_vec, None)
+    expected = [reference_score(g, gameplay_vec, preference_vec, None, 0.5) for g in games]
+    expected_order = [i for i, _ in sorted(enumerate(expected), key=lambda x: x[1], reverse=True)]
+
+    assert top_k(scores, 10) == expected_order[:10]
+
+def test_top_k_keeps_candidate_order_on_ties_and_honours_mask():
+    scores = np.array([0.01, 0.5, 0.01, 0.5, 0.2], dtype=np.float32)
+    assert top_k(scores, 3) == [1, 3, 4]
+    assert top_k(scores, 1, mask=[True, False, True, True, True]) == [3]
+    assert top_k(scores, 2, mask=[False] * 5) == []
+
+def test_no_session_embeddings_gives_floor_scores():
+    rng = np.random.default_rng(3)
+    games = make_games(rng, n=5)
+    scores, excluded = CandidateScorer(games).score()
+    assert np.allclose(scores, MIN_SCORE)
+    assert not excluded.any()
+
+class DummyResult:
+    def __init__(self, rows):
+        self.rows = rows
+    def all(self):
+        return self.rows
+
+class DummyDB:
+    """Answers each execute with the next queued rows and keeps the statements."""
+    def __init__(self, *results):
+        self.results = list(results)
+        self.statements = []
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return DummyResult(self.results.pop(0))
+
+def test_rank_in_db_falls_back_to_exact_scoring_when_ann_pass_is_short():
+    base_query = select(Game).where(Game.title != "Skipped")
+    vec = np.ones(8)
+
+    # ANN pass (after SET LOCAL) found a good enough game: no second query
+    db = DummyDB([], [("ann game", 0.9)])
+    assert asyncio.run(rank_in_db(db, base_query, gameplay_vec=vec)) == [("ann game", 0.9)]
+    assert len(db.statements) == 2
+
+    # ANN pass came back empty under the filters: the full filtered set is scored
+    db = DummyDB([], [], [("game without embedding", MIN_SCORE)])
+    assert asyncio.run(rank_in_db(db, base_query, gameplay_vec=vec)) == [("game without embedding", MIN_SCORE)]
+    ann, exact = (str(statement.compile()) for statement in db.statements[1:])
+    assert ann.count("LIMIT") == 2 and exact.count("LIMIT") == 1
+    assert f"{Game.__tablename__}.gameplay_embedding IS NOT NULL" not in exact
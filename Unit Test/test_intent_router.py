@@ -0,0 +1,66 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import asyncio
+import numpy as np
+from app.services import intent_router
+from app.services.input_classifier import intents
+from app.utils.metrics import router_stats, reset_llm_call_stats
+
+class DummySession:
+    def __init__(self, game_recommendations=()):
+        self.game_recommendations = list(game_recommendations)
+
+class BrokenEmbedder:
+    def encode(self, text):
+        raise RuntimeError("no model here")
+
+    def encode_batch(self, texts):
+        raise RuntimeError("no model here")
+
+async def gpt_intent(user_input, session, db, last_thrum_reply, memory=None):
+    return intent_router.intent_flags("Give_Info")
+
+def route(monkeypatch, text, session=None, last_thrum_reply="What are you in the mood for?"):
+    monkeypatch.setattr(intent_router, "classify_user_intent", gpt_intent)
+    monkeypatch.setattr(intent_router, "intent_router", intent_router.IntentRouter(BrokenEmbedder()))
+    monkeypatch.setattr(intent_router.settings, "INTENT_ROUTER_MODE", "local")
+    return asyncio.run(intent_router.route_intent(text, session or DummySession(), None, last_thrum_reply))
+
+def test_obvious_turns_skip_gpt(monkeypatch):
+    reset_llm_call_stats()
+    result = route(monkeypatch, "Another one!")
+    assert result["Request_Quick_Recommendation"] is True
+    assert sum(result.values()) == 1
+    assert set(result) == set(intents)
+    assert route(monkeypatch, "bye")["Opt_Out"] is True
+    assert router_stats()["intent_router"]["rules"] == 2
+
+def test_context_dependent_intents_need_context(monkeypatch):
+    # No recommendation yet, so "what platforms?" is not about a recommended game
+    assert route(monkeypatch, "what platforms?")["Give_Info"] is True
+    assert route(monkeypatch, "what platforms?", session=DummySession(["rec"]))["Inquire_About_Game"] is True
+    # A greeting mid-conversation is left to GPT
+    assert route(monkeypatch, "hey")["Give_Info"] is True
+    assert route(monkeypatch, "hey", last_thrum_reply="")["Greet"] is True
+
+def test_unknown_turns_go_to_gpt(monkeypatch):
+    reset_llm_call_stats()
+    assert route(monkeypatch, "sure")["Give_Info"] is True
+    stats = router_stats()["intent_router"]
+    assert stats["gpt"] == 1 and stats["avoided_llm_rate"] == 0.0
+
+def test_embedding_match_respects_thresholds(monkeypatch):
+    vectors = {"bye": [1.0, 0.0], "another one": [0.0, 1.0], "cya later": [0.99, 0.05], "hmm": [0.7, 0.7]}
+
+    class DummyEmbedder:
+        def encode(self, text):
+            return np.array(vectors[text], dtype=np.float32)
+
+        def encode_batch(self, texts):
+            return np.vstack([self.encode(t) for t in texts])
+
+    router = intent_router.IntentRouter(DummyEmbedder(), {"Opt_Out": ["bye"], "Request_Quick_Recommendation": ["another one"]})
+    context = {"has_thrum_reply": True, "has_recommendation": False}
+    assert router.match("cya later", context) == "Opt_Out"
+    assert router.match("hmm", context) is None
@@ -0,0 +1,132 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import asyncio
+import httpx
+import openai
+import pytest
+from app.services.llm_gateway import LLMGateway, PrioritySemaphore, PRIORITY_LIVE, PRIORITY_NUDGE
+from app.services.llm_cache import LLMResponseCache, cache_key
+from app.utils.metrics import llm_call_stats, cache_stats, reset_llm_call_stats
+
+class DummyUsage:
+    prompt_tokens = 12
+    completion_tokens = 3
+
+class DummyResponse:
+    usage = DummyUsage()
+
+class DummyCompletions:
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.errors:
+            raise self.errors.pop(0)
+        return DummyResponse()
+
+class DummyClient:
+    def __init__(self, errors=()):
+        self.completions = DummyCompletions(errors)
+        self.chat = self
+
+def connection_error():
+    return openai.APIConnectionError(request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+
+def test_retries_transient_errors_and_records_usage():
+    reset_llm_call_stats()
+    client = DummyClient(errors=[connection_error(), connection_error()])
+    gateway = LLMGateway(client=client, max_retries=2, backoff_base=0.001)
+    response = asyncio.run(gateway.chat("test.retry", model="m", messages=[]))
+
+    assert isinstance(response, DummyResponse)
+    assert len(client.completions.calls) == 3
+    # Each attempt gets what is left of the call deadline
+    assert all(0 < call["timeout"] <= gateway.timeout for call in client.completions.calls)
+    stats = llm_call_stats()["test.retry"]
+    assert stats["calls"] == 1 and stats["attempts"] == 3 and stats["errors"] == 0
+    assert stats["prompt_tokens"] == 12 and stats["completion_tokens"] == 3
+
+def test_gives_up_after_max_retries():
+    reset_llm_call_stats()
+    client = DummyClient(errors=[connection_error()] * 5)
+    gateway = LLMGateway(client=client, max_retries=1, backoff_base=0.001)
+    with pytest.raises(openai.APIConnectionError):
+        asyncio.run(gateway.chat("test.fail", model="m", messages=[]))
+    assert len(client.completions.calls) == 2
+    assert llm_call_stats()["test.fail"]["errors"] == 1
+
+def test_does_not_retry_other_errors():
+    client = DummyClient(errors=[ValueError("bad request")])
+    gateway = LLMGateway(client=client, max_retries=3, backoff_base=0.001)
+    with pytest.raises(ValueError):
+        asyncio.run(gateway.chat("test.value", model="m", messages=[]))
+    assert len(client.completions.calls) == 1
+
+def test_live_waiters_are_served_before_nudges():
+    async def run():
+        slots = PrioritySemaphore(1)
+        order = []
+        await slots.acquire()
+
+        async def worker(name, priority):
+            await slots.acquire(priority)
+            order.append(name)
+            slots.release()
+
+        tasks = [asyncio.create_task(worker("nudge", PRIORITY_NUDGE))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(worker("live", PRIORITY_LIVE)))
+        await asyncio.sleep(0)
+        slots.release()
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(run()) == ["live", "nudge"]
+
+def test_deadline_covers_waiting_for_a_slot():
+    reset_llm_call_stats()
+    client = DummyClient()
+
+    async def run():
+        gateway = LLMGateway(client=client, max_in_flight=1, max_retries=2, backoff_base=0.001)
+        await gateway.slots.acquire()
+        with pytest.raises(openai.APITimeoutError):
+            await gateway.chat("test.queued", timeout=0.05, model="m", messages=[])
+        # The timed-out waiter does not keep the slot from the next call
+        gateway.slots.release()
+        return await gateway.chat("test.queued", model="m", messages=[])
+
+    assert isinstance(asyncio.run(run()), DummyResponse)
+    assert len(client.completions.calls) == 1
+    stats = llm_call_stats()["test.queued"]
+    assert stats["calls"] == 2 and stats["errors"] == 1
+
+def test_deterministic_calls_are_cached():
+    reset_llm_call_stats()
+    client = DummyClient()
+    gateway = LLMGateway(client=client, cache=LLMResponseCache(max_entries=8, ttl_seconds=60))
+
+    async def run():
+        await gateway.chat("test.cache", cache=True, model="m", temperature=0, messages=[{"role": "user", "content": "ok"}])
+        # Whitespace differences normalize to the same key
+        await gateway.chat("test.cache", cache=True, model="m", temperature=0, messages=[{"role": "user", "content": "  ok \n"}])
+
+    asyncio.run(run())
+    assert len(client.completions.calls) == 1
+    stats = cache_stats()["test.cache"]
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["hit_rate"] == 0.5
+
+def test_sampled_calls_bypass_cache():
+    client = DummyClient()
+    gateway = LLMGateway(client=client, cache=LLMResponseCache(max_entries=8, ttl_seconds=60))
+
+    async def run():
+        for _ in range(2):
+            await gateway.chat("test.sampled", cache=True, model="m", temperature=0.7, messages=[{"role": "user", "content": "ok"}])
+
+    asyncio.run(run())
+    assert len(client.completions.calls) == 2
+    assert cache_key({"model": "m", "messages": []}) is None
@@ -0,0 +1,51 @@
+import asyncio
+import sys
+from app.services.message_dedup import TTLSet, MessageDeduplicator
+
+def test_retry_with_same_sid_is_dropped_but_repeated_text_is_not():
+    dedup = MessageDeduplicator(ttl_seconds=60, max_entries=100)
+
+    async def run():
+        # Same user answering "yes" twice: two different MessageSids
+        await dedup.remember("SM1")
+        second = await dedup.seen("SM2")
+        await dedup.remember("SM2")
+        retry = await dedup.seen("SM1")
+        await dedup.remember(None)
+        no_sid = await dedup.seen(None)
+        return second, retry, no_sid
+
+    assert asyncio.run(run()) == (False, True, False)
+
+def test_sid_is_only_remembered_once_stored():
+    dedup = MessageDeduplicator(ttl_seconds=60, max_entries=100)
+
+    async def run():
+        # First delivery fails before its message is committed, so nothing is remembered
+        first = await dedup.seen("SM1")
+        retry = await dedup.seen("SM1")
+        await dedup.remember("SM1")
+        return first, retry, await dedup.seen("SM1")
+
+    assert asyncio.run(run()) == (False, False, True)
+
+def test_sids_expire_after_ttl():
+    store = TTLSet(ttl_seconds=10, max_entries=100)
+    assert store.add("SM1", now=0)
+    assert not store.add("SM1", now=5)
+    assert store.add("SM2", now=11)  # evicts SM1 on the way in
+    assert len(store) == 1
+    assert store.add("SM1", now=12)
+    assert store.contains("SM1", now=13) and not store.contains("SM1", now=23)
+
+def test_memory_is_constant_under_a_million_senders():
+    store = TTLSet(ttl_seconds=3600, max_entries=10_000)
+    for i in range(20_000):
+        store.add(f"SM{i:032d}", now=i * 0.001)
+    baseline = sys.getsizeof(store.expiry)
+    for i in range(20_000, 1_000_000):
+        store.add(f"SM{i:032d}", now=i * 0.001)
+    assert len(store) == 10_000
+    assert sys.getsizeof(store.expiry) <= baseline
+    # The newest sids are still remembered
+    assert not store.add(f"SM{999_999:032d}", now=1000)
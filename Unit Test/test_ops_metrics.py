@@ -0,0 +1,63 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.api.v1.endpoints import ops
+from app.utils.metrics import record_latency, record_llm_call, record_router_path, reset_llm_call_stats
+
+def test_metrics_endpoint_returns_this_workers_counters(monkeypatch):
+    monkeypatch.setattr(ops.settings, "METRICS_TOKEN", None)
+    reset_llm_call_stats()
+    record_llm_call("test.endpoint", 0.2, attempts=1, ok=True)
+
+    metrics = asyncio.run(ops.read_metrics(x_metrics_token=None))
+    assert metrics["llm_calls"]["test.endpoint"]["calls"] == 1
+
+def test_metrics_endpoint_reports_the_avoided_llm_rate(monkeypatch):
+    monkeypatch.setattr(ops.settings, "METRICS_TOKEN", None)
+    reset_llm_call_stats()
+    for path in ["rules", "exemplar", "exemplar", "gpt"]:
+        record_router_path("intent_router", path)
+
+    routers = asyncio.run(ops.read_metrics(x_metrics_token=None))["routers"]
+    assert routers["intent_router"]["avoided_llm_rate"] == 0.75
+
+def test_metrics_endpoint_reports_whatsapp_stage_latency(monkeypatch):
+    monkeypatch.setattr(ops.settings, "METRICS_TOKEN", None)
+    reset_llm_call_stats()
+    for seconds in [0.01, 0.02, 0.03]:
+        record_latency("whatsapp.ack", seconds)
+    record_latency("whatsapp.turn", 2.5)
+
+    latency = asyncio.run(ops.read_metrics(x_metrics_token=None))["latency"]
+    assert latency["whatsapp.ack"]["count"] == 3 and latency["whatsapp.ack"]["p50"] == 0.02
+    assert latency["whatsapp.turn"]["max"] == 2.5
+
+def test_metrics_endpoint_checks_the_token(monkeypatch):
+    monkeypatch.setattr(ops.settings, "METRICS_TOKEN", "secret")
+    with pytest.raises(HTTPException):
+        asyncio.run(ops.read_metrics(x_metrics_token="wrong"))
+    assert "llm_calls" in asyncio.run(ops.read_metrics(x_metrics_token="secret"))
+
+def test_metrics_endpoint_reports_pool_gauges_and_checkout_wait(monkeypatch):
+    from app.utils import metrics
+    from app.db.pool import TimedQueuePool, pool_status
+
+    class DummyConnection:
+        def rollback(self):
+            pass
+        def close(self):
+            pass
+
+    class DummyEngine:
+        pool = TimedQueuePool(DummyConnection, pool_size=2, max_overflow=0)
+
+    monkeypatch.setattr(ops.settings, "METRICS_TOKEN", None)
+    monkeypatch.setattr(metrics, "_providers", {})
+    reset_llm_call_stats()
+    metrics.register_stats("db_pools", lambda: {"sync": pool_status(DummyEngine)})
+    held = DummyEngine.pool.connect()
+
+    snapshot = asyncio.run(ops.read_metrics(x_metrics_token=None))
+    held.close()
+    assert snapshot["db_pools"]["sync"]["checked_out"] == 1
+    assert snapshot["latency"]["db.pool_checkout.sync"]["count"] == 1
@@ -0,0 +1,43 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from app.services.input_classifier import build_intent_messages, build_profile_messages
+from app.services.modify_thrum_reply import build_format_reply_messages
+from app.services.prompt_builder import PromptPrefix
+from app.utils.metrics import prompt_prefix_stats, reset_llm_call_stats
+
+USERS = [
+    {"name": "Maya", "memory": "User likes cozy farming games.", "message": "something chill pls", "last_reply": "What are you in the mood for?", "tone": "casual"},
+    {"name": "", "memory": "", "message": "ugh none of these", "last_reply": "Try Hades?", "tone": "frustrated"},
+]
+
+def build_all(user):
+    return {
+        "intent": build_intent_messages(user["memory"], user["message"], user["last_reply"]),
+        "profile": build_profile_messages(user["memory"], user["message"], user["last_reply"], {"title": "Hades"}),
+        "format_reply": build_format_reply_messages(
+            tone=user["tone"], emoji_str="🙂", pace="normal", style="casual", length_hint="short",
+            user_name=user["name"], memory_context_str=user["memory"], user_context={"genre": None},
+            user_input=user["message"], last_thrum_reply=user["last_reply"], last_game=None,
+        ),
+    }
+
+def test_prefix_is_byte_stable_across_users():
+    reset_llm_call_stats()
+    first, second = build_all(USERS[0]), build_all(USERS[1])
+    for site in first:
+        assert first[site][0]["role"] == "system"
+        assert first[site][0]["content"].encode("utf-8") == second[site][0]["content"].encode("utf-8")
+        # Per-user data only appears after the prefix
+        for user in USERS:
+            assert user["message"] not in first[site][0]["content"]
+        assert USERS[0]["message"] in "".join(m["content"] for m in first[site][1:])
+    stats = prompt_prefix_stats()
+    assert stats["input_classifier.classify_user_intent"]["calls"] == 2
+    assert all(s["hash_changes"] == 0 for s in stats.values())
+
+def test_prefix_hash_follows_text_and_version():
+    base = PromptPrefix("site", "v1", "rules")
+    assert base.hash == PromptPrefix("site", "v1", "rules\n").hash
+    assert base.hash != PromptPrefix("site", "v2", "rules").hash
+    assert base.hash != PromptPrefix("site", "v1", "other rules").hash
@@ -0,0 +1,30 @@
+import asyncio
+from rapidfuzz import fuzz
+from app.services.title_index import TitleIndex, search_titles_in_db
+
+GAMES = [
+    (1, "The Legend of Zelda: Breath of the Wild", ["BOTW"]),
+    (2, "Hollow Knight", None),
+    (3, "Hollow Knight: Silksong", ["Silksong"]),
+]
+
+class DummyResult:
+    def __init__(self, rows):
+        self.rows = rows
+    def all(self):
+        return self.rows
+
+class DummyDB:
+    """Returns the trigram shortlist for the select, nothing for SET LOCAL."""
+    async def execute(self, statement):
+        return DummyResult(GAMES)
+
+def test_pg_trgm_shortlist_is_scored_like_the_memory_index():
+    index = TitleIndex()
+    for game_id, title, alternative_titles in GAMES:
+        index._add(game_id, title, alternative_titles)
+
+    for query, cutoff, scorer in [("hollow knight", 50, fuzz.token_set_ratio), ("zelda breath of wild", 75, fuzz.WRatio), ("silksong", 0, fuzz.token_set_ratio)]:
+        in_db = asyncio.run(search_titles_in_db(DummyDB(), query, limit=3, score_cutoff=cutoff, scorer=scorer))
+        assert in_db == index.extract(query, limit=3, score_cutoff=cutoff, scorer=scorer)
+        assert all(score >= cutoff for _, score, _ in in_db)
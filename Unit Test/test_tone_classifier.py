@@ -0,0 +1,87 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import asyncio
+from datetime import datetime
+import numpy as np
+from app.services import tone_engine, session_manager
+from app.services.tone_shift_detection import emotion_fusion
+from app.db.models.session import Session
+from app.db.models.user_profile import UserProfile
+from app.services.tone_classifier import LocalToneClassifier, TONE_PROTOTYPES
+from app.services.tone_engine import TONE_CLUSTERS
+
+VECTORS = {
+    "meh": [1.0, 0.0, 0.0],
+    "whatever": [0.9, 0.1, 0.0],
+    "lets gooo": [0.0, 1.0, 0.0],
+    "so pumped": [0.1, 0.9, 0.0],
+    "fine i guess": [0.95, 0.05, 0.0],
+    "hmm": [0.5, 0.5, 0.0],
+    "pumped but tired": [0.05, 0.4, 0.9],
+}
+
+class DummyEmbedder:
+    def encode(self, text):
+        return np.array(VECTORS[text], dtype=np.float32)
+
+    def encode_batch(self, texts):
+        return np.vstack([self.encode(t) for t in texts])
+
+def make_classifier():
+    return LocalToneClassifier(DummyEmbedder(), {"bored": ["meh", "whatever"], "hyped": ["lets gooo", "so pumped"]})
+
+def test_prototypes_cover_known_tones():
+    assert set(TONE_PROTOTYPES) <= set(TONE_CLUSTERS)
+
+def test_nearest_centroid():
+    tone, confidence, margin = make_classifier().classify("fine i guess")
+    assert tone == "bored"
+    assert 0.9 < confidence <= 1.0
+    assert margin > 0.5
+
+def test_ambiguous_message_falls_back_to_llm(monkeypatch):
+    classifier = make_classifier()
+    monkeypatch.setattr("app.services.tone_classifier.tone_classifier", classifier)
+    monkeypatch.setattr(tone_engine.settings, "TONE_DETECTION_MODE", "local")
+    monkeypatch.setattr(tone_engine.settings, "TONE_LOCAL_MIN_MARGIN", 0.05)
+
+    async def llm_tone(user_input):
+        return "curious", 0.8
+
+    monkeypatch.setattr(tone_engine, "detect_tone_cluster_llm", llm_tone)
+    assert asyncio.run(tone_engine.detect_tone_cluster("so pumped"))[0] == "hyped"
+    assert asyncio.run(tone_engine.detect_tone_cluster("hmm")) == ("curious", 0.8)
+    assert classifier.local == 1 and classifier.fallbacks == 1
+
+def test_batch_matches_single_classification():
+    classifier = make_classifier()
+    texts = ["meh", "so pumped", "hmm"]
+    assert [label[0] for label in classifier.classify_batch(texts)] == [classifier.classify(t)[0] for t in texts]
+
+class DummyDB:
+    async def commit(self):
+        pass
+
+def fuse(monkeypatch, text, mood_confidence):
+    async def no_shift(session):
+        return False
+
+    monkeypatch.setattr(session_manager, "detect_tone_shift", no_shift)
+    session = Session(meta_data={}, interactions=[])
+    tone, confidence, margin = make_classifier().classify(text)
+    tone_engine.update_tone_in_history(session, tone, confidence)
+    return asyncio.run(emotion_fusion(DummyDB(), session, UserProfile(mood_tags={datetime.utcnow().date().isoformat(): {"calm": mood_confidence}})))
+
+def test_clear_local_tone_wins_fusion_despite_low_cosine(monkeypatch):
+    # Cosine to the hyped centroid is only ~0.41, but it leads the runner-up by ~0.33
+    assert make_classifier().scores("pumped but tired").max() < 0.5
+    fusion = fuse(monkeypatch, "pumped but tired", mood_confidence=0.75)
+    assert fusion["tone_confidence"] > 0.75
+    assert (fusion["emotion_source"], fusion["overall_emotion"]) == ("tone", "hyped")
+
+def test_barely_local_tone_defers_to_a_confident_mood(monkeypatch):
+    classifier = make_classifier()
+    assert classifier.confidence(0.05) < 0.75 <= classifier.confidence(0.2)
+    fusion = fuse(monkeypatch, "hmm", mood_confidence=0.75)
+    assert (fusion["emotion_source"], fusion["overall_emotion"]) == ("mood", "calm")
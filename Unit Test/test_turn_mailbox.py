@@ -0,0 +1,66 @@
+import asyncio
+from app.services.turn_mailbox import InProcessMailbox, drain_serialized
+
+class DummyInbox:
+    """Pending messages per phone, processed the way turn_worker.process_pending does."""
+    def __init__(self):
+        self.pending = []
+        self.turns = []
+        self.running = 0
+        self.max_running = 0
+
+    async def process(self, key):
+        if not self.pending:
+            return False
+        batch, self.pending = self.pending, []
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.02)
+        self.running -= 1
+        self.turns.append(" ".join(batch))
+        return True
+
+async def send(mailbox, inbox, text):
+    inbox.pending.append(text)
+    await mailbox.post("+100")
+
+def test_burst_is_coalesced_into_one_turn():
+    async def run():
+        mailbox, inbox = InProcessMailbox(), DummyInbox()
+        for text in ["hey", "i want", "something cozy"]:
+            await send(mailbox, inbox, text)
+        await drain_serialized(mailbox, "+100", inbox.process, window=0.01, max_wait=0.05)
+        return inbox.turns, mailbox
+    turns, mailbox = asyncio.run(run())
+    assert turns == ["hey i want something cozy"]
+    assert not mailbox.owners and not mailbox.mail
+
+def test_workers_never_overlap_and_keep_order():
+    async def run():
+        mailbox, inbox = InProcessMailbox(), DummyInbox()
+
+        async def worker(text):
+            # Each webhook call stores its message and tries to drain, like two uvicorn workers would
+            await send(mailbox, inbox, text)
+            await drain_serialized(mailbox, "+100", inbox.process)
+
+        first = asyncio.create_task(worker("one"))
+        await asyncio.sleep(0.005)
+        await asyncio.gather(first, worker("two"), worker("three"))
+        return inbox
+    inbox = asyncio.run(run())
+    assert inbox.max_running == 1
+    assert " ".join(inbox.turns) == "one two three"
+    assert inbox.turns[0] == "one"
+
+def test_lock_is_owned_by_token():
+    async def run():
+        mailbox = InProcessMailbox()
+        token = await mailbox.acquire("+100")
+        assert await mailbox.acquire("+100") is None
+        await mailbox.release("+100", "someone-else")
+        assert not await mailbox.renew("+100", "someone-else")
+        assert await mailbox.renew("+100", token)
+        await mailbox.release("+100", token)
+        assert await mailbox.acquire("+100") is not None
+    asyncio.run(run())
@@ -0,0 +1,167 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import asyncio
+import time
+from types import SimpleNamespace
+from app.services import turn_pipeline
+from app.services.session_memory import SessionMemory
+from app.services.tone_engine import update_tone_in_history
+
+DELAY = 0.3
+
+class DummySession:
+    def __init__(self):
+        self.interactions = []
+
+async def slow_tone(user_input):
+    await asyncio.sleep(DELAY)
+    return "casual", 0.8
+
+class DummyMemory:
+    prompt = "user likes to play games of rpg genres"
+
+    @classmethod
+    async def load(cls, session, db):
+        return cls()
+
+    def profile(self):
+        return (self.prompt,)
+
+    def to_prompt(self):
+        return self.prompt
+
+async def slow_classification(db, session, user_input, memory=None):
+    await asyncio.sleep(DELAY)
+    return {"genre": ["rpg"]}
+
+async def slow_intent(user_input, session, db, last_thrum_reply, memory=None):
+    await asyncio.sleep(DELAY)
+    return {"Request_Quick_Recommendation": True}
+
+def stub_classifiers(monkeypatch):
+    monkeypatch.setattr(turn_pipeline, "detect_tone_cluster", slow_tone)
+    monkeypatch.setattr(turn_pipeline, "classify_user_input", slow_classification)
+    monkeypatch.setattr(turn_pipeline, "route_intent", slow_intent)
+    monkeypatch.setattr(turn_pipeline, "SessionMemory", DummyMemory)
+
+def test_classifiers_run_concurrently(monkeypatch):
+    stub_classifiers(monkeypatch)
+    started = time.perf_counter()
+    analysis = asyncio.run(turn_pipeline.analyze_turn(None, DummySession(), "give me something chill", detect_tone=True))
+    elapsed = time.perf_counter() - started
+
+    # Three sequential calls would take 3 * DELAY
+    assert elapsed < DELAY * 2
+    assert analysis["tone"] == ("casual", 0.8)
+    assert analysis["classification"] == {"genre": ["rpg"]}
+    assert analysis["classification_intent"] == {"Request_Quick_Recommendation": True}
+
+def test_tone_is_skipped_unless_requested(monkeypatch):
+    stub_classifiers(monkeypatch)
+    analysis = asyncio.run(turn_pipeline.analyze_turn(None, DummySession(), "hey"))
+    assert analysis["tone"] is None
+
+def test_failed_tone_falls_back_to_neutral(monkeypatch):
+    stub_classifiers(monkeypatch)
+
+    async def broken_tone(user_input):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(turn_pipeline, "detect_tone_cluster", broken_tone)
+    analysis = asyncio.run(turn_pipeline.analyze_turn(None, DummySession(), "hey", detect_tone=True))
+    assert analysis["tone"] == turn_pipeline.DEFAULT_TONE
+
+def test_combined_mode_uses_single_call(monkeypatch):
+    stub_classifiers(monkeypatch)
+    monkeypatch.setattr(turn_pipeline.settings, "TURN_ANALYSIS_MODE", "combined")
+
+    async def combined(db, session, user_input, last_thrum_reply):
+        return {"tone": ("hype", 0.9), "classification": {"genre": ["racing"]}, "classification_intent": {"Give_Info": True}}
+
+    monkeypatch.setattr(turn_pipeline, "analyze_turn_combined", combined)
+    analysis = asyncio.run(turn_pipeline.analyze_turn(None, DummySession(), "something fast", detect_tone=True))
+    assert analysis["tone"] == ("hype", 0.9)
+    assert analysis["classification"] == {"genre": ["racing"]}
+
+def test_combined_mode_falls_back_to_split(monkeypatch):
+    stub_classifiers(monkeypatch)
+    monkeypatch.setattr(turn_pipeline.settings, "TURN_ANALYSIS_MODE", "combined")
+
+    async def failed(db, session, user_input, last_thrum_reply):
+        return None
+
+    monkeypatch.setattr(turn_pipeline, "analyze_turn_combined", failed)
+    analysis = asyncio.run(turn_pipeline.analyze_turn(None, DummySession(), "hey"))
+    assert analysis["tone"] is None
+    assert analysis["classification"] == {"genre": ["rpg"]}
+
+def test_intent_is_kept_when_memory_did_not_change(monkeypatch):
+    stub_classifiers(monkeypatch)
+    analysis = asyncio.run(turn_pipeline.analyze_turn(None, DummySession(), "hey"))
+
+    async def unexpected_intent(**kwargs):
+        raise AssertionError("intent should not be classified again")
+
+    monkeypatch.setattr(turn_pipeline, "route_intent", unexpected_intent)
+    intent = asyncio.run(turn_pipeline.refresh_intent(None, DummySession(), "hey", analysis))
+    assert intent == {"Request_Quick_Recommendation": True}
+
+def test_intent_is_reclassified_on_the_updated_memory(monkeypatch):
+    stub_classifiers(monkeypatch)
+    analysis = asyncio.run(turn_pipeline.analyze_turn(None, DummySession(), "racing on switch please"))
+    # update_user_from_classification stored this turn's genre and platform
+    monkeypatch.setattr(DummyMemory, "prompt", "user likes to play games of racing genres | user prefer games on switch platform")
+    seen = []
+
+    async def intent_on_memory(user_input, session, db, last_thrum_reply, memory=None):
+        seen.append(memory.to_prompt())
+        return {"Give_Info": True}
+
+    monkeypatch.setattr(turn_pipeline, "route_intent", intent_on_memory)
+    intent = asyncio.run(turn_pipeline.refresh_intent(None, DummySession(), "racing on switch please", analysis))
+    assert intent == analysis["classification_intent"] == {"Give_Info": True}
+    assert seen == [DummyMemory.prompt]
+
+class EmptyResult:
+    def all(self):
+        return []
+
+class NoRecommendationsDB:
+    async def scalars(self, statement):
+        return EmptyResult()
+
+def chat_session():
+    message = SimpleNamespace(sender=SimpleNamespace(name="User"), content="something fast", tone_tag=None)
+    return SimpleNamespace(
+        session_id="s1", user=None, exit_mood="excited", meta_data={}, genre=["rpg"],
+        platform_preference=["pc"], story_preference=None, rejected_games=[], liked_games=[],
+        last_recommended_game=None, last_intent=None, interactions=[message],
+        gameplay_elements=None, preferred_keywords=None, disliked_keywords=None,
+    )
+
+def test_tone_tagging_does_not_reclassify_intent(monkeypatch):
+    stub_classifiers(monkeypatch)
+    monkeypatch.setattr(turn_pipeline, "SessionMemory", SessionMemory)
+    session, db = chat_session(), NoRecommendationsDB()
+    analysis = asyncio.run(turn_pipeline.analyze_turn(db, session, "something fast", detect_tone=True))
+
+    # What the WhatsApp flow stores for every turn once the tone is known
+    update_tone_in_history(session, "hype", 0.9)
+    session.interactions[-1].tone_tag = "hype"
+    calls = []
+
+    async def intent_on_memory(user_input, session, db, last_thrum_reply, memory=None):
+        calls.append(memory.genre)
+        return {"Give_Info": True}
+
+    monkeypatch.setattr(turn_pipeline, "route_intent", intent_on_memory)
+    intent = asyncio.run(turn_pipeline.refresh_intent(db, session, "something fast", analysis))
+    assert intent == {"Request_Quick_Recommendation": True}
+    assert calls == []
+
+    # A profile change from this turn's classification does
+    session.genre.append("racing")
+    intent = asyncio.run(turn_pipeline.refresh_intent(db, session, "something fast", analysis))
+    assert intent == {"Give_Info": True}
+    assert calls == ["racing"]
@@ -0,0 +1,34 @@
+"""Add partial index for Thrum replies awaiting a tone tag
+
+Revision ID: 3b8d1f6c9e24
+Revises: e2c9b5f7a418
+Create Date: 2026-10-18 15:41:09.203518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b8d1f6c9e24'
+down_revision: Union[str, None] = 'e2c9b5f7a418'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_interactions_thrum_tone_pending',
+        'interactions',
+        ['timestamp'],
+        unique=False,
+        postgresql_where=sa.text("sender = 'Thrum' AND tone_tag IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_interactions_thrum_tone_pending', table_name='interactions')
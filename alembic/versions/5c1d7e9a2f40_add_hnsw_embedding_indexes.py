@@ -0,0 +1,46 @@
+"""Add HNSW indexes on game embeddings
+
+Revision ID: 5c1d7e9a2f40
+Revises: 2b6d6050a6d4
+Create Date: 2026-10-18 10:12:31.418203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1d7e9a2f40'
+down_revision: Union[str, None] = '2b6d6050a6d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_games_gameplay_embedding_hnsw',
+        'games',
+        ['gameplay_embedding'],
+        unique=False,
+        postgresql_using='hnsw',
+        postgresql_with={'m': 16, 'ef_construction': 64},
+        postgresql_ops={'gameplay_embedding': 'vector_cosine_ops'},
+    )
+    op.create_index(
+        'ix_games_preference_embedding_hnsw',
+        'games',
+        ['preference_embedding'],
+        unique=False,
+        postgresql_using='hnsw',
+        postgresql_with={'m': 16, 'ef_construction': 64},
+        postgresql_ops={'preference_embedding': 'vector_cosine_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_games_preference_embedding_hnsw', table_name='games', postgresql_using='hnsw')
+    op.drop_index('ix_games_gameplay_embedding_hnsw', table_name='games', postgresql_using='hnsw')
@@ -0,0 +1,41 @@
+"""Make inbound_messages.message_sid unique for webhook idempotency
+
+Revision ID: 5f1c8e3a2d67
+Revises: 9d2e6a1c7b35
+Create Date: 2026-10-18 21:05:31.142876
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f1c8e3a2d67'
+down_revision: Union[str, None] = '9d2e6a1c7b35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep the first delivery of any sid stored more than once before the index existed
+    op.execute("""
+        DELETE FROM inbound_messages a
+        USING inbound_messages b
+        WHERE a.message_sid = b.message_sid
+          AND (a.received_at, a.message_id) > (b.received_at, b.message_id)
+    """)
+    op.create_index(
+        'ix_inbound_messages_message_sid',
+        'inbound_messages',
+        ['message_sid'],
+        unique=True,
+        postgresql_where=sa.text("message_sid IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_inbound_messages_message_sid', table_name='inbound_messages')
@@ -0,0 +1,33 @@
+"""Add lower(mood) index on mood_cluster for keyword matching
+
+Revision ID: 7c4a9e2f1b58
+Revises: 5f1c8e3a2d67
+Create Date: 2026-10-18 23:12:47.318904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c4a9e2f1b58'
+down_revision: Union[str, None] = '5f1c8e3a2d67'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_mood_cluster_lower_mood',
+        'mood_cluster',
+        [sa.text('lower(mood)')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_mood_cluster_lower_mood', table_name='mood_cluster')
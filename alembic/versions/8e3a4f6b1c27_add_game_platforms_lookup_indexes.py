@@ -0,0 +1,35 @@
+"""Add lookup indexes on game_platforms
+
+Revision ID: 8e3a4f6b1c27
+Revises: 5c1d7e9a2f40
+Create Date: 2026-10-18 11:02:47.530914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e3a4f6b1c27'
+down_revision: Union[str, None] = '5c1d7e9a2f40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_game_platforms_platform_lower',
+        'game_platforms',
+        [sa.text('lower(platform)')],
+        unique=False,
+    )
+    op.create_index('ix_game_platforms_game_id', 'game_platforms', ['game_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_game_platforms_game_id', table_name='game_platforms')
+    op.drop_index('ix_game_platforms_platform_lower', table_name='game_platforms')
@@ -0,0 +1,50 @@
+"""Add inbound_messages table for background WhatsApp turns
+
+Revision ID: 9d2e6a1c7b35
+Revises: 3b8d1f6c9e24
+Create Date: 2026-10-18 17:12:44.508213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d2e6a1c7b35'
+down_revision: Union[str, None] = '3b8d1f6c9e24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'inbound_messages',
+        sa.Column('message_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('phone_number', sa.String(), nullable=False),
+        sa.Column('body', sa.Text(), nullable=True),
+        sa.Column('message_sid', sa.String(), nullable=True),
+        sa.Column('status', sa.String(), nullable=False, server_default='pending'),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('received_at', sa.TIMESTAMP(), nullable=True),
+        sa.Column('processed_at', sa.TIMESTAMP(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user_profiles.user_id'], ),
+        sa.PrimaryKeyConstraint('message_id')
+    )
+    op.create_index(
+        'ix_inbound_messages_pending',
+        'inbound_messages',
+        ['phone_number', 'received_at'],
+        unique=False,
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_inbound_messages_pending', table_name='inbound_messages')
+    op.drop_table('inbound_messages')
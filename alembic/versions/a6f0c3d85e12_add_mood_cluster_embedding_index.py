@@ -0,0 +1,36 @@
+"""Add HNSW index on mood_cluster embedding
+
+Revision ID: a6f0c3d85e12
+Revises: d4b7a2e91f03
+Create Date: 2026-10-18 12:31:55.604218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6f0c3d85e12'
+down_revision: Union[str, None] = 'd4b7a2e91f03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_mood_cluster_embedding_hnsw',
+        'mood_cluster',
+        ['embedding'],
+        unique=False,
+        postgresql_using='hnsw',
+        postgresql_with={'m': 16, 'ef_construction': 64},
+        postgresql_ops={'embedding': 'vector_cosine_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_mood_cluster_embedding_hnsw', table_name='mood_cluster', postgresql_using='hnsw')
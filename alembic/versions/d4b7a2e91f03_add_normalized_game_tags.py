@@ -0,0 +1,45 @@
+"""Add normalized tag arrays with GIN indexes on games
+
+Revision ID: d4b7a2e91f03
+Revises: 8e3a4f6b1c27
+Create Date: 2026-10-18 11:48:09.172446
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4b7a2e91f03'
+down_revision: Union[str, None] = '8e3a4f6b1c27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TAG_COLUMNS = ('genre', 'subgenres', 'game_vibes', 'mood_tag')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name in TAG_COLUMNS:
+        op.add_column('games', sa.Column(f'{name}_norm', postgresql.ARRAY(sa.String()), server_default='{}', nullable=False))
+        # Backfill with the same rule as Game.normalize_tags: trimmed, lower-cased, unique, sorted
+        op.execute(f"""
+            UPDATE games SET {name}_norm = ARRAY(
+                SELECT DISTINCT LOWER(BTRIM(t))
+                FROM unnest({name}) AS t
+                WHERE BTRIM(t) <> ''
+                ORDER BY 1
+            )
+            WHERE {name} IS NOT NULL
+        """)
+        op.create_index(f'ix_games_{name}_norm_gin', 'games', [f'{name}_norm'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in reversed(TAG_COLUMNS):
+        op.drop_index(f'ix_games_{name}_norm_gin', table_name='games', postgresql_using='gin')
+        op.drop_column('games', f'{name}_norm')
@@ -0,0 +1,48 @@
+"""Add pg_trgm indexes on game titles
+
+Revision ID: e2c9b5f7a418
+Revises: a6f0c3d85e12
+Create Date: 2026-10-18 13:20:14.887310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2c9b5f7a418'
+down_revision: Union[str, None] = 'a6f0c3d85e12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+    # array_to_string is only STABLE, so index expressions go through an IMMUTABLE wrapper
+    op.execute("""
+        CREATE OR REPLACE FUNCTION game_alt_titles_text(titles text[]) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE
+        AS $$ SELECT array_to_string(titles, ' ') $$;
+    """)
+    op.create_index(
+        'ix_games_title_trgm',
+        'games',
+        ['title'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'title': 'gin_trgm_ops'},
+    )
+    op.execute("""
+        CREATE INDEX ix_games_alternative_titles_trgm
+        ON games USING gin (game_alt_titles_text(alternative_titles) gin_trgm_ops);
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_games_alternative_titles_trgm', table_name='games')
+    op.drop_index('ix_games_title_trgm', table_name='games', postgresql_using='gin')
+    op.execute("DROP FUNCTION IF EXISTS game_alt_titles_text(text[]);")
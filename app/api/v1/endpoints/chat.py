@@ -1,13 +1,13 @@
 from fastapi import APIRouter, Depends, Request, HTTPException
-from sqlalchemy.orm import Session as DBSession
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from datetime import datetime
 
 # DB models and dependencies
-from app.db.deps import get_db
+from app.db.deps import get_async_db
+from app.db.loaders import load_session
 from app.db.models.enums import SenderEnum
 from app.services.interactions import create_interaction
-from app.db.models.session import Session
 from app.services.tone_engine import detect_tone_cluster, update_tone_in_history
 
 router = APIRouter()
@@ -27,18 +27,22 @@ def safe_last(arr):
 async def user_chat_with_thrum(
     request: Request,
     payload: ChatRequest,
-    db: DBSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     session_id = getattr(request.state, "session_id", None)
     if not session_id:
         raise HTTPException(status_code=400, detail="Session not initialized.")
     
-    session = db.query(Session).filter(Session.session_id == session_id).first()
+    session = await load_session(db, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found.")
     
-    tone, confidence = await detect_tone_cluster(payload.user_input)
-    update_tone_in_history(session, tone, confidence) 
+    # The WhatsApp turn pipeline detects tone concurrently with classification and tags the interaction later
+    if getattr(request.state, "defer_tone_detection", False):
+        tone = None
+    else:
+        tone, confidence = await detect_tone_cluster(payload.user_input)
+        update_tone_in_history(session, tone, confidence) 
 
     interaction = create_interaction(
         session = session,
@@ -52,11 +56,11 @@ async def user_chat_with_thrum(
     )
 
     try:
-        db.add(interaction)
-        db.commit()
+        session.interactions.append(interaction)
+        await db.commit()
         print(f"✅ User message stored: {interaction.content} | tone = {tone}")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="DB error: " + str(e))
 
     return session, interaction
@@ -67,17 +71,18 @@ async def user_chat_with_thrum(
 async def bot_chat_with_thrum(
     request: Request,
     bot_reply: str,
-    db: DBSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     session_id = getattr(request.state, "session_id", None)
     if not session_id:
         raise HTTPException(status_code=400, detail="Session not initialized.")
     
-    session = db.query(Session).filter(Session.session_id == session_id).first()
+    session = await load_session(db, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found.")
     
-    tone, confidence = await detect_tone_cluster(bot_reply)
+    # Tone is tagged later by the backfill job (app/services/tone_backfill.py), not on the reply path
+    requested_tone = (session.meta_data or {}).get("tone")
 
     interaction = create_interaction(
         session=session,
@@ -85,7 +90,7 @@ async def bot_chat_with_thrum(
         sender=SenderEnum.Thrum,
         content=bot_reply,
         mood_tag=getattr(session, "exit_mood", None),
-        tone_tag=tone,
+        tone_tag=None,
         confidence_score=0.92,
         game_id=getattr(session, "last_game_id", None),
         session_type=getattr(session, "session_type", None),
@@ -93,16 +98,17 @@ async def bot_chat_with_thrum(
             "phase": getattr(session, "phase", None),
             "platform": safe_last(getattr(session, "platform_preference", [])),
             "genre": safe_last(getattr(session, "genre", [])),
-            "mood": getattr(session, "exit_mood", None)
+            "mood": getattr(session, "exit_mood", None),
+            "requested_tone": requested_tone
         }
     )
 
     try:
-        db.add(interaction)
-        db.commit()
-        print(f"✅ Bot reply stored: {interaction.content} | tone = {tone}")
+        session.interactions.append(interaction)
+        await db.commit()
+        print(f"✅ Bot reply stored: {interaction.content} | requested tone = {requested_tone}")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="DB error: " + str(e))
 
     return session
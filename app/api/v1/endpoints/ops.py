@@ -0,0 +1,20 @@
+"""
+Operational read-outs for the worker process that serves the request.
+
+Metrics are kept per process (see app/utils/metrics.py), so behind several
+workers each response describes one of them; "pid" says which.
+"""
+
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException
+from app.core.config import settings
+from app.utils.metrics import metrics_snapshot
+
+router = APIRouter()
+
+# 📊 LLM call, cache, prompt prefix, fast-path router, stage latency and DB pool metrics of this worker
+@router.get("/metrics")
+async def read_metrics(x_metrics_token: Optional[str] = Header(default=None)):
+    if settings.METRICS_TOKEN and x_metrics_token != settings.METRICS_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid metrics token")
+    return metrics_snapshot()
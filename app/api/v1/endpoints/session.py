@@ -4,8 +4,9 @@ Session state logic will be managed here and refined in future.
 """
 
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session as DBSession
-from app.db.deps import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.deps import get_async_db
 from app.db.models.user_profile import UserProfile
 from app.services.session_manager import update_or_create_session
 
@@ -13,14 +14,14 @@ router = APIRouter()
 
 # 🚀 Starts or resumes a session for the given user
 @router.post("/session/start")
-async def start_session(user_id: str, db: DBSession = Depends(get_db)):
+async def start_session(user_id: str, db: AsyncSession = Depends(get_async_db)):
     # 🔍 Find user by user_id
-    user = db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
+    user = await db.scalar(select(UserProfile).where(UserProfile.user_id == user_id))
     if not user:
         return {"error": "User not found"}
 
     # 🔁 Create new session or update existing one based on last activity
-    session = update_or_create_session(db, user)
+    session = await update_or_create_session(db, user)
 
     # 📤 Return session details
     return {
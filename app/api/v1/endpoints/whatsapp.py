@@ -1,12 +1,15 @@
 # 📄 File: app/api/v1/endpoints/whatsapp.py (updated to ask mood first, then continue based on mood)
 import asyncio
+import time
 from fastapi import APIRouter, Form, Depends, Request
 from fastapi.responses import PlainTextResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
-import hashlib
 from app.db.models.user_profile import UserProfile
-from app.db.deps import get_db
+from app.db.models.inbound_message import InboundMessage
+from app.db.deps import get_async_db
 from app.db.models.enums import PlatformEnum, PhaseEnum
 from app.api.v1.endpoints.chat import user_chat_with_thrum, bot_chat_with_thrum, ChatRequest
 from app.services.session_manager import update_or_create_session, is_session_idle, update_user_pacing
@@ -15,13 +18,13 @@ from app.utils.region_utils import infer_region_from_phone, get_timezone_from_re
 from app.utils.whatsapp import send_whatsapp_message
 from app.services.modify_thrum_reply import format_reply
 from app.utils.typing_indicator import send_typing_indicator
+from app.utils.metrics import record_latency
+from app.services.turn_worker import turn_worker
+from app.services.message_dedup import message_dedup
 
 
 router = APIRouter()
 
-# In-memory cache for recent messages (phone_number -> {message_hash: timestamp})
-recent_messages = {}
-
 # 🔁 Handles session update and sends the bot reply to chat processor
 async def user_chat(request, db, user, Body):
     session = await update_or_create_session(db, user)
@@ -40,75 +43,30 @@ async def bot_reply(request, db, user, reply):
     ]
     request.state.session_id = session.session_id
     session = await bot_chat_with_thrum(request=request, bot_reply=reply, db=db)
-user_message_buffer = {}     # phone_number -> [msg1, msg2, ...]
-is_reply_in_progress = {} 
-# 📲 Main WhatsApp webhook endpoint to process user messages
-@router.post("/webhook", response_class=PlainTextResponse)
-async def whatsapp_webhook(
-    request: Request,
-    From: str = Form(...),
-    Body: str = Form(...),
-    db: Session = Depends(get_db)
-):
-    # ---------- 1. Message Deduplication ----------
-    message_hash = hashlib.md5(f"{From}:{Body}".encode()).hexdigest()
-    now = datetime.utcnow()
-    if From in recent_messages:
-        if message_hash in recent_messages[From]:
-            if now - recent_messages[From][message_hash] < timedelta(seconds=10):
-                return  # Ignore duplicate - no response
-        # Clean old hashes
-        recent_messages[From] = {h: t for h, t in recent_messages[From].items()
-                                 if now - t < timedelta(seconds=30)}
-    else:
-        recent_messages[From] = {}
-    recent_messages[From][message_hash] = now
-
-    # ---------- 2. Get or Create User ----------
-    user = db.query(UserProfile).filter(UserProfile.phone_number == From).first()
-    if not user:
-        region = await infer_region_from_phone(From)
-        timezone_str = await get_timezone_from_region(From)
-        user = UserProfile(
-            phone_number=From,
-            region=region,
-            timezone=timezone_str,
-            platform=PlatformEnum.WhatsApp
-        )
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-
-    # ---------- 3. Buffer logic: If reply in progress, buffer message ----------
-    if is_reply_in_progress.get(From, False):
-        user_message_buffer.setdefault(From, []).append(Body)
-        return  # Do not process, just buffer
 
-    # ---------- 4. Start reply-in-progress state ----------
-    is_reply_in_progress[From] = True
+# ▶️ Runs one conversation turn; called by app/services/turn_worker.py after the webhook has acknowledged
+async def process_turn(db, user, user_input):
+    request = Request({"type": "http", "method": "POST", "path": "/api/v1/whatsapp/webhook", "headers": []})
 
-    # ---------- 5. Join buffered messages (if any) + this one ----------
-    all_msgs = user_message_buffer.pop(From, []) + [Body]
-    user_input = " ".join(all_msgs).strip()
-
-    # ---------- 6. Load/Create Session ----------
+    # ---------- 1. Load/Create Session ----------
     session = await update_or_create_session(db, user)
     request.scope["headers"] = list(request.scope["headers"]) + [
         (b"x-user-id", str(user.user_id).encode())
     ]
     request.state.session_id = session.session_id
+    request.state.defer_tone_detection = True
 
-    # ---------- 7. Process User Chat ----------
+    # ---------- 2. Process User Chat ----------
     payload = ChatRequest(user_input=user_input)
     session, intrection = await user_chat_with_thrum(request=request, payload=payload, db=db)
     
-    # ---------- 7.1. Update User Pacing ----------
+    # ---------- 2.1. Update User Pacing ----------
     update_user_pacing(session)
     if session.meta_data is None:
         session.meta_data = {}
     if session.meta_data.get("dont_give_name"):
         session.meta_data["message_count_since_name"] = session.meta_data.get("message_count_since_name", 0) + 1
-    db.commit()
+    await db.commit()
     
     session.followup_triggered = False
     session.intent_override_triggered = False
@@ -120,9 +78,9 @@ async def whatsapp_webhook(
         user.awaiting_reply = False
         session.meta_data['clarification_status'] = None
     user.last_thrum_timestamp = None
-    db.commit()
+    await db.commit()
 
-    # ---------- 8. Generate and Send Bot Reply ----------
+    # ---------- 3. Generate and Send Bot Reply ----------
     # Start typing indicator task
     if not session.meta_data:
         session.meta_data = {}
@@ -131,7 +89,7 @@ async def whatsapp_webhook(
     
     try:
         response_prompt = await generate_thrum_reply(
-            db=db, user=user, session=session, user_input=user_input, intrection=intrection
+            db=db, user=user, session=session, user_input=user_input, intrection=intrection, tone_pending=True
         )
         print('response_prompt........................................', response_prompt)
         reply = await format_reply(db=db, session=session, user_input=user_input, user_prompt=response_prompt)
@@ -154,29 +112,56 @@ async def whatsapp_webhook(
         sent_from_thrum=False
     )
 
-    # ---------- 9. Update Bot Chat State ----------
+    # ---------- 4. Update Bot Chat State ----------
     # (Register bot reply in chat memory)
     session = await bot_chat_with_thrum(request=request, bot_reply=reply,db=db)
     if session.phase != PhaseEnum.ENDING:
         user.awaiting_reply = True
     user.last_thrum_timestamp = datetime.utcnow()
-    db.commit()
+    await db.commit()
 
-    # ---------- 10. Clear reply-in-progress flag ----------
-    is_reply_in_progress[From] = False
+# 📲 Main WhatsApp webhook endpoint: stores the message and acknowledges, the turn runs in the background
+@router.post("/webhook", response_class=PlainTextResponse)
+async def whatsapp_webhook(
+    request: Request,
+    From: str = Form(...),
+    Body: str = Form(...),
+    MessageSid: str = Form(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    started = time.monotonic()
+    # ---------- 1. Message Deduplication ----------
+    # Twilio retries reuse the MessageSid; the same text sent twice by the user does not
+    if await message_dedup.seen(MessageSid):
+        return  # Ignore duplicate - no response
 
-    # ---------- 11. After reply: If user sent MORE messages while bot was replying, process them immediately ----------
-    # (Handle rapid multi-message scenarios: join all, process recursively)
-    if From in user_message_buffer and user_message_buffer[From]:
-        # Recursively process all new buffered messages as one input
-        # (prevents missed messages if user types even more before receiving bot reply)
-        all_msgs = user_message_buffer.pop(From, [])
-        joined_input = " ".join(all_msgs).strip()
-        # Recurse by calling webhook handler directly (safe for simple flows)
-        # Or you can schedule as a background task if needed for concurrency
-        await whatsapp_webhook(
-            request=request,
-            From=From,
-            Body=joined_input,
-            db=db
+    # ---------- 2. Get or Create User ----------
+    user = await db.scalar(select(UserProfile).where(UserProfile.phone_number == From).limit(1))
+    if not user:
+        region = await infer_region_from_phone(From)
+        timezone_str = await get_timezone_from_region(From)
+        user = UserProfile(
+            phone_number=From,
+            region=region,
+            timezone=timezone_str,
+            platform=PlatformEnum.WhatsApp
         )
+        db.add(user)
+        await db.commit()
+
+    # ---------- 3. Persist and hand off ----------
+    # Messages sent while a turn is running wait as pending rows and are answered together in the next turn
+    db.add(InboundMessage(user_id=user.user_id, phone_number=From, body=Body, message_sid=MessageSid))
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        # The unique sid index caught a delivery stored meanwhile (possibly by another worker)
+        await db.rollback()
+        if "ix_inbound_messages_message_sid" not in str(e.orig):
+            raise
+        await message_dedup.remember(MessageSid)
+        return
+    # Only now: a delivery that failed before this point must still be accepted on Twilio's retry
+    await message_dedup.remember(MessageSid)
+    await turn_worker.submit(From)
+    record_latency("whatsapp.ack", time.monotonic() - started)
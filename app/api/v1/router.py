@@ -6,7 +6,7 @@ This keeps routing modular and clean.
 
 # app/api/v1/router.py
 from fastapi import APIRouter
-from .endpoints import user, game, session, chat
+from .endpoints import user, game, session, chat, ops
 from app.api.v1.endpoints.whatsapp import router as whatsapp_router
 
 api_router = APIRouter()
@@ -15,4 +15,5 @@ api_router = APIRouter()
 api_router.include_router(session.router, prefix="/session", tags=["Session"])
 api_router.include_router(whatsapp_router, prefix="/whatsapp", tags=["WhatsApp"])
 api_router.include_router(chat.router, prefix="/user_chat", tags=["User_Chat"])
-api_router.include_router(chat.router, prefix="/bot_chat", tags=["Bot_Chat"])
\ No newline at end of file
+api_router.include_router(chat.router, prefix="/bot_chat", tags=["Bot_Chat"])
+api_router.include_router(ops.router, prefix="/ops", tags=["Ops"])
\ No newline at end of file
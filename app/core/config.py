@@ -18,4 +18,78 @@ class Settings:
     TWILIO_FEEDBACK_CONTENT_SID = os.getenv("TWILIO_FEEDBACK_CONTENT_SID")
     REDIS_URL = os.getenv("REDIS_URL")
 
+    # Recommendation ranking: "memory" scores candidates in-process, "pgvector" ranks them in SQL
+    RECOMMENDATION_BACKEND = os.getenv("RECOMMENDATION_BACKEND", "memory")
+    RECOMMENDATION_ANN_CANDIDATES = int(os.getenv("RECOMMENDATION_ANN_CANDIDATES", "200"))
+    # Fraction of recommendation requests that log candidate counts per filter step (0 = off)
+    RECOMMENDATION_DEBUG_SAMPLE_RATE = float(os.getenv("RECOMMENDATION_DEBUG_SAMPLE_RATE", "0"))
+
+    # Max number of cached text embeddings per model (see app/services/embedding_service.py)
+    EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+    # Genre vocabulary embeddings: on-disk cache and how often unique_values is re-checked
+    GENRE_EMBEDDINGS_CACHE_PATH = os.getenv("GENRE_EMBEDDINGS_CACHE_PATH", ".cache/genre_embeddings.npz")
+    GENRE_INDEX_REFRESH_SECONDS = float(os.getenv("GENRE_INDEX_REFRESH_SECONDS", "60"))
+    # Mood matching: "memory" uses the in-process MoodIndex, "pgvector" queries mood_cluster directly
+    MOOD_SEARCH_BACKEND = os.getenv("MOOD_SEARCH_BACKEND", "memory")
+    MOOD_INDEX_REFRESH_SECONDS = float(os.getenv("MOOD_INDEX_REFRESH_SECONDS", "60"))
+    # Fuzzy title matching: "memory" uses the in-process TitleIndex, "pg_trgm" queries trigram indexes
+    TITLE_SEARCH_BACKEND = os.getenv("TITLE_SEARCH_BACKEND", "memory")
+    # Fuzzy title matching: catalog re-check interval and rapidfuzz cdist workers (-1 = all cores)
+    TITLE_INDEX_REFRESH_SECONDS = float(os.getenv("TITLE_INDEX_REFRESH_SECONDS", "300"))
+    TITLE_MATCH_WORKERS = int(os.getenv("TITLE_MATCH_WORKERS", "1"))
+    # Per-turn classification: "split" runs the three classifiers concurrently, "combined" uses one structured call
+    TURN_ANALYSIS_MODE = os.getenv("TURN_ANALYSIS_MODE", "split")
+    # LLM gateway (app/services/llm_gateway.py): deadline per call incl. retries, retry count, in-flight caps
+    LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "20"))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "16"))
+    LLM_BACKGROUND_MAX_IN_FLIGHT = int(os.getenv("LLM_BACKGROUND_MAX_IN_FLIGHT", "4"))
+    # Metrics read-out: GET /api/v1/ops/metrics (X-Metrics-Token required when METRICS_TOKEN is set), periodic log (0 = off)
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+    METRICS_LOG_SECONDS = float(os.getenv("METRICS_LOG_SECONDS", "300"))
+    # LLM response cache for temperature=0 classifier calls; LLM_CACHE_REDIS=true adds a shared tier on REDIS_URL
+    LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "4096"))
+    LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+    LLM_CACHE_REDIS = os.getenv("LLM_CACHE_REDIS", "false").lower() == "true"
+    # Tone detection: "local" = MiniLM nearest-centroid, GPT only below the margin; "llm" = always GPT
+    TONE_DETECTION_MODE = os.getenv("TONE_DETECTION_MODE", "local")
+    TONE_LOCAL_MIN_MARGIN = float(os.getenv("TONE_LOCAL_MIN_MARGIN", "0.04"))
+    # Local tone confidence on GPT's 0-1 scale: "margin:confidence" points, interpolated (fit with calibrate_tone_classifier.py)
+    TONE_LOCAL_CONFIDENCE_CURVE = os.getenv("TONE_LOCAL_CONFIDENCE_CURVE", "0.0:0.5,0.04:0.65,0.1:0.8,0.2:0.92")
+    # Tone tagging of Thrum replies runs in the background: job interval and rows per batch
+    BOT_TONE_BACKFILL_SECONDS = int(os.getenv("BOT_TONE_BACKFILL_SECONDS", "30"))
+    BOT_TONE_BACKFILL_BATCH_SIZE = int(os.getenv("BOT_TONE_BACKFILL_BATCH_SIZE", "100"))
+    # Intent fast path in front of the GPT intent classifier: "local" enables rules + exemplar matching, "off" disables it
+    INTENT_ROUTER_MODE = os.getenv("INTENT_ROUTER_MODE", "local")
+    INTENT_ROUTER_MIN_SIMILARITY = float(os.getenv("INTENT_ROUTER_MIN_SIMILARITY", "0.85"))
+    INTENT_ROUTER_MIN_MARGIN = float(os.getenv("INTENT_ROUTER_MIN_MARGIN", "0.05"))
+    # Typing-indicator fillers: generated bank file and optional background regeneration (0 = off)
+    FILLER_BANK_PATH = os.getenv("FILLER_BANK_PATH", "app/data/filler_bank.json")
+    FILLER_BANK_REFRESH_HOURS = float(os.getenv("FILLER_BANK_REFRESH_HOURS", "0"))
+    # Nudges: concurrent generation calls / sends per run, and variants requested per generation call
+    NUDGE_MAX_CONCURRENCY = int(os.getenv("NUDGE_MAX_CONCURRENCY", "4"))
+    NUDGE_VARIANTS_PER_CALL = int(os.getenv("NUDGE_VARIANTS_PER_CALL", "4"))
+    # WhatsApp turns run in the background after the webhook acknowledges; seconds to let running turns finish on shutdown
+    TURN_WORKER_SHUTDOWN_SECONDS = float(os.getenv("TURN_WORKER_SHUTDOWN_SECONDS", "20"))
+    # Per-user turn serialization: "memory" (single worker) or "redis" (shared via REDIS_URL), lock TTL, debounce window and cap
+    TURN_MAILBOX_BACKEND = os.getenv("TURN_MAILBOX_BACKEND", "memory")
+    TURN_LOCK_TTL_SECONDS = float(os.getenv("TURN_LOCK_TTL_SECONDS", "60"))
+    TURN_DEBOUNCE_SECONDS = float(os.getenv("TURN_DEBOUNCE_SECONDS", "1.0"))
+    TURN_DEBOUNCE_MAX_SECONDS = float(os.getenv("TURN_DEBOUNCE_MAX_SECONDS", "4.0"))
+    # Webhook de-duplication on Twilio MessageSid: "memory" or "redis" (REDIS_URL), how long a sid is remembered, in-process cap
+    MESSAGE_DEDUP_BACKEND = os.getenv("MESSAGE_DEDUP_BACKEND", "memory")
+    MESSAGE_DEDUP_TTL_SECONDS = float(os.getenv("MESSAGE_DEDUP_TTL_SECONDS", "900"))
+    MESSAGE_DEDUP_MAX_ENTRIES = int(os.getenv("MESSAGE_DEDUP_MAX_ENTRIES", "100000"))
+    # Database engines (app/db/pool.py): pool size and overflow per engine, checkout timeout, connection recycle (seconds), pre-ping, SQL echo
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+    # Per-statement timeout in ms (0 = none), asyncpg prepared-statement cache size, PgBouncer transaction-mode compatibility
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000"))
+    DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+    DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() == "true"
+
 settings = Settings()
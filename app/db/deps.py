@@ -5,9 +5,10 @@ Ensures session is opened and closed cleanly per request.
 """
 
 
-from typing import Generator
+from typing import AsyncGenerator, Generator
 from sqlalchemy.orm import Session
-from app.db.session import SessionLocal
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import SessionLocal, AsyncSessionLocal
 
 def get_db() -> Generator[Session, None, None]:
     db = SessionLocal()
@@ -15,3 +16,7 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,49 @@
+"""
+Eager-loading options for the async request path.
+
+AsyncSession cannot lazy-load a relationship on attribute access, so code
+that reads session.interactions, session.user or
+session.game_recommendations[-1].game.platforms loads them up front with
+these options.
+"""
+
+# app/db/loaders.py
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from app.db.models.session import Session
+from app.db.models.game import Game
+from app.db.models.game_recommendations import GameRecommendation
+
+GAME_LOADERS = (
+    selectinload(Game.platforms),
+)
+
+RECOMMENDATION_LOADERS = (
+    selectinload(GameRecommendation.game).selectinload(Game.platforms),
+)
+
+SESSION_LOADERS = (
+    selectinload(Session.user),
+    selectinload(Session.interactions),
+    selectinload(Session.game_recommendations).selectinload(GameRecommendation.game).selectinload(Game.platforms),
+)
+
+
+def select_sessions():
+    return select(Session).options(*SESSION_LOADERS)
+
+
+def select_games():
+    return select(Game).options(*GAME_LOADERS)
+
+
+def select_recommendations():
+    return select(GameRecommendation).options(*RECOMMENDATION_LOADERS)
+
+
+async def load_session(db, session_id, reload: bool = False):
+    # reload=True re-reads a session already in `db` (e.g. one just committed), dropping unsaved changes
+    query = select_sessions().where(Session.session_id == session_id)
+    if reload:
+        query = query.execution_options(populate_existing=True)
+    return await db.scalar(query)
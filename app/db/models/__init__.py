@@ -6,4 +6,5 @@ from .enums import SessionTypeEnum
 from .mood_cluster import MoodCluster
 from .game_platforms import GamePlatform
 from .unique_value import UniqueValue
-from .game_recommendations import GameRecommendation
\ No newline at end of file
+from .game_recommendations import GameRecommendation
+from .inbound_message import InboundMessage
\ No newline at end of file
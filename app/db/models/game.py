@@ -7,12 +7,23 @@ These embeddings enable efficient similarity search using pgvector to power pers
 """
 
 from uuid import uuid4
-from sqlalchemy import Column, String, Text, JSON, ARRAY, Boolean
+from sqlalchemy import Column, String, Text, JSON, ARRAY, Boolean, Index, event
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from pgvector.sqlalchemy import Vector
 from app.db.base import Base
 
+# Tag columns that get a lower-cased, trimmed, de-duplicated copy for GIN lookups
+NORMALIZED_TAG_COLUMNS = ("genre", "subgenres", "game_vibes", "mood_tag")
+
+def normalize_tags(values):
+    if not values:
+        return []
+    if isinstance(values, str):
+        values = [values]
+    return sorted({v.strip().lower() for v in values if isinstance(v, str) and v.strip()})
+
 # Game Table
 class Game(Base):
     __tablename__ = "games"
@@ -57,3 +68,42 @@ class Game(Base):
     recommendations = relationship("GameRecommendation", back_populates="game")
 
     ratings = Column(JSON, nullable=True, default={})
+
+    # Normalized copies of the tag arrays, kept in sync on insert/update (see normalize_tags)
+    genre_norm = Column(postgresql.ARRAY(String), nullable=False, default=[], server_default="{}")
+    subgenres_norm = Column(postgresql.ARRAY(String), nullable=False, default=[], server_default="{}")
+    game_vibes_norm = Column(postgresql.ARRAY(String), nullable=False, default=[], server_default="{}")
+    mood_tag_norm = Column(postgresql.ARRAY(String), nullable=False, default=[], server_default="{}")
+
+    __table_args__ = (
+        # GIN indexes for && / @> tag filters
+        Index("ix_games_genre_norm_gin", "genre_norm", postgresql_using="gin"),
+        Index("ix_games_subgenres_norm_gin", "subgenres_norm", postgresql_using="gin"),
+        Index("ix_games_game_vibes_norm_gin", "game_vibes_norm", postgresql_using="gin"),
+        Index("ix_games_mood_tag_norm_gin", "mood_tag_norm", postgresql_using="gin"),
+        # pg_trgm index for TITLE_SEARCH_BACKEND=pg_trgm; the alternative_titles one is an
+        # expression index on game_alt_titles_text() and lives in migration e2c9b5f7a418
+        Index("ix_games_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+        # HNSW indexes for cosine (<=>) ordering in the pgvector recommendation path
+        Index(
+            "ix_games_gameplay_embedding_hnsw",
+            "gameplay_embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"gameplay_embedding": "vector_cosine_ops"},
+        ),
+        Index(
+            "ix_games_preference_embedding_hnsw",
+            "preference_embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"preference_embedding": "vector_cosine_ops"},
+        ),
+    )
+
+
+@event.listens_for(Game, "before_insert")
+@event.listens_for(Game, "before_update")
+def sync_normalized_tags(mapper, connection, target):
+    for name in NORMALIZED_TAG_COLUMNS:
+        setattr(target, f"{name}_norm", normalize_tags(getattr(target, name)))
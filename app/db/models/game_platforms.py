@@ -1,7 +1,7 @@
 # app/db/models/game_platforms.py
 
 from uuid import uuid4
-from sqlalchemy import Column, String, ForeignKey
+from sqlalchemy import Column, String, ForeignKey, Index, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.db.base import Base
@@ -16,4 +16,10 @@ class GamePlatform(Base):
     link = Column(String, nullable=True)
     distribution = Column(String, nullable=True)
 
-    game = relationship("Game", back_populates="platforms")
\ No newline at end of file
+    game = relationship("Game", back_populates="platforms")
+
+    __table_args__ = (
+        # Platform filters compare lower(platform) and semi-join on game_id
+        Index("ix_game_platforms_platform_lower", func.lower(platform)),
+        Index("ix_game_platforms_game_id", game_id),
+    )
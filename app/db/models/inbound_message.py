@@ -0,0 +1,45 @@
+"""
+SQLAlchemy model for inbound WhatsApp messages.
+
+The webhook stores each message here and acknowledges Twilio straight away;
+app/services/turn_worker.py then claims the pending messages of a phone number
+in arrival order and runs the conversation turn in the background.
+"""
+
+from uuid import uuid4
+from datetime import datetime
+from sqlalchemy import Column, String, Text, ForeignKey, TIMESTAMP, Index, text
+from sqlalchemy.dialects.postgresql import UUID
+from app.db.base import Base
+
+
+class InboundMessage(Base):
+    __tablename__ = "inbound_messages"
+
+    message_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("user_profiles.user_id"), nullable=True)
+    phone_number = Column(String, nullable=False)
+    body = Column(Text)
+    # Twilio's MessageSid, when the webhook received one; unique, so a retried delivery cannot be stored twice
+    message_sid = Column(String, nullable=True)
+    # pending -> processing -> done / failed
+    status = Column(String, nullable=False, default="pending")
+    error = Column(Text, nullable=True)
+
+    received_at = Column(TIMESTAMP, default=datetime.utcnow)
+    processed_at = Column(TIMESTAMP, nullable=True)
+
+    __table_args__ = (
+        # The worker claims a phone's pending messages oldest first
+        Index(
+            "ix_inbound_messages_pending",
+            phone_number, received_at,
+            postgresql_where=text("status = 'pending'"),
+        ),
+        Index(
+            "ix_inbound_messages_message_sid",
+            message_sid,
+            unique=True,
+            postgresql_where=text("message_sid IS NOT NULL"),
+        ),
+    )
@@ -8,7 +8,7 @@ It maintains a relationship with the Session model.
 
 from uuid import uuid4
 from datetime import datetime
-from sqlalchemy import Column, String, Text, Enum, ForeignKey, TIMESTAMP, Float, JSON
+from sqlalchemy import Column, String, Text, Enum, ForeignKey, TIMESTAMP, Float, JSON, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.mutable import MutableDict
@@ -39,3 +39,12 @@ class Interaction(Base):
     
     classification = Column(JSON, nullable=True)
 
+    __table_args__ = (
+        # Thrum replies still waiting for their tone tag (see app/services/tone_backfill.py)
+        Index(
+            "ix_interactions_thrum_tone_pending",
+            timestamp,
+            postgresql_where=text("sender = 'Thrum' AND tone_tag IS NULL"),
+        ),
+    )
+
@@ -1,6 +1,6 @@
 # app/db/models/mood_cluster.py
 
-from sqlalchemy import ARRAY, Column, String
+from sqlalchemy import ARRAY, Column, String, Index, func
 from pgvector.sqlalchemy import Vector
 from app.db.base import Base
 
@@ -10,4 +10,16 @@ class MoodCluster(Base):
     mood = Column(String, primary_key=True, index=True)
     game_tags = Column(ARRAY(String))  # fix: ARRAY needs type
     game_vibe = Column(ARRAY(String))  # fix: ARRAY needs type
-    embedding = Column(Vector(384))
\ No newline at end of file
+    embedding = Column(Vector(384))
+
+    # Cosine (<=>) index for MOOD_SEARCH_BACKEND=pgvector, and lower(mood) for its keyword match
+    __table_args__ = (
+        Index(
+            "ix_mood_cluster_embedding_hnsw",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        ),
+        Index("ix_mood_cluster_lower_mood", func.lower(mood)),
+    )
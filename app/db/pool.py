@@ -0,0 +1,99 @@
+"""
+Engine profile for the sync and async engines in app/db/session.py.
+
+All knobs come from the DB_* settings:
+
+- pool size, overflow, checkout timeout, recycle and pre-ping, per engine
+- statement_timeout, sent as a startup parameter so every pooled connection
+  has it without an extra round trip
+- asyncpg's server-side prepared statements: its own per-connection cache
+  (DB_STATEMENT_CACHE_SIZE) and SQLAlchemy's (same size)
+- DB_PGBOUNCER=true for PgBouncer in transaction mode: prepared statements
+  are off (another client may get the server connection next) and no
+  startup parameters are sent, since PgBouncer rejects them; set
+  statement_timeout on the database role instead
+
+Both pools record how long each checkout waited as "db.pool_checkout.sync" /
+"db.pool_checkout.async" in app/utils/metrics.py; a p95 close to
+DB_POOL_TIMEOUT means the pool is exhausted. Both, and the pool_status()
+gauges, are read through GET /api/v1/ops/metrics and the metrics log.
+"""
+
+# app/db/pool.py
+import time
+from uuid import uuid4
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from app.core.config import settings
+from app.utils.metrics import record_latency
+
+
+class TimedCheckout:
+    metric = "db.pool_checkout"
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            # Timeouts are recorded too, with a wait of about DB_POOL_TIMEOUT
+            record_latency(self.metric, time.perf_counter() - started)
+
+
+class TimedQueuePool(TimedCheckout, QueuePool):
+    metric = "db.pool_checkout.sync"
+
+
+class TimedAsyncQueuePool(TimedCheckout, AsyncAdaptedQueuePool):
+    metric = "db.pool_checkout.async"
+
+
+def async_database_url(url: str):
+    # Same database, asyncpg driver (postgresql:// and postgresql+psycopg2:// both map to it)
+    url = make_url(url)
+    query = dict(url.query)
+    if "sslmode" in query:
+        # asyncpg takes the same modes (disable ... verify-full) as its ssl argument, not as libpq's sslmode
+        query["ssl"] = query.pop("sslmode")
+    return url.set(drivername="postgresql+asyncpg", query=query)
+
+
+def engine_options(is_async: bool) -> dict:
+    """Keyword arguments for create_engine / create_async_engine."""
+    connect_args = {}
+    if settings.DB_PGBOUNCER:
+        if is_async:
+            connect_args.update(
+                statement_cache_size=0,
+                prepared_statement_cache_size=0,
+                # Unique names so a statement never collides with one left on a shared server connection
+                prepared_statement_name_func=lambda: f"__asyncpg_{uuid4()}__",
+            )
+    elif is_async:
+        connect_args["statement_cache_size"] = settings.DB_STATEMENT_CACHE_SIZE
+        connect_args["prepared_statement_cache_size"] = settings.DB_STATEMENT_CACHE_SIZE
+        if settings.DB_STATEMENT_TIMEOUT_MS:
+            connect_args["server_settings"] = {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+    elif settings.DB_STATEMENT_TIMEOUT_MS:
+        connect_args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+
+    return {
+        "poolclass": TimedAsyncQueuePool if is_async else TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "echo": settings.DB_ECHO,
+        "connect_args": connect_args,
+    }
+
+
+def pool_status(engine) -> dict:
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "idle": pool.checkedin(),
+    }
@@ -1,13 +1,46 @@
 """
-Creates SQLAlchemy database engine and session factory.
+Creates SQLAlchemy database engines and session factories.
 
-These are used to interact with the database.
+- engine / SessionLocal: synchronous, for scripts, Alembic and Celery tasks
+- async_engine / AsyncSessionLocal: asyncpg, for everything that runs on the
+  event loop (webhook, turn pipeline, scheduler jobs), so a slow query only
+  suspends its own conversation instead of blocking the whole worker
+
+AsyncSessionLocal keeps objects loaded after commit (expire_on_commit=False):
+an expired attribute would need a lazy load, which AsyncSession cannot do
+implicitly. Relationships are loaded explicitly instead (see
+app/db/loaders.py).
+
+Pool sizing, timeouts, prepared statements and PgBouncer mode come from the
+DB_* settings (see app/db/pool.py); pool_stats() shows how full each pool is
+and is reported as "db_pools" by GET /api/v1/ops/metrics and the metrics log.
 """
 
 # app/db/session.py
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.db.pool import async_database_url, engine_options, pool_status
+from app.utils.metrics import register_stats
 
-engine = create_engine(settings.DATABASE_URL, echo=True, future=True)
+engine = create_engine(settings.DATABASE_URL, future=True, **engine_options(is_async=False))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+async_engine = create_async_engine(async_database_url(settings.DATABASE_URL), **engine_options(is_async=True))
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+@event.listens_for(async_engine.sync_engine, "connect")
+def register_vector_type(dbapi_connection, connection_record):
+    # pgvector columns (game embeddings) need the codec on every asyncpg connection
+    from pgvector.asyncpg import register_vector
+    dbapi_connection.run_async(register_vector)
+
+
+def pool_stats() -> dict:
+    return {"sync": pool_status(engine), "async": pool_status(async_engine)}
+
+
+register_stats("db_pools", pool_stats)
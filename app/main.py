@@ -18,11 +18,19 @@ logging.getLogger("uvicorn.error").setLevel(logging.ERROR)
 logging.getLogger("fastapi").setLevel(logging.ERROR)
 logging.getLogger('sqlalchemy.engine.Engine').disabled = True
 
+import asyncio
 from fastapi import FastAPI
 from app.middleware.session_middleware import SessionIDMiddleware
 from app.api.v1.router import api_router
 from fastapi.middleware.cors import CORSMiddleware
 from app.utils.scheduler import start_scheduler, stop_scheduler
+from app.services.llm_gateway import llm_gateway
+from app.services.turn_worker import turn_worker
+from app.services.message_dedup import message_dedup
+from app.services.tone_classifier import tone_classifier
+from app.services.intent_router import intent_router
+from app.services.embedding_service import get_embedding_service, BGE_MODEL, MINILM_MODEL
+from app.core.config import settings
 
 app = FastAPI(title="Thrum Backend")
 
@@ -41,11 +49,35 @@ app.add_middleware(
 app.include_router(api_router, prefix="/api/v1")
 
 
+async def warm_models():
+    # Model loads and centroid builds, in a worker thread, before the first message needs them
+    for model_name in (MINILM_MODEL, BGE_MODEL):
+        try:
+            await asyncio.to_thread(get_embedding_service(model_name).load)
+        except Exception as e:
+            print(f"⚠️ Embedding model {model_name} warm-up failed, it will be loaded on first use: {e}")
+    if settings.TONE_DETECTION_MODE == "local":
+        try:
+            await asyncio.to_thread(tone_classifier.build)
+        except Exception as e:
+            print(f"⚠️ Tone classifier warm-up failed, it will be built on first use: {e}")
+    if settings.INTENT_ROUTER_MODE == "local":
+        try:
+            await asyncio.to_thread(intent_router.build)
+        except Exception as e:
+            print(f"⚠️ Intent router warm-up failed, it will be built on first use: {e}")
+
+
 @app.on_event("startup")
-def on_startup():
+async def on_startup():
     print('Thrum started ........')
+    await warm_models()
     start_scheduler()
+    await turn_worker.resume_pending()
 
 @app.on_event("shutdown")
-def on_shutdown():
-    stop_scheduler()
\ No newline at end of file
+async def on_shutdown():
+    stop_scheduler()
+    await turn_worker.shutdown()
+    await message_dedup.aclose()
+    await llm_gateway.aclose()
\ No newline at end of file
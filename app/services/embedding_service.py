@@ -0,0 +1,102 @@
+# 📄 File: app/services/embedding_service.py
+"""
+Process-wide sentence embedding service.
+
+Each SentenceTransformer model is loaded once per process and shared by every
+caller (recommendations, mood matching, genre matching). The app loads both
+in a worker thread at startup (app/main.py); elsewhere they load on first use.
+Embeddings of repeated strings such as keyword joins, genre names and mood
+words are kept in a bounded LRU so they are only encoded once.
+"""
+
+import threading
+from collections import OrderedDict
+import numpy as np
+from app.core.config import settings
+
+BGE_MODEL = "BAAI/bge-base-en-v1.5"        # 768-dim, matches games.*_embedding
+MINILM_MODEL = "all-MiniLM-L12-v2"         # 384-dim, matches mood clusters and genre vocabulary
+
+
+class EmbeddingService:
+    def __init__(self, model_name: str, cache_size: int = 2048):
+        self.model_name = model_name
+        self.cache_size = cache_size
+        self._model = None
+        self._cache = OrderedDict()
+        self._load_lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def model(self):
+        # Lazy load so importing a module never pays for a model it does not use
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+                    print(f"🧠 Loading embedding model: {self.model_name}")
+                    self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    def load(self):
+        # Load the model now, e.g. from a worker thread at startup, instead of inside the first request
+        return self.model
+
+    def _get(self, text):
+        with self._cache_lock:
+            vec = self._cache.get(text)
+            if vec is not None:
+                self._cache.move_to_end(text)
+                self.hits += 1
+            return vec
+
+    def _put(self, text, vec):
+        # Cached arrays are shared between callers, so they are made read-only
+        vec = np.asarray(vec)
+        vec.setflags(write=False)
+        with self._cache_lock:
+            self._cache[text] = vec
+            self._cache.move_to_end(text)
+            self.misses += 1
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return vec
+
+    def encode(self, text: str) -> np.ndarray:
+        vec = self._get(text)
+        if vec is None:
+            vec = self._put(text, self.model.encode(text))
+        return vec
+
+    def encode_batch(self, texts) -> np.ndarray:
+        # One model call for all cache misses; rows come back in input order
+        texts = list(texts)
+        vectors = [self._get(t) for t in texts]
+        missing = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+        if missing:
+            encoded = dict(zip(missing, (self._put(t, v) for t, v in zip(missing, self.model.encode(missing)))))
+            vectors = [encoded[t] if v is None else v for t, v in zip(texts, vectors)]
+        if not vectors:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack(vectors)
+
+    def cache_info(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._cache), "max_size": self.cache_size}
+
+    def cache_clear(self):
+        with self._cache_lock:
+            self._cache.clear()
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def get_embedding_service(model_name: str) -> EmbeddingService:
+    # One EmbeddingService (and so one model instance) per model name per process
+    with _services_lock:
+        if model_name not in _services:
+            _services[model_name] = EmbeddingService(model_name, cache_size=settings.EMBEDDING_CACHE_SIZE)
+        return _services[model_name]
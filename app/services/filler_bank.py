@@ -0,0 +1,164 @@
+# 📄 File: app/services/filler_bank.py
+"""
+Bank of typing-indicator fillers, generated ahead of time.
+
+Fillers are bucketed by reply context (the session phase, see
+typing_indicator.get_reply_context) and a vibe derived from the user's tone
+and mood: "hype", "empathy" or "light". At runtime filler_bank.pick chooses one
+locally, so a filler costs no LLM call and no tokens.
+
+The bank is loaded from FILLER_BANK_PATH when the file exists, otherwise the
+built-in FILLER_SEEDS are used. generate_filler_bank.py (or the optional
+scheduler job, FILLER_BANK_REFRESH_HOURS) regenerates the file with GPT.
+"""
+
+import json
+import os
+import random
+import re
+from app.core.config import settings
+from app.services.llm_gateway import llm_gateway, PRIORITY_FILLER
+
+REPLY_CONTEXTS = [
+    "greeting", "mood_exploration", "preference_confirmation", "game_recommendation",
+    "feedback_collection", "general_chat",
+]
+VIBES = ["hype", "empathy", "light"]
+
+HYPE_TONES = {"excited", "enthusiastic", "hyped", "genz", "playful", "cheerful", "vibey", "edgy", "optimistic"}
+EMPATHY_TONES = {"frustrated", "annoyed", "impatient", "confused", "pessimistic", "apologetic", "cold", "bored", "disengaged", "sincere", "cautious"}
+LOW_MOODS = {"sad", "tired", "stressed", "anxious", "lonely", "down", "frustrated", "angry", "exhausted", "bored", "overwhelmed"}
+HIGH_MOODS = {"happy", "excited", "energetic", "hyped", "pumped", "competitive", "adventurous"}
+
+MAX_FILLER_WORDS = 6
+
+# Used when no generated bank file exists; every context falls back to general_chat
+FILLER_SEEDS = {
+    "general_chat": {
+        "hype": ["ooh hold up 🔥", "okay okay, on it", "love that energy", "say less, digging in", "yesss, one sec"],
+        "empathy": ["gotchu, one sec", "hear you, hang tight", "fair, let me look", "all good, on it", "okay, I got this"],
+        "light": ["hmm, let me think", "one sec…", "on it 👀", "checking something", "hang on a sec"],
+    },
+    "game_recommendation": {
+        "hype": ["ooh, I've got ideas", "digging through the vault 🔥", "something good's coming", "okay this'll be fun"],
+        "empathy": ["finding a better fit", "got you, picking carefully", "let me get this right"],
+        "light": ["flipping through my list", "hmm, narrowing it down", "pulling something up 👀"],
+    },
+    "mood_exploration": {
+        "hype": ["ooh, that's a vibe", "okay I see you", "love that mood"],
+        "empathy": ["totally get that", "makes sense, one sec", "noted, I hear you"],
+        "light": ["noted 📝", "hmm, interesting", "okay, taking that in"],
+    },
+}
+
+
+def filler_vibe(tone: str, mood: str) -> str:
+    tone = (tone or "").lower()
+    mood = (mood or "").lower()
+    if tone in EMPATHY_TONES or mood in LOW_MOODS:
+        return "empathy"
+    if tone in HYPE_TONES or mood in HIGH_MOODS:
+        return "hype"
+    return "light"
+
+
+def is_valid_filler(text: str) -> bool:
+    # Same constraints the live filler prompt used: short, no questions
+    return bool(text) and "?" not in text and len(text.split()) <= MAX_FILLER_WORDS
+
+
+class FillerBank:
+    def __init__(self, path: str = None):
+        self.path = path
+        self.buckets = {}
+        self.loaded_mtime = None
+
+    def load(self):
+        buckets = FILLER_SEEDS
+        if self.path and os.path.exists(self.path):
+            try:
+                mtime = os.path.getmtime(self.path)
+                if mtime == self.loaded_mtime:
+                    return
+                with open(self.path, encoding="utf-8") as f:
+                    buckets = json.load(f)
+                self.loaded_mtime = mtime
+                print(f"💬 Loaded filler bank from {self.path}")
+            except Exception as e:
+                print(f"⚠️ Could not read filler bank {self.path}, using built-in fillers: {e}")
+        self.buckets = buckets
+
+    def candidates(self, reply_context: str, vibe: str) -> list:
+        self.load()  # picks up a bank file regenerated by another worker
+        for context in (reply_context, "general_chat"):
+            fillers = self.buckets.get(context, {}).get(vibe) or []
+            if fillers:
+                return fillers
+        return []
+
+    def pick(self, reply_context: str, tone: str, mood: str, avoid=()) -> str | None:
+        candidates = self.candidates(reply_context, filler_vibe(tone, mood))
+        avoid = set(avoid)
+        fresh = [f for f in candidates if f not in avoid]
+        return random.choice(fresh or candidates) if candidates else None
+
+    def save(self, buckets: dict):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(buckets, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+        self.buckets = buckets
+        self.loaded_mtime = os.path.getmtime(self.path)
+
+
+filler_bank = FillerBank(settings.FILLER_BANK_PATH)
+
+
+async def generate_bucket(reply_context: str, vibe: str, count: int) -> list:
+    prompt = f"""
+You are Thrum, a friendly game discovery buddy chatting like a real friend.
+Write {count} different quick filler reactions Thrum sends while its main reply is still loading.
+
+Conversation stage: {reply_context.replace('_', ' ')}
+Filler type: {vibe} ({'match high energy' if vibe == 'hype' else 'calm and supportive, never joking' if vibe == 'empathy' else 'light, casual comment'})
+
+Rules:
+- Absolutely no questions or question marks.
+- Do NOT mention or hint at any specific games, game titles, or recommendations.
+- Under {MAX_FILLER_WORDS} words each, human and casual, at most one emoji.
+- All lines must be different from each other.
+
+Return ONLY a JSON array of strings.
+"""
+    response = await llm_gateway.chat(
+        "filler_bank.generate_bucket",
+        priority=PRIORITY_FILLER,
+        model=os.getenv("GPT_MODEL"),
+        messages=[{"role": "user", "content": prompt.strip()}],
+        temperature=0.9,
+    )
+    content = re.sub(r"^```(?:json)?|```$", "", response.choices[0].message.content.strip()).strip()
+    fillers = [str(f).strip().strip('"') for f in json.loads(content)]
+    return list(dict.fromkeys(f for f in fillers if is_valid_filler(f)))
+
+
+async def generate_filler_bank(per_bucket: int = 12) -> dict:
+    buckets = {}
+    for reply_context in REPLY_CONTEXTS:
+        buckets[reply_context] = {}
+        for vibe in VIBES:
+            try:
+                buckets[reply_context][vibe] = await generate_bucket(reply_context, vibe, per_bucket)
+            except Exception as e:
+                print(f"⚠️ Filler generation failed for {reply_context}/{vibe}: {e}")
+                buckets[reply_context][vibe] = FILLER_SEEDS.get(reply_context, {}).get(vibe, [])
+            print(f"💬 {reply_context}/{vibe}: {len(buckets[reply_context][vibe])} fillers")
+    return buckets
+
+
+async def refresh_filler_bank():
+    # Scheduler job: regenerate the bank file in the background
+    buckets = await generate_filler_bank()
+    if any(fillers for vibes in buckets.values() for fillers in vibes.values()):
+        filler_bank.save(buckets)
@@ -1,35 +1,48 @@
-from sentence_transformers import SentenceTransformer
 from sqlalchemy.orm import Session
 from app.db.models.game_platforms import GamePlatform
 from app.db.models.game_recommendations import GameRecommendation
 from app.services.user_profile_update import set_pending_action
 from app.db.models.enums import PhaseEnum
 from app.db.models.game import Game
-from sqlalchemy import func, cast, Integer
-from scipy.spatial.distance import cosine
+from sqlalchemy import func, cast, Integer, select
+from app.services.game_scoring import CandidateScorer, top_k, rank_in_db, DISLIKE_THRESHOLD, PENALTY_WEIGHT, HIGH_PENALTY_WEIGHT
+from app.core.config import settings
+from app.db.loaders import GAME_LOADERS, select_games, select_recommendations
+from app.services.embedding_service import get_embedding_service, BGE_MODEL
 import numpy as np
-from sqlalchemy import text
+import random
 from sqlalchemy.orm.attributes import flag_modified
-model = SentenceTransformer("BAAI/bge-base-en-v1.5")
+embedder = get_embedding_service(BGE_MODEL)
 
 # Function to get the platform link for a given game and preferred platform
-def get_game_platform_link(game_id, preferred_platform, db_session):
+async def get_game_platform_link(game_id, preferred_platform, db_session):
     if preferred_platform is not None:
-        platform_entry = db_session.query(GamePlatform).filter_by(
-            game_id=game_id,
-            platform=preferred_platform
-        ).first()
+        platform_entry = await db_session.scalar(select(GamePlatform).where(
+            GamePlatform.game_id == game_id,
+            GamePlatform.platform == preferred_platform
+        ).limit(1))
         if platform_entry and platform_entry.link:
             return platform_entry.link
     else:
-        platform_entry = db_session.query(GamePlatform).filter(
+        platform_entry = await db_session.scalar(select(GamePlatform).where(
             GamePlatform.game_id == game_id,
             GamePlatform.link != None,
-        ).first()
+        ).limit(1))
         if platform_entry and platform_entry.link:
             return platform_entry.link
     return None
 
+HIGH_PENALTY_MOODS = {"sad", "angry", "anxious", "bored", "restless", "frustrated", "tired", "melancholic", "insecure","overwhelmed", "pessimistic", "stressed", "ashamed", "guilty", "shy", "fearful", "apathetic","sarcastic", "moody", "lonely"}
+
+# Semi-join on game_platforms (EXISTS), served by the lower(platform) and game_id indexes
+def available_on_platform(platform):
+    return Game.platforms.any(func.lower(GamePlatform.platform) == platform.lower())
+
+# Print a diagnostic row count only when this request was sampled for debugging
+async def debug_count(db, enabled, label, query):
+    if enabled:
+        print(f"{label}: {await db.scalar(select(func.count()).select_from(query.order_by(None).subquery()))}")
+
 # Helper function to convert vector arrays to a consistent format
 def to_vector(v):
     if v is None:
@@ -55,45 +68,40 @@ async def game_recommendation(db: Session, user, session):
 
     last_session_game = False
     # Step 2: Determine genre preference from session or user (use last genre from session)
-    last_session_liked_game = db.query(GameRecommendation).filter(
+    last_session_liked_game = await db.scalar(select_recommendations().where(
         GameRecommendation.user_id == user.user_id,
         GameRecommendation.accepted == True,
         GameRecommendation.session_id != session.session_id
-    ).order_by(GameRecommendation.timestamp.desc()).first()
+    ).order_by(GameRecommendation.timestamp.desc()).limit(1))
     
     # Check if the last liked game exists before trying to access its genre
     genre = session.genre if session.genre else None
-    # Step 3: Exclude rejected and already recommended games
+    # Debug counts are sampled: each one is an extra round trip over the candidate set
+    debug = random.random() < settings.RECOMMENDATION_DEBUG_SAMPLE_RATE
+
+    # Step 3: Exclude rejected and already recommended games (one deferred query, no materialization)
     rejected_game_ids = set(session.rejected_games or [])
-    recommended_ids = set(
-        r[0] for r in db.query(GameRecommendation.game_id).filter(
-            GameRecommendation.session_id == session.session_id
-        )
+    # game_id is nullable; a NULL in a NOT IN subquery would filter out every game
+    recommended_ids = select(GameRecommendation.game_id).where(
+        GameRecommendation.session_id == session.session_id,
+        GameRecommendation.game_id.isnot(None)
     )
-    print(f"[Step 3] Rejected games count: {len(rejected_game_ids)}, Recommended games count: {len(recommended_ids)}")
+    print(f"[Step 3] Rejected games count: {len(rejected_game_ids)}")
 
-    base_query = db.query(Game).filter(
+    base_query = select(Game).where(
         ~Game.game_id.in_(rejected_game_ids),
-        ~Game.game_id.in_(recommended_ids)
+        ~Game.game_id.in_(recommended_ids.scalar_subquery())
     )
-    print(f"[Step 3] Number of games before platform filter: {base_query.count()}")
+    await debug_count(db, debug, "[Step 3] Number of games before platform filter", base_query)
 
     reject_genres = set((session.meta_data or {}).get("reject_tags", {}).get("genre", []))
     rejected_genres_lower = [genre.strip().lower() for genre in reject_genres]
 
-    filtered_query = base_query.filter(
-        text("""
-            NOT EXISTS (
-                SELECT 1
-                FROM unnest(games.genre) AS g
-                WHERE LOWER(g) = ANY(:rejected_genres)
-            )
-        """)
-    ).params(rejected_genres=rejected_genres_lower)
-    base_query = filtered_query
-    print(f"[Step 3.1] Number of games after reject_genres filter: {base_query.count()}")
-    reject_genre_games = filtered_query.all()
-    print(f"[Step 3.2] after reject_genres filter: {len(reject_genre_games)}")
+    if rejected_genres_lower:
+        # Anti-join on the GIN-indexed genre_norm instead of unnesting every row
+        rejected_genre_game_ids = select(Game.game_id).where(Game.genre_norm.overlap(rejected_genres_lower))
+        base_query = base_query.filter(~Game.game_id.in_(rejected_genre_game_ids.scalar_subquery()))
+        await debug_count(db, debug, "[Step 3.1] Number of games after reject_genres filter", base_query)
 
     session_gameplay_embedding = None
     session_preference_embedding = None
@@ -102,13 +110,13 @@ async def game_recommendation(db: Session, user, session):
     mood = session.meta_data.get("mood", {})
 
     if session.gameplay_elements:
-        session_gameplay_embedding = model.encode(' '.join(session.gameplay_elements))
+        session_gameplay_embedding = embedder.encode(' '.join(session.gameplay_elements))
         print(f"[Step 9] Embedded gameplay_elements: {session.gameplay_elements}")
     if session.preferred_keywords or (tone or mood):
-        session_preference_embedding = model.encode(' '.join(session.preferred_keywords + [tone] + [mood]))
+        session_preference_embedding = embedder.encode(' '.join(session.preferred_keywords + [tone] + [mood]))
         print(f"[Step 9] Embedded preferred_keywords: {session.preferred_keywords, tone, mood}")
     if session.disliked_keywords:
-        session_disliked_embedding = model.encode(' '.join(session.disliked_keywords))
+        session_disliked_embedding = embedder.encode(' '.join(session.disliked_keywords))
         print(f"[Step 9] Embedded disliked_keywords: {session.disliked_keywords}")
 
     # Step 4: Early fallback if no platform or session information is available
@@ -123,26 +131,24 @@ async def game_recommendation(db: Session, user, session):
             disliked_keywords = last_session_liked_game.keywords.get("disliked_keywords", []) if last_session_liked_game.keywords else None
 
             if gameplay_elements is not None:
-                session_gameplay_embedding = model.encode(' '.join(gameplay_elements))
+                session_gameplay_embedding = embedder.encode(' '.join(gameplay_elements))
                 print(f"[Step 9] Embedded gameplay_elements: {gameplay_elements}")
             if preferred_keywords is not None:
-                session_preference_embedding = model.encode(' '.join(preferred_keywords))
+                session_preference_embedding = embedder.encode(' '.join(preferred_keywords))
                 print(f"[Step 9] Embedded preferred_keywords: {preferred_keywords}")
             if preferred_keywords is not None:
-                session_disliked_embedding = model.encode(' '.join(preferred_keywords))
+                session_disliked_embedding = embedder.encode(' '.join(preferred_keywords))
                 print(f"[Step 9] Embedded disliked_keywords: {disliked_keywords}")
             last_session_game = True
         
         else:
             print("[Step 4] Early fallback: No platform or preferences info, recommending random game.")
-            random_game = base_query.order_by(func.random()).first()
+            random_game = await db.scalar(base_query.options(*GAME_LOADERS).order_by(func.random()).limit(1))
             if not random_game:
                 print("[Step 4] Early fallback: No games in database.")
                 return None, None
-            platforms = db.query(GamePlatform.platform).filter(
-                GamePlatform.game_id == random_game.game_id
-            ).all()
-            link = get_game_platform_link(random_game.game_id, platform, db)
+            platforms = [p.platform for p in random_game.platforms]
+            link = await get_game_platform_link(random_game.game_id, platform, db)
             # Save recommendation
             session.game_rejection_count += 1
             flag_modified(session, "game_rejection_count")
@@ -150,6 +156,7 @@ async def game_recommendation(db: Session, user, session):
                 session_id=session.session_id,
                 user_id=user.user_id,
                 game_id=random_game.game_id,
+                game=random_game,
                 platform=session.platform_preference[-1] if session.platform_preference else None,
                 genre=session.genre if session.genre else None,
                 tone=session.meta_data.get("tone", {}) if session.meta_data.get("tone") else None,
@@ -161,11 +168,11 @@ async def game_recommendation(db: Session, user, session):
                 mood_tag=session.exit_mood if session.exit_mood else None,
                 accepted=None
             )
-            db.add(game_rec)
+            session.game_recommendations.append(game_rec)
             session.last_recommended_game = random_game.title
             session.phase = PhaseEnum.FOLLOWUP
             session.meta_data["ask_confirmation"] = True
-            db.commit()
+            await db.commit()
             # session.followup_triggered = True
             print(f"[Step 4] Early fallback: Random game recommended: {random_game.title}")
             await set_pending_action(db, session,'send_link',link)
@@ -177,7 +184,7 @@ async def game_recommendation(db: Session, user, session):
                 "complexity": random_game.complexity,
                 "visual_style": random_game.graphical_visual_style,
                 "has_story": random_game.has_story,
-                "platforms": [p[0] for p in platforms],
+                "platforms": platforms,
                 "link": link,
                 "last_session_game": {
                     "is_last_session_game": last_session_game,
@@ -192,12 +199,9 @@ async def game_recommendation(db: Session, user, session):
 
     # Step 5: Filter by platform availability
     if platform:
-        platform_game_ids = db.query(GamePlatform.game_id).filter(
-            func.lower(GamePlatform.platform) == platform.lower()
-        ).all()
-        platform_game_ids = [g[0] for g in platform_game_ids]
-        base_query = base_query.filter(Game.game_id.in_(platform_game_ids))
-        print(f"[Step 5] Filtered games by platform '{platform}', candidates left: {len(platform_game_ids)}")
+        base_query = base_query.filter(available_on_platform(platform))
+        print(f"[Step 5] Filtered games by platform '{platform}'.")
+        await debug_count(db, debug, "[Step 5] Number of games after platform filter", base_query)
     else:
         print("[Step 5] No platform filter applied.")
 
@@ -241,18 +245,15 @@ async def game_recommendation(db: Session, user, session):
         last_genre = genre[-1]  # Get the last genre from the genre list in session
         print(f"[Step 6] Applying filter for the last genre: {last_genre}")
         # Use robust, case-insensitive genre filter
-        filtered_query = base_query.filter(
-            text("EXISTS (SELECT 1 FROM unnest(genre) AS g WHERE LOWER(g) = :g)")
-        ).params(g=last_genre.strip().lower())
-        test_games = filtered_query.all()
-        print(f"[Step 6] Number of games after genre filter: {len(test_games)}")
-        if not test_games:
+        filtered_query = base_query.filter(Game.genre_norm.contains([last_genre.strip().lower()]))
+        if not await db.scalar(select(filtered_query.exists())):
             print(f"[:information_source:] No games found with genre '{last_genre}'.")
             return None, False
             # handle fallback here if needed
         else:
             base_query = filtered_query
-            print(f"[Step 6] Genre filter applied, {len(test_games)} games match.")
+            print(f"[Step 6] Genre filter applied for genre '{last_genre}'.")
+            await debug_count(db, debug, "[Step 6] Number of games after genre filter", base_query)
 
     # Step 7: Filter by user age if available
     user_age = None
@@ -268,70 +269,68 @@ async def game_recommendation(db: Session, user, session):
     else:
         print("[Step 7] No user age available; skipping age filter.")
 
-    base_games = base_query.all()
-    print(f"[Step 7] Number of candidate games after filters: {len(base_games)}")
-
-    # Step 8: If no games after applying all filters, fallback to random game
-    if not base_games:
-        return None, False
-
-    # Thresholds and weights
-    DISLIKE_THRESHOLD = 0.5  # similarity above which game is rejected
-    PENALTY_WEIGHT = 0.5     # penalty weight for dislike similarity
-    GAMEPLAY_WEIGHT = 0.6
-    PREFERENCE_WEIGHT = 0.4
-
-    HIGH_PENALTY_MOODS = {"sad", "angry", "anxious", "bored", "restless", "frustrated", "tired", "melancholic", "insecure","overwhelmed", "pessimistic", "stressed", "ashamed", "guilty", "shy", "fearful", "apathetic","sarcastic", "moody", "lonely"}
+    # Step 10: Penalty weight for disliked similarity
+    penalty_weight = PENALTY_WEIGHT
     mood = session.exit_mood if session.exit_mood else None
     if mood in HIGH_PENALTY_MOODS:
-        PENALTY_WEIGHT = 0.8  # Higher penalty for disliked similarity in high-penalty moods
+        penalty_weight = HIGH_PENALTY_WEIGHT  # Higher penalty for disliked similarity in high-penalty moods
     
-    print(f"PENALTY_WEIGHT : {PENALTY_WEIGHT}---------------------")
-
-    def compute_score(game: Game):
-        gameplay_sim = 0
-        preference_sim = 0
-        dislike_sim = 0
-
-        game_gameplay_embedding = to_vector(game.gameplay_embedding)
-        game_preference_embedding = to_vector(game.preference_embedding)
-
-        if session_gameplay_embedding is not None and game_gameplay_embedding is not None:
-            gameplay_sim = 1 - cosine(session_gameplay_embedding, game_gameplay_embedding)
-
-        if session_preference_embedding is not None and game_preference_embedding is not None:
-            preference_sim = 1 - cosine(session_preference_embedding, game_preference_embedding)
-
-        if session_disliked_embedding is not None and game_preference_embedding is not None:
-            dislike_sim = 1 - cosine(session_disliked_embedding, game_preference_embedding)
-            if dislike_sim >= DISLIKE_THRESHOLD:
-                print(f"[Step 10] Game '{game.title}' excluded due to disliked similarity: {dislike_sim}")
-                return 0
-
-        score = GAMEPLAY_WEIGHT * gameplay_sim + PREFERENCE_WEIGHT * preference_sim
-        # Soft penalty for disliked similarity if below threshold
-        if session_disliked_embedding is not None and dislike_sim < DISLIKE_THRESHOLD:
-            score -= PENALTY_WEIGHT * dislike_sim
-        return max(score, 0.01)
-
-    # Step 11: Score and rank candidate games
-    scored_games = [(g, compute_score(g)) for g in base_games]
-    ranked_games = sorted(scored_games, key=lambda x: x[1], reverse=True)
-
-    if not ranked_games:
-        print("[Step 11] No games scored above zero after embedding similarity.")
-        return None, None
-
-    # Optionally exclude last recommended game title
-    if session.last_recommended_game:
-        ranked_games = [rg for rg in ranked_games if rg[0].title != session.last_recommended_game]
-        print(f"[Step 11] Excluded last recommended game: {session.last_recommended_game}")
-        if not ranked_games:
+    print(f"PENALTY_WEIGHT : {penalty_weight}---------------------")
+
+    if settings.RECOMMENDATION_BACKEND == "pgvector":
+        # Step 11 (pgvector): rank in SQL, only the top game crosses the wire
+        if session.last_recommended_game:
+            base_query = base_query.filter(Game.title != session.last_recommended_game)
+            print(f"[Step 11] Excluded last recommended game: {session.last_recommended_game}")
+        ranked = await rank_in_db(
+            db,
+            base_query,
+            gameplay_vec=session_gameplay_embedding,
+            preference_vec=session_preference_embedding,
+            disliked_vec=session_disliked_embedding,
+            penalty_weight=penalty_weight,
+            limit=1,
+            ann_candidates=settings.RECOMMENDATION_ANN_CANDIDATES,
+        )
+        if not ranked:
+            print("[Step 11] No candidate games after filters.")
+            return None, False
+        top_game, top_game_score = ranked[0]
+        top_game = await db.scalar(select_games().where(Game.game_id == top_game.game_id))
+    else:
+        # Only the columns scoring needs; the full row is loaded for the winner alone
+        base_games = (await db.execute(base_query.with_only_columns(
+            Game.game_id, Game.title, Game.gameplay_embedding, Game.preference_embedding
+        ))).all()
+        print(f"[Step 7] Number of candidate games after filters: {len(base_games)}")
+
+        # Step 8: If no games after applying all filters, fallback to random game
+        if not base_games:
+            return None, False
+
+        scorer = CandidateScorer(base_games)
+        scores, excluded = scorer.score(
+            gameplay_vec=session_gameplay_embedding,
+            preference_vec=session_preference_embedding,
+            disliked_vec=session_disliked_embedding,
+            penalty_weight=penalty_weight,
+        )
+        if excluded.any():
+            print(f"[Step 10] {int(excluded.sum())} games excluded due to disliked similarity >= {DISLIKE_THRESHOLD}")
+
+        # Step 11: Rank candidate games, optionally excluding last recommended game title
+        mask = None
+        if session.last_recommended_game:
+            mask = [g.title != session.last_recommended_game for g in base_games]
+            print(f"[Step 11] Excluded last recommended game: {session.last_recommended_game}")
+        ranked = top_k(scores, 1, mask=mask)
+        if not ranked:
             print("[Step 11] No candidates after excluding last recommended game.")
             return None, None
 
-    top_game = ranked_games[0][0]
-    top_game_score = ranked_games[0][1]
+        top_game = await db.scalar(select_games().where(Game.game_id == base_games[ranked[0]].game_id))
+        top_game_score = float(scores[ranked[0]])
+
     print(f"[Step 11] Top game candidate: {top_game.title} with score {top_game_score:.4f}")
 
     # Step 12: Age verification check for recommendation
@@ -349,17 +348,16 @@ async def game_recommendation(db: Session, user, session):
         print(f"[Step 12] Age verification required: user age {user_age}, game age rating {game_age}")
 
     # Step 13: Retrieve platforms & purchase link
-    platforms = db.query(GamePlatform.platform).filter(
-        GamePlatform.game_id == top_game.game_id
-    ).all()
-    link = get_game_platform_link(top_game.game_id, platform, db)
-    print(f"[Step 13] Found platforms: {[p[0] for p in platforms]}, link: {link}")
+    platforms = [p.platform for p in top_game.platforms]
+    link = await get_game_platform_link(top_game.game_id, platform, db)
+    print(f"[Step 13] Found platforms: {platforms}, link: {link}")
 
     # Step 14: Save the recommendation record
     game_rec = GameRecommendation(
         session_id=session.session_id,
         user_id=user.user_id,
         game_id=top_game.game_id,
+        game=top_game,
         platform=platform,
         genre=session.genre if session.genre else None,
         tone=session.meta_data.get("tone", {}) if session.meta_data.get("tone") else None,
@@ -373,10 +371,10 @@ async def game_recommendation(db: Session, user, session):
     )
     session.game_rejection_count += 1
     flag_modified(session, "game_rejection_count")
-    db.add(game_rec)
+    session.game_recommendations.append(game_rec)
     session.meta_data["ask_confirmation"] = True
     session.last_recommended_game = top_game.title
-    db.commit()
+    await db.commit()
     session.phase = PhaseEnum.FOLLOWUP
     # session.followup_triggered = True
     print(f"[Step 14] Recommendation saved for game: {top_game.title}")
@@ -393,7 +391,7 @@ async def game_recommendation(db: Session, user, session):
             "complexity": top_game.complexity,
             "visual_style": top_game.graphical_visual_style,
             "has_story": top_game.has_story,
-            "platforms": [p[0] for p in platforms],
+            "platforms": platforms,
             "link": link,
             "last_session_game": {
                 "is_last_session_game": last_session_game,
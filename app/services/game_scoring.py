@@ -0,0 +1,204 @@
+# 📄 File: app/services/game_scoring.py
+"""
+Vectorized candidate scoring for game recommendations.
+
+Keeps the gameplay and preference embeddings of a candidate set as two
+contiguous, L2-normalized float32 matrices so every similarity in a request
+is one matrix-vector product instead of a per-game scipy cosine call.
+
+`rank_in_db` is the pgvector alternative: the same scoring pushed into SQL
+with `<=>`, so only the top rows leave the database.
+"""
+
+import numpy as np
+from sqlalchemy import and_, case, func, literal, select, text
+from sqlalchemy.orm import aliased
+from app.db.models.game import Game
+
+# Thresholds and weights (same rules game_recommendation always used)
+DISLIKE_THRESHOLD = 0.5  # similarity above which game is rejected
+PENALTY_WEIGHT = 0.5     # penalty weight for dislike similarity
+HIGH_PENALTY_WEIGHT = 0.8  # penalty weight used for high-penalty moods
+GAMEPLAY_WEIGHT = 0.6
+PREFERENCE_WEIGHT = 0.4
+MIN_SCORE = 0.01         # floor for every game that is not excluded
+
+
+def _normalize_query(vec):
+    # Query vectors are normalized in float64 and handed to the matmul as float32
+    if vec is None:
+        return None
+    vec = np.asarray(vec, dtype=np.float64).reshape(-1)
+    norm = np.linalg.norm(vec)
+    if norm == 0:
+        return None
+    return (vec / norm).astype(np.float32)
+
+
+def _stack_normalized(vectors, dim):
+    # Build a contiguous (n, dim) float32 matrix plus a mask of rows that had a vector
+    matrix = np.zeros((len(vectors), dim), dtype=np.float32)
+    present = np.zeros(len(vectors), dtype=bool)
+    for row, vec in enumerate(vectors):
+        if vec is None:
+            continue
+        vec = np.asarray(vec, dtype=np.float32).reshape(-1)
+        if vec.shape[0] != dim:
+            continue
+        matrix[row] = vec
+        present[row] = True
+    norms = np.linalg.norm(matrix, axis=1)
+    nonzero = norms > 0
+    matrix[nonzero] /= norms[nonzero, None]
+    return np.ascontiguousarray(matrix), present & nonzero
+
+
+def _embedding_dim(*columns):
+    for column in columns:
+        for vec in column:
+            if vec is not None:
+                return int(np.asarray(vec).size)
+    return 0
+
+
+class CandidateScorer:
+    """
+    Scores a fixed candidate set against session embeddings.
+
+    `rows` is any sequence of objects exposing `gameplay_embedding` and
+    `preference_embedding` (ORM rows or column tuples); results are indexed
+    in the same order as `rows`.
+    """
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+        gameplay = [getattr(r, "gameplay_embedding", None) for r in self.rows]
+        preference = [getattr(r, "preference_embedding", None) for r in self.rows]
+        dim = _embedding_dim(gameplay, preference)
+        self.gameplay_matrix, self.has_gameplay = _stack_normalized(gameplay, dim)
+        self.preference_matrix, self.has_preference = _stack_normalized(preference, dim)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def similarities(self, matrix, present, query):
+        # Cosine similarity of every candidate to `query`; 0 where either side is missing
+        query = _normalize_query(query)
+        if query is None or not len(self.rows) or query.shape[0] != matrix.shape[1]:
+            return None
+        sims = matrix @ query
+        sims[~present] = 0.0
+        return sims
+
+    def score(self, gameplay_vec=None, preference_vec=None, disliked_vec=None, penalty_weight=PENALTY_WEIGHT):
+        """
+        Returns (scores, excluded) for every candidate.
+
+        scores follow the original per-game rule: weighted gameplay/preference
+        similarity, hard exclusion (score 0) when the disliked similarity reaches
+        DISLIKE_THRESHOLD, a soft penalty below it, and a MIN_SCORE floor.
+        """
+        n = len(self.rows)
+        scores = np.zeros(n, dtype=np.float32)
+
+        gameplay_sim = self.similarities(self.gameplay_matrix, self.has_gameplay, gameplay_vec)
+        if gameplay_sim is not None:
+            scores += GAMEPLAY_WEIGHT * gameplay_sim
+
+        preference_sim = self.similarities(self.preference_matrix, self.has_preference, preference_vec)
+        if preference_sim is not None:
+            scores += PREFERENCE_WEIGHT * preference_sim
+
+        excluded = np.zeros(n, dtype=bool)
+        dislike_sim = self.similarities(self.preference_matrix, self.has_preference, disliked_vec)
+        if dislike_sim is not None:
+            excluded = self.has_preference & (dislike_sim >= DISLIKE_THRESHOLD)
+            scores -= penalty_weight * np.where(excluded, 0.0, dislike_sim).astype(np.float32)
+
+        scores = np.maximum(scores, MIN_SCORE)
+        scores[excluded] = 0.0
+        return scores, excluded
+
+
+def top_k(scores, k, mask=None):
+    """
+    Indices of the k best scores, highest first.
+
+    Ties keep candidate order (same as a stable sort of the full list), and
+    candidates where `mask` is False are skipped.
+    """
+    scores = np.asarray(scores)
+    candidates = np.arange(scores.shape[0])
+    if mask is not None:
+        candidates = candidates[np.asarray(mask, dtype=bool)]
+    if k <= 0 or candidates.size == 0:
+        return []
+    values = scores[candidates]
+    if k < candidates.size:
+        # Everything strictly above the k-th best value, then fill ties by position
+        kth = np.partition(values, values.size - k)[values.size - k]
+        above = candidates[values > kth]
+        ties = candidates[values == kth][: k - above.size]
+        candidates = np.concatenate([above, ties])
+        values = scores[candidates]
+    order = np.lexsort((candidates, -values))
+    return candidates[order].tolist()
+
+
+def _sql_similarity(column, query):
+    # 1 - cosine distance, 0 when the game has no embedding (same as the in-process path)
+    return case((column.isnot(None), 1 - column.cosine_distance(query)), else_=literal(0.0))
+
+
+def _scored_select(candidates, gameplay_vec, preference_vec, disliked_vec, penalty_weight, limit):
+    # Exact weighted score with the dislike rules over the `candidates` select
+    game = aliased(Game, candidates.subquery())
+    score = literal(0.0)
+    if gameplay_vec is not None:
+        score = score + GAMEPLAY_WEIGHT * _sql_similarity(game.gameplay_embedding, gameplay_vec)
+    if preference_vec is not None:
+        score = score + PREFERENCE_WEIGHT * _sql_similarity(game.preference_embedding, preference_vec)
+    if disliked_vec is not None:
+        dislike_sim = _sql_similarity(game.preference_embedding, disliked_vec)
+        score = case(
+            (and_(game.preference_embedding.isnot(None), dislike_sim >= DISLIKE_THRESHOLD), literal(0.0)),
+            else_=func.greatest(score - penalty_weight * dislike_sim, MIN_SCORE),
+        )
+    else:
+        score = func.greatest(score, MIN_SCORE)
+    return select(game, score.label("score")).order_by(score.desc(), game.game_id).limit(limit)
+
+
+async def rank_in_db(db, base_query, gameplay_vec=None, preference_vec=None, disliked_vec=None,
+               penalty_weight=PENALTY_WEIGHT, limit=1, ann_candidates=200):
+    """
+    Ranks the games matched by the `base_query` select inside Postgres.
+
+    The HNSW index on the gameplay (or preference) embedding picks the
+    `ann_candidates` nearest games, the exact weighted score with the dislike
+    rules orders them and only `limit` rows are returned as (Game, score).
+
+    The index scan runs before the filters on `base_query`, so with selective
+    filters it can come back short. It also never returns games without an
+    embedding, which the in-process path still scores at MIN_SCORE. When it
+    yields fewer than `limit` rows, or only rows no better than MIN_SCORE, the
+    whole filtered set is scored exactly instead.
+    """
+    gameplay_vec = _normalize_query(gameplay_vec)
+    preference_vec = _normalize_query(preference_vec)
+    disliked_vec = _normalize_query(disliked_vec)
+    scoring = (gameplay_vec, preference_vec, disliked_vec, penalty_weight, limit)
+
+    ann_vec, ann_column = (gameplay_vec, Game.gameplay_embedding) if gameplay_vec is not None \
+        else (preference_vec, Game.preference_embedding)
+    if ann_vec is not None:
+        # ef_search bounds how many rows an HNSW scan can return, so keep it >= the candidate pool
+        await db.execute(text(f"SET LOCAL hnsw.ef_search = {int(ann_candidates)}"))
+        candidates = base_query.order_by(ann_column.cosine_distance(ann_vec)).limit(ann_candidates)
+        rows = (await db.execute(_scored_select(candidates, *scoring))).all()
+        if len(rows) >= limit and float(rows[-1][1]) > MIN_SCORE:
+            return [(row[0], float(row[1])) for row in rows]
+        print(f"[rank_in_db] ANN pass returned {len(rows)} usable rows; scoring the filtered set exactly")
+
+    rows = (await db.execute(_scored_select(base_query, *scoring))).all()
+    return [(row[0], float(row[1])) for row in rows]
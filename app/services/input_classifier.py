@@ -1,4 +1,3 @@
-import openai
 import os
 import json
 from datetime import datetime
@@ -6,15 +5,14 @@ from openai import OpenAIError
 from app.db.models.session import Session
 from app.db.models.game_recommendations import GameRecommendation
 from app.db.models.enums import SenderEnum
+from app.db.loaders import select_recommendations
 
 from app.services.central_system_prompt import THRUM_PROMPT
+from app.services.llm_gateway import llm_gateway
+from app.services.prompt_builder import PromptPrefix, build_messages
 
-# Set API Key
-openai.api_key = os.getenv("OPENAI_API_KEY")
 model= os.getenv("GPT_MODEL")
 
-client = openai.AsyncOpenAI()
-
 # Define updated intents
 intents = [
     "Greet",
@@ -35,29 +33,8 @@ intents = [
     "About_FAQ"
 ]
 
-async def classify_user_intent(user_input: str, session,db, last_thrum_reply):
-    from app.services.session_memory import SessionMemory
-    
-    session_memory = SessionMemory(session,db)
-    memory_context_str = session_memory.to_prompt()
-
-    user_prompt = f"""
-USER MEMORY & RECENT CHAT (for your knowledge):
-{memory_context_str if memory_context_str else 'No prior user memory or recent chat.'}
-
---- 
-
-You are a classification engine for a conversational game assistant.
-User message: "{user_input}" (You have to classify from this.)
-last thrum reply: {last_thrum_reply} (This is the reply that Thrum gave to the user's last message)
-"""
-  
-    
-    final_system_prompt =  f"""
-USER MEMORY & RECENT CHAT:
-{memory_context_str if memory_context_str else 'No prior user memory or recent chat.'}
-
-**You are intent classifier**
+# Static part of the intent classifier system prompt (shared with the combined turn analyzer)
+INTENT_CLASSIFIER_RULES = """**You are intent classifier**
 **Special Rule:**  
 If the user's message is a greeting (e.g., "hi", "hello", "hey"), classify as Greet.
 
@@ -187,7 +164,7 @@ Your response must be pure JSON, not wrapped in any formatting.
 If you add backticks, markdown, or any extra text, it is a mistake.
 
 OUTPUT FORMAT (Strict JSON) strictly deny to add another text:
-{{
+{
     "Greet": true/false,
     "Phase_Discovery": true/false,
     "Request_Quick_Recommendation": true/false,
@@ -203,98 +180,11 @@ OUTPUT FORMAT (Strict JSON) strictly deny to add another text:
     "Request_Specific_Game": true/false,
     "Other": true/false,
     "About_FAQ": true/false
-}}
+}
 """
-    
-    try:
-        response = await client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": final_system_prompt.strip()},
-                {"role": "user", "content": user_prompt.strip()}
-            ],
-            temperature=0,
-        )
-        res = response.choices[0].message.content
-        # Try parsing the LLM output into JSON
-        try:
-            result = json.loads(res)
-            print("user_input: ", user_input)
-            print(f"intent : {result}")
-            return result
-        except Exception as e:
-            print(":x: GPT classification failed:", e)
-            # Return a default response if there is an error
-            return {
-                "Greet": False,
-                "Phase_Discovery": False,
-                "Request_Similar_Game": False,
-                "Request_Quick_Recommendation": False,
-                "Reject_Recommendation": False,
-                "Inquire_About_Game": False,
-                "Give_Info": False,
-                "Share_Game": False,
-                "Opt_Out": False,
-                "Other_Question": False,
-                "Confirm_Game": False,
-                "want_to_share_friend": False,
-                "Request_Specific_Game": False,
-                "Other": True,
-                "About_FAQ": False
-            }
-    except OpenAIError as e:
-        print(f"⚠️ OpenAI Error: {e}")
-        return {
-                "Greet": False,
-                "Phase_Discovery": False,
-                "Request_Similar_Game": False,
-                "Request_Quick_Recommendation": False,
-                "Reject_Recommendation": False,
-                "Inquire_About_Game": False,
-                "Give_Info": False,
-                "Share_Game": False,
-                "Opt_Out": False,
-                "Other_Question": False,
-                "Confirm_Game": False,
-                "want_to_share_friend": False,
-                "Request_Specific_Game": False,
-                "Other": True,
-                "About_FAQ": False
-            }
-
 
-    
-# ✅ Use OpenAI to classify mood, vibe, genre, and platform from free text
-async def classify_user_input(db,session, user_input: str) -> dict | str:
-    from app.services.session_memory import SessionMemory
-    # Get the last message from Thrum to include as context
-    thrum_interactions = [i for i in session.interactions if i.sender == SenderEnum.Thrum]
-    # Sort by timestamp descending
-    thrum_interactions = sorted(thrum_interactions, key=lambda x: x.timestamp, reverse=True)
-    last_thrum_reply = thrum_interactions[0].content if thrum_interactions else ""
-    last_game_obj = session.game_recommendations[-1].game if session.game_recommendations else None
-    if last_game_obj is not None:
-        last_game = {
-            "title": last_game_obj.title,
-            "description": last_game_obj.description if last_game_obj.description else None,
-            "genre": last_game_obj.genre,
-            "game_vibes": last_game_obj.game_vibes,
-            "complexity": last_game_obj.complexity,
-            "visual_style": last_game_obj.graphical_visual_style,
-            "has_story": last_game_obj.has_story,
-            "available_in_platforms":[platform.platform for platform in last_game_obj.platforms]
-        }
-    else:
-        last_game = None
-
-    session_memory = SessionMemory(session,db)
-    memory_context_str = session_memory.to_prompt()
-
-    final_system_prompt = f'''
-USER MEMORY & RECENT CHAT:
-{memory_context_str if memory_context_str else 'No prior user memory or recent chat.'}
-
-You are a classification engine inside a mood-based game recommendation bot.
+# Static part of the profile classifier system prompt (shared with the combined turn analyzer)
+PROFILE_CLASSIFIER_RULES = '''You are a classification engine inside a mood-based game recommendation bot.
 
 Your job is to extract and return the following user profile fields based on the user's input message.  
 You must infer from both keywords and tone—even if the user is casual, brief, or vague. Extract even subtle clues.
@@ -411,16 +301,16 @@ Strict rules:
    → If they react to specific games with name they mentioned in user input(just for an example. if user input is "i love Celeste" and you infere they actually like that game),then put that title in game, accepted as True or False based on their reaction, and reason as the reason why they like or dislike it.
    → If they react to specific games with like/dislike:
    [
-     {{
+     {
        "game": "Celeste",
        "accepted": false,
        "reason": "too intense for me"
-     }},
-     {{
+     },
+     {
        "game": "Unpacking",
        "accepted": true,
        "reason": "emotional and relaxing"
-     }}
+     }
    ]
    → Can be empty list if no feedback.
 
@@ -485,7 +375,7 @@ Strict rules:
 
 🛠️ OUTPUT FORMAT (Strict JSON):
 
-{{
+{
   "name": "...",
   "mood": ["..."],
   "game_vibe": ["..."],
@@ -498,11 +388,11 @@ Strict rules:
   "playtime_pref": ["..."],
   "reject_tags": ["..."],
   "game_feedback": [
-    {{
+    {
       "game": "...",
       "accepted": true/false/None,
       "reason": "..."
-    }}
+    }
   ],
   "find_game":"...",
   "gameplay_elements": ["..."],
@@ -510,7 +400,7 @@ Strict rules:
   "disliked_keywords": ["..."],
   "played_yet": true/false/None,
   "request_link": true/false
-}}
+}
 
 🧠 HINTS:
 - If a field is not mentioned or cannot be inferred, return "None" (or [] for lists).
@@ -519,7 +409,104 @@ Strict rules:
 - Do NOT add extra text or explanation — just return the clean JSON.
 '''
 
-    # Compose user prompt
+# Static instructions go first so the provider can cache them across users
+INTENT_PREFIX = PromptPrefix("classify_user_intent", "v1", INTENT_CLASSIFIER_RULES)
+PROFILE_PREFIX = PromptPrefix("classify_user_input", "v1", PROFILE_CLASSIFIER_RULES)
+
+def memory_context(memory_context_str: str) -> str:
+    return f"""
+USER MEMORY & RECENT CHAT:
+{memory_context_str if memory_context_str else 'No prior user memory or recent chat.'}
+"""
+
+def build_intent_messages(memory_context_str: str, user_input: str, last_thrum_reply: str) -> list:
+    user_prompt = f"""
+You are a classification engine for a conversational game assistant.
+User message: "{user_input}" (You have to classify from this.)
+last thrum reply: {last_thrum_reply} (This is the reply that Thrum gave to the user's last message)
+"""
+    return build_messages("input_classifier.classify_user_intent", INTENT_PREFIX, memory_context(memory_context_str), user_prompt)
+
+async def classify_user_intent(user_input: str, session,db, last_thrum_reply, memory=None):
+    from app.services.session_memory import SessionMemory
+    
+    session_memory = memory or await SessionMemory.load(session, db)
+    memory_context_str = session_memory.to_prompt()
+    messages = build_intent_messages(memory_context_str, user_input, last_thrum_reply)
+    
+    try:
+        response = await llm_gateway.chat(
+            "input_classifier.classify_user_intent",
+            model=model,
+            messages=messages,
+            temperature=0,
+        )
+        res = response.choices[0].message.content
+        # Try parsing the LLM output into JSON
+        try:
+            result = json.loads(res)
+            print("user_input: ", user_input)
+            print(f"intent : {result}")
+            return result
+        except Exception as e:
+            print(":x: GPT classification failed:", e)
+            # Return a default response if there is an error
+            return {
+                "Greet": False,
+                "Phase_Discovery": False,
+                "Request_Similar_Game": False,
+                "Request_Quick_Recommendation": False,
+                "Reject_Recommendation": False,
+                "Inquire_About_Game": False,
+                "Give_Info": False,
+                "Share_Game": False,
+                "Opt_Out": False,
+                "Other_Question": False,
+                "Confirm_Game": False,
+                "want_to_share_friend": False,
+                "Request_Specific_Game": False,
+                "Other": True,
+                "About_FAQ": False
+            }
+    except OpenAIError as e:
+        print(f"⚠️ OpenAI Error: {e}")
+        return {
+                "Greet": False,
+                "Phase_Discovery": False,
+                "Request_Similar_Game": False,
+                "Request_Quick_Recommendation": False,
+                "Reject_Recommendation": False,
+                "Inquire_About_Game": False,
+                "Give_Info": False,
+                "Share_Game": False,
+                "Opt_Out": False,
+                "Other_Question": False,
+                "Confirm_Game": False,
+                "want_to_share_friend": False,
+                "Request_Specific_Game": False,
+                "Other": True,
+                "About_FAQ": False
+            }
+
+
+    
+# Summary of the last recommended game passed to the classifiers as context
+def get_last_game_context(session):
+    last_game_obj = session.game_recommendations[-1].game if session.game_recommendations else None
+    if last_game_obj is None:
+        return None
+    return {
+        "title": last_game_obj.title,
+        "description": last_game_obj.description if last_game_obj.description else None,
+        "genre": last_game_obj.genre,
+        "game_vibes": last_game_obj.game_vibes,
+        "complexity": last_game_obj.complexity,
+        "visual_style": last_game_obj.graphical_visual_style,
+        "has_story": last_game_obj.has_story,
+        "available_in_platforms":[platform.platform for platform in last_game_obj.platforms]
+    }
+
+def build_profile_messages(memory_context_str: str, user_input: str, last_thrum_reply: str, last_game) -> list:
     user_prompt = f'''
 Previous bot message:
 Thrum: "{last_thrum_reply}"
@@ -534,14 +521,27 @@ last recommended game:
 - classify based on user's reply and thrum's message (understand it deeply what they want to say.)
 Now classify into the format below.
 '''
+    return build_messages("input_classifier.classify_user_input", PROFILE_PREFIX, memory_context(memory_context_str), user_prompt)
+
+# ✅ Use OpenAI to classify mood, vibe, genre, and platform from free text
+async def classify_user_input(db,session, user_input: str, memory=None) -> dict | str:
+    from app.services.session_memory import SessionMemory
+    # Get the last message from Thrum to include as context
+    thrum_interactions = [i for i in session.interactions if i.sender == SenderEnum.Thrum]
+    # Sort by timestamp descending
+    thrum_interactions = sorted(thrum_interactions, key=lambda x: x.timestamp, reverse=True)
+    last_thrum_reply = thrum_interactions[0].content if thrum_interactions else ""
+    last_game = get_last_game_context(session)
+
+    session_memory = memory or await SessionMemory.load(session, db)
+    memory_context_str = session_memory.to_prompt()
+    messages = build_profile_messages(memory_context_str, user_input, last_thrum_reply, last_game)
 
     try:    
-        response = await client.chat.completions.create(
+        response = await llm_gateway.chat(
+            "input_classifier.classify_user_input",
             model=model,
-            messages=[
-                {"role": "system", "content": final_system_prompt.strip()},
-                {"role": "user", "content": user_prompt.strip()}
-            ],
+            messages=messages,
             temperature=0,
         )
 
@@ -612,10 +612,10 @@ async def safe_to_list(val):
 
 async def have_to_recommend(db: Session, user, classification: dict, session) -> bool:
     # Retrieve the last game recommendation for the user in the current session
-    last_rec = db.query(GameRecommendation).filter(
+    last_rec = await db.scalar(select_recommendations().where(
         GameRecommendation.user_id == user.user_id,
         GameRecommendation.session_id == session.session_id
-    ).order_by(GameRecommendation.timestamp.desc()).first() 
+    ).order_by(GameRecommendation.timestamp.desc()).limit(1))
     # If no previous recommendation exists, return True (new recommendation needed)
     if not last_rec:
         return True
@@ -665,7 +665,7 @@ async def have_to_recommend(db: Session, user, classification: dict, session) ->
         if session_genre not in last_rec_genre_list:
             last_rec.accepted = False
             last_rec.reason = f"likes specific {session_genre} games"
-            db.commit()
+            await db.commit()
             return True  # Genre mismatch, new recommendation needed
 
     # PLATFORM CHECK
@@ -673,7 +673,7 @@ async def have_to_recommend(db: Session, user, classification: dict, session) ->
         if session_platform not in last_rec_platforms_list:
             last_rec.accepted = False
             last_rec.reason = f"want {session_platform} games but this is not in that platform"
-            db.commit()
+            await db.commit()
             return True  # Platform mismatch
 
     # REJECT TAG (GENRE) CHECK
@@ -684,7 +684,7 @@ async def have_to_recommend(db: Session, user, classification: dict, session) ->
             print(f"❌ Last rejected genre '{last_genre_reject_tag}' is present in game's genre: {last_rec_genre_list}")
             last_rec.accepted = False
             last_rec.reason = f"user recently rejected genre: {last_genre_reject_tag}"
-            db.commit()
+            await db.commit()
             return True
 
     # GAME FEEDBACK CHECK
@@ -698,7 +698,7 @@ async def have_to_recommend(db: Session, user, classification: dict, session) ->
 async def classify_input_ambiguity(db,session,user,user_input, last_thrum_reply):
   tone = session.meta_data.get("tone",'Nutrual')
   mood = session.exit_mood if session.exit_mood else "neutral"
-  games = db.query(GameRecommendation).filter(GameRecommendation.session_id == session.session_id, GameRecommendation.accepted==True).all()
+  games = (await db.scalars(select_recommendations().where(GameRecommendation.session_id == session.session_id, GameRecommendation.accepted==True))).all()
   liked_games = [g.game.title for g in games if games]
   user_prompt=  f"""
 You are Thrum — a chill, emotionally-aware game discovery buddy.
@@ -734,7 +734,8 @@ Output only: YES or NO
 """
   print(f"user_promt ; {user_prompt}")
   try:    
-    response = await client.chat.completions.create(
+    response = await llm_gateway.chat(
+      "input_classifier.classify_input_ambiguity",
       model=model,
       messages=[
         
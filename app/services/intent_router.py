@@ -0,0 +1,165 @@
+# 📄 File: app/services/intent_router.py
+"""
+Fast path in front of input_classifier.classify_user_intent.
+
+Many turns are trivially routable ("another one", "bye", "what platforms?").
+route_intent answers those without the GPT intent prompt:
+
+1. rules: exact match of the normalized message against known phrases
+2. embedding: nearest exemplar (shared MiniLM model), accepted only when it is
+   similar enough and clearly ahead of the best exemplar of any other intent
+3. gpt: classify_user_intent, for everything else
+
+Some intents depend on the conversation: Greet only applies before Thrum has
+said anything, and rejecting or asking about a game needs a recommended game.
+Intents whose meaning depends on Thrum's last question (bare "yes"/"sure",
+Give_Info, Phase_Discovery, Confirm_Game) are always left to GPT.
+
+The result is the same one-hot intent dict classify_user_intent returns, and
+the answering path is counted in app/utils/metrics.py (router_stats()).
+"""
+
+import re
+import asyncio
+import threading
+import numpy as np
+from app.services.input_classifier import classify_user_intent, intents
+from app.services.embedding_service import get_embedding_service, MINILM_MODEL
+from app.utils.metrics import record_router_path
+from app.core.config import settings
+
+# Normalized phrase -> intent
+LEXICAL_RULES = {
+    **dict.fromkeys([
+        "another one", "another", "one more", "next", "next one", "give me a game", "give me another",
+        "give me another one", "suggest a game", "suggest me a game", "recommend a game", "recommend me a game",
+        "give me something", "show me another", "something else", "try another",
+    ], "Request_Quick_Recommendation"),
+    **dict.fromkeys([
+        "bye", "bye bye", "goodbye", "stop", "im done", "i am done", "leave me alone", "see ya", "see you",
+        "cya", "gtg", "good night", "goodnight", "unsubscribe",
+    ], "Opt_Out"),
+    **dict.fromkeys([
+        "how does it work", "how does this work", "what can you do", "what do you do", "who are you",
+        "what is this", "are you a bot", "what is thrum", "whats thrum", "tell me about yourself",
+    ], "About_FAQ"),
+    **dict.fromkeys(["hi", "hello", "hey", "yo", "hiya", "sup", "hey there", "hello there"], "Greet"),
+    **dict.fromkeys([
+        "what platforms", "which platforms", "what platform", "where can i play it", "link", "send link",
+        "send me the link", "where can i get it", "whats it about", "tell me more", "more info",
+    ], "Inquire_About_Game"),
+    **dict.fromkeys([
+        "not that one", "nah not that one", "i dont like it", "i dont like this", "not for me",
+        "nope not that one", "dont like it",
+    ], "Reject_Recommendation"),
+}
+
+# Extra paraphrases for the embedding path, on top of the rule phrases
+INTENT_EXEMPLARS = {
+    "Request_Quick_Recommendation": ["can you recommend me something to play", "hit me with a game", "got any game for me", "what should i play now"],
+    "Opt_Out": ["i want to stop now", "that's enough for today", "talk later", "please stop messaging me"],
+    "About_FAQ": ["how do you pick games", "what are you exactly", "how does thrum find games", "is this an ai"],
+    "Greet": ["hey how are you", "good morning", "hello friend"],
+    "Inquire_About_Game": ["is it on playstation", "how much does it cost", "can i play it on my phone", "what's the gameplay like"],
+    "Reject_Recommendation": ["nah i don't want that one", "not feeling that game", "that one's not for me", "skip that"],
+}
+
+# Conditions an intent needs before the fast path may return it
+def allowed_intents(context: dict) -> set:
+    allowed = {"Request_Quick_Recommendation", "Opt_Out", "About_FAQ"}
+    if not context["has_thrum_reply"]:
+        allowed.add("Greet")
+    if context["has_recommendation"]:
+        allowed |= {"Inquire_About_Game", "Reject_Recommendation"}
+    return allowed
+
+
+def routing_context(session, last_thrum_reply: str) -> dict:
+    return {
+        "has_thrum_reply": bool(last_thrum_reply),
+        "has_recommendation": bool(getattr(session, "game_recommendations", None)),
+    }
+
+
+def normalize(text: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", "", (text or "").lower()).split())
+
+
+def intent_flags(intent: str) -> dict:
+    # Same shape as classify_user_intent: every intent False except one
+    return {name: name == intent for name in intents}
+
+
+def lexical_intent(user_input: str, context: dict):
+    intent = LEXICAL_RULES.get(normalize(user_input))
+    return intent if intent in allowed_intents(context) else None
+
+
+class IntentRouter:
+    def __init__(self, embedder=None, exemplars: dict = None):
+        self.embedder = embedder or get_embedding_service(MINILM_MODEL)
+        if exemplars is None:
+            exemplars = {intent: list(phrases) for intent, phrases in INTENT_EXEMPLARS.items()}
+            for phrase, intent in LEXICAL_RULES.items():
+                exemplars.setdefault(intent, []).append(phrase)
+        self.exemplars = exemplars
+        self.labels = None
+        self.matrix = None
+        self._lock = threading.Lock()
+
+    def build(self):
+        if self.matrix is not None:
+            return
+        with self._lock:
+            if self.matrix is not None:
+                return
+            labels, phrases = [], []
+            for intent, examples in self.exemplars.items():
+                labels += [intent] * len(examples)
+                phrases += examples
+            matrix = np.asarray(self.embedder.encode_batch(phrases), dtype=np.float32)
+            self.labels = np.array(labels)
+            self.matrix = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+    def nearest(self, text: str, allowed: set):
+        """(intent, similarity, margin) of the closest allowed exemplar; margin is the lead over other intents."""
+        self.build()
+        vec = np.asarray(self.embedder.encode(normalize(text)), dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        if norm == 0:
+            return None, 0.0, 0.0
+        scores = self.matrix @ (vec / norm)
+        best_by_intent = {intent: float(scores[self.labels == intent].max()) for intent in self.exemplars}
+        ranked = sorted(best_by_intent.items(), key=lambda item: item[1], reverse=True)
+        intent, score = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        return (intent if intent in allowed else None), score, score - runner_up
+
+    def match(self, text: str, context: dict):
+        intent, score, margin = self.nearest(text, allowed_intents(context))
+        if intent and score >= settings.INTENT_ROUTER_MIN_SIMILARITY and margin >= settings.INTENT_ROUTER_MIN_MARGIN:
+            return intent
+        return None
+
+
+intent_router = IntentRouter()
+
+
+async def route_intent(user_input: str, session, db, last_thrum_reply: str, memory=None) -> dict:
+    if settings.INTENT_ROUTER_MODE == "local" and user_input and user_input.strip():
+        context = routing_context(session, last_thrum_reply)
+        intent, path = lexical_intent(user_input, context), "rules"
+        if intent is None:
+            path = "embedding"
+            try:
+                # MiniLM encode off the event loop; the exemplar matrix is built at startup (app/main.py)
+                intent = await asyncio.to_thread(intent_router.match, user_input, context)
+            except Exception as e:
+                print(f"⚠️ Intent router embedding unavailable: {e}")
+        if intent is not None:
+            record_router_path("intent_router", path)
+            print(f"⚡ Intent routed by {path}: {intent}")
+            return intent_flags(intent)
+    record_router_path("intent_router", "gpt")
+    print("🧠 Intent routed by gpt")
+    return await classify_user_intent(user_input=user_input, session=session, db=db, last_thrum_reply=last_thrum_reply, memory=memory)
@@ -0,0 +1,109 @@
+# 📄 File: app/services/llm_cache.py
+"""
+Content-addressed cache for deterministic chat completions.
+
+Short classifier calls (tone, mood, semantic similarity, coldness) run at
+temperature=0 on very repetitive inputs ("ok", "yes", "nah"), so the same
+request keeps producing the same answer. Requests are keyed by a hash of the
+model, the whitespace-normalized messages and the other request parameters.
+
+Two tiers: an in-process LRU with a TTL, and optionally Redis (REDIS_URL) so
+workers share hits. Only requests with temperature == 0 are cacheable;
+anything sampled always goes to the API.
+"""
+
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from openai.types.chat import ChatCompletion
+from app.core.config import settings
+
+# Request parameters that do not change the completion
+IGNORED_PARAMS = {"timeout", "user", "stream_options"}
+
+
+def normalize_content(content):
+    if isinstance(content, str):
+        return re.sub(r"\s+", " ", content).strip()
+    return content
+
+
+def cache_key(kwargs: dict):
+    """sha256 of the request, or None if the request is sampled and must not be cached."""
+    if kwargs.get("temperature") != 0 or kwargs.get("stream") or kwargs.get("n", 1) != 1:
+        return None
+    request = {k: v for k, v in kwargs.items() if k not in IGNORED_PARAMS}
+    request["messages"] = [
+        {**message, "content": normalize_content(message.get("content"))}
+        for message in request.get("messages", [])
+    ]
+    raw = json.dumps(request, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    def __init__(self, max_entries: int = 4096, ttl_seconds: float = 3600, redis_url: str = None, prefix: str = "thrum:llm:"):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.redis_url = redis_url
+        self.prefix = prefix
+        self._entries = OrderedDict()  # key -> (expires_at, response)
+        self._redis = None
+
+    @property
+    def redis(self):
+        if self._redis is None and self.redis_url:
+            import redis.asyncio as aioredis
+            self._redis = aioredis.Redis.from_url(self.redis_url)
+        return self._redis
+
+    async def get(self, key: str):
+        """Returns (response, tier) with tier "memory" or "redis", or (None, None)."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, response = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                return response, "memory"
+            del self._entries[key]
+        if self.redis is not None:
+            try:
+                raw = await self.redis.get(self.prefix + key)
+                if raw is not None:
+                    response = ChatCompletion.model_validate_json(raw)
+                    self._remember(key, response)
+                    return response, "redis"
+            except Exception as e:
+                print(f"⚠️ LLM cache Redis read failed: {e}")
+        return None, None
+
+    async def set(self, key: str, response):
+        self._remember(key, response)
+        if self.redis is not None and hasattr(response, "model_dump_json"):
+            try:
+                await self.redis.set(self.prefix + key, response.model_dump_json(), ex=int(self.ttl_seconds))
+            except Exception as e:
+                print(f"⚠️ LLM cache Redis write failed: {e}")
+
+    def _remember(self, key: str, response):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    async def aclose(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+llm_cache = LLMResponseCache(
+    max_entries=settings.LLM_CACHE_SIZE,
+    ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+    redis_url=settings.REDIS_URL if settings.LLM_CACHE_REDIS else None,
+)
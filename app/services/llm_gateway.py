@@ -0,0 +1,193 @@
+# 📄 File: app/services/llm_gateway.py
+"""
+Single entry point for OpenAI chat completions.
+
+All services call llm_gateway.chat(call_site, **create_kwargs) instead of
+keeping their own AsyncOpenAI client. The gateway:
+
+- owns one AsyncOpenAI client with one pooled HTTP connection pool
+- gives every call a deadline covering all of its attempts, including the
+  time spent waiting for a slot
+- retries timeouts, connection errors, 429s and 5xx with jittered backoff
+- caps in-flight requests; live replies are served before fillers and
+  nudges, and those background lanes have their own lower cap so a burst of
+  nudges never takes every slot
+- records latency, attempts and token usage per call site (app/utils/metrics.py)
+- with cache=True, serves repeated temperature=0 requests from llm_cache
+"""
+
+import asyncio
+import heapq
+import itertools
+import random
+import time
+import openai
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+import httpx
+from app.core.config import settings
+from app.utils.metrics import record_llm_call, record_cache_lookup
+from app.services.llm_cache import llm_cache, cache_key
+
+# Priority lanes, lower is served first
+PRIORITY_LIVE = 0
+PRIORITY_FILLER = 1
+PRIORITY_NUDGE = 2
+
+RETRYABLE_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+class PrioritySemaphore:
+    """
+    asyncio.Semaphore that hands freed slots to the waiter with the lowest
+    priority value (FIFO within a priority).
+    """
+
+    def __init__(self, value: int):
+        self._value = value
+        self._waiters = []  # heap of (priority, seq, future)
+        self._seq = itertools.count()
+
+    def locked(self) -> bool:
+        return self._value <= 0
+
+    async def acquire(self, priority: int = PRIORITY_LIVE):
+        if self._value > 0 and not self._waiters:
+            self._value -= 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+        try:
+            await fut
+        except asyncio.CancelledError:
+            # Granted a slot right before being cancelled: pass it on
+            if fut.done() and not fut.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        while self._waiters:
+            _, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self._value += 1
+
+
+class LLMGateway:
+    def __init__(self, client=None, cache=None, max_in_flight: int = 16, background_max_in_flight: int = 4,
+                 timeout: float = 20.0, max_retries: int = 2, backoff_base: float = 0.5, backoff_max: float = 4.0):
+        self._client = client
+        self.cache = cache
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.slots = PrioritySemaphore(max_in_flight)
+        self.background_slots = asyncio.Semaphore(background_max_in_flight)
+
+    @property
+    def client(self):
+        # Created on first use so importing a service never needs an API key
+        if self._client is None:
+            self._client = AsyncOpenAI(
+                max_retries=0,  # retries are handled here, with a shared deadline
+                timeout=self.timeout,
+                http_client=DefaultAsyncHttpxClient(
+                    limits=httpx.Limits(max_connections=self.max_in_flight, max_keepalive_connections=self.max_in_flight),
+                ),
+            )
+        return self._client
+
+    def backoff(self, attempt: int) -> float:
+        # Full jitter: uniform in [0, min(max, base * 2^attempt)]
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def _create(self, priority: int, **kwargs):
+        if priority == PRIORITY_LIVE:
+            await self.slots.acquire(priority)
+            try:
+                return await self.client.chat.completions.create(**kwargs)
+            finally:
+                self.slots.release()
+        async with self.background_slots:
+            await self.slots.acquire(priority)
+            try:
+                return await self.client.chat.completions.create(**kwargs)
+            finally:
+                self.slots.release()
+
+    async def chat(self, call_site: str, priority: int = PRIORITY_LIVE, timeout: float = None,
+                   max_retries: int = None, cache: bool = False, **kwargs):
+        """
+        Same arguments and return value as client.chat.completions.create,
+        plus a call site name for metrics, a priority lane, a deadline in
+        seconds for all attempts together and a retry count override.
+        cache=True looks the request up in llm_cache first; it only applies
+        to temperature=0 requests. Raises the last error once retries or the
+        deadline are exhausted.
+        """
+        key = cache_key(kwargs) if cache and self.cache is not None else None
+        if key is not None:
+            response, tier = await self.cache.get(key)
+            record_cache_lookup(call_site, tier)
+            if response is not None:
+                return response
+        response = await self._chat(call_site, priority, timeout, max_retries, **kwargs)
+        if key is not None:
+            await self.cache.set(key, response)
+        return response
+
+    async def _chat(self, call_site: str, priority: int, timeout: float, max_retries: int, **kwargs):
+        timeout = self.timeout if timeout is None else timeout
+        max_retries = self.max_retries if max_retries is None else max_retries
+        started = time.monotonic()
+        deadline = started + timeout
+        attempt = 0
+        while True:
+            attempt += 1
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    raise openai.APITimeoutError(request=httpx.Request("POST", "chat/completions"))
+                try:
+                    async with asyncio.timeout(remaining):
+                        response = await self._create(priority, timeout=remaining, **kwargs)
+                except TimeoutError:
+                    # Deadline passed while queued for a slot or awaiting the response; retried like an HTTP timeout
+                    raise openai.APITimeoutError(request=httpx.Request("POST", "chat/completions"))
+            except RETRYABLE_ERRORS as e:
+                delay = self.backoff(attempt - 1)
+                if attempt > max_retries or time.monotonic() + delay >= deadline:
+                    record_llm_call(call_site, time.monotonic() - started, attempt, ok=False)
+                    print(f"❌ LLM call {call_site} failed after {attempt} attempt(s): {e}")
+                    raise
+                print(f"🔁 LLM call {call_site} attempt {attempt} failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            except Exception:
+                record_llm_call(call_site, time.monotonic() - started, attempt, ok=False)
+                raise
+            record_llm_call(call_site, time.monotonic() - started, attempt, ok=True, usage=getattr(response, "usage", None))
+            return response
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+        if self.cache is not None:
+            await self.cache.aclose()
+
+
+llm_gateway = LLMGateway(
+    cache=llm_cache,
+    max_in_flight=settings.LLM_MAX_IN_FLIGHT,
+    background_max_in_flight=settings.LLM_BACKGROUND_MAX_IN_FLIGHT,
+    timeout=settings.LLM_TIMEOUT_SECONDS,
+    max_retries=settings.LLM_MAX_RETRIES,
+)
@@ -0,0 +1,108 @@
+# 📄 File: app/services/message_dedup.py
+"""
+Idempotency for the WhatsApp webhook, keyed on Twilio's MessageSid.
+
+Twilio retries a webhook with the same MessageSid, so that is the only safe
+key: hashing phone + body would also drop a user genuinely answering "yes"
+twice. Messages without a MessageSid are never treated as duplicates.
+
+The unique index on inbound_messages.message_sid is what guarantees a sid is
+stored once, across workers too; the webhook treats an insert conflict as a
+duplicate. The stores below only let retries skip the insert. A sid is
+remembered after its message is committed, never before, so a delivery that
+failed half-way is still accepted when Twilio retries it.
+
+Two stores, both forgetting a sid after MESSAGE_DEDUP_TTL_SECONDS:
+
+- TTLSet: in-process, insertion-ordered so expired sids are evicted from the
+  front as new ones arrive, and capped at MESSAGE_DEDUP_MAX_ENTRIES, so memory
+  stays flat however many users have ever written in
+- Redis (MESSAGE_DEDUP_BACKEND=redis): SET NX EX on REDIS_URL, shared by all
+  workers; if Redis is unreachable the in-process store is used instead
+"""
+
+import time
+from collections import OrderedDict
+from app.core.config import settings
+
+
+class TTLSet:
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.expiry = OrderedDict()  # key -> expiry time, oldest first (same TTL for every key)
+
+    def __len__(self):
+        return len(self.expiry)
+
+    def _evict(self, now: float, room: int = 1):
+        while self.expiry:
+            oldest, expires = next(iter(self.expiry.items()))
+            if expires > now and len(self.expiry) + room <= self.max_entries:
+                break
+            del self.expiry[oldest]
+
+    def add(self, key: str, now: float = None) -> bool:
+        """Adds key; False if it was already present and not expired."""
+        now = time.monotonic() if now is None else now
+        self._evict(now)
+        if key in self.expiry:
+            return False
+        self.expiry[key] = now + self.ttl
+        return True
+
+    def contains(self, key: str, now: float = None) -> bool:
+        now = time.monotonic() if now is None else now
+        self._evict(now, room=0)
+        return key in self.expiry
+
+
+class MessageDeduplicator:
+    def __init__(self, ttl_seconds: float, max_entries: int, redis_url: str = None, prefix: str = "thrum:sid:"):
+        self.ttl = ttl_seconds
+        self.local = TTLSet(ttl_seconds, max_entries)
+        self.redis_url = redis_url
+        self.prefix = prefix
+        self._redis = None
+
+    @property
+    def redis(self):
+        if self._redis is None and self.redis_url:
+            import redis.asyncio as aioredis
+            self._redis = aioredis.Redis.from_url(self.redis_url)
+        return self._redis
+
+    async def seen(self, message_sid: str) -> bool:
+        """True if a message with this sid was already stored (and not forgotten yet)."""
+        if not message_sid:
+            return False
+        if self.redis is not None:
+            try:
+                return bool(await self.redis.exists(self.prefix + message_sid))
+            except Exception as e:
+                print(f"⚠️ MessageSid dedup Redis unavailable, using local store: {e}")
+        return self.local.contains(message_sid)
+
+    async def remember(self, message_sid: str):
+        # Call only once the message is committed
+        if not message_sid:
+            return
+        if self.redis is not None:
+            try:
+                await self.redis.set(self.prefix + message_sid, 1, ex=int(self.ttl))
+                return
+            except Exception as e:
+                print(f"⚠️ MessageSid dedup Redis unavailable, using local store: {e}")
+        self.local.add(message_sid)
+
+    async def aclose(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+message_dedup = MessageDeduplicator(
+    settings.MESSAGE_DEDUP_TTL_SECONDS,
+    settings.MESSAGE_DEDUP_MAX_ENTRIES,
+    redis_url=settings.REDIS_URL if settings.MESSAGE_DEDUP_BACKEND == "redis" else None,
+)
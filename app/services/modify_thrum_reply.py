@@ -1,14 +1,13 @@
-import openai
 import os
 from app.db.models.enums import SenderEnum
 import types
 from app.services.central_system_prompt import THRUM_PROMPT
 from app.services.general_prompts import RE_ENTRY_MODE
 
-openai.api_key = os.getenv("OPENAI_API_KEY")
-model= os.getenv("GPT_MODEL")
+from app.services.llm_gateway import llm_gateway
+from app.services.prompt_builder import PromptPrefix, build_messages
 
-client = openai.AsyncOpenAI()
+model= os.getenv("GPT_MODEL")
 import random
 
 def is_valid_llm_reply(reply: str, min_length: int = 8) -> bool:
@@ -114,6 +113,65 @@ async def static_tone_modifier(reply: str, tone: str) -> str:
 
     return reply
 
+# Static part of the format_reply system prompt; per-user details go in the context after it
+FORMAT_REPLY_PREFIX = PromptPrefix("format_reply", "v1", THRUM_PROMPT + """
+🚨 THRUM — FRIEND MODE: ENABLED
+
+You are a warm, emotionally intelligent game-loving friend. 
+The user's tone is given in the context below. Rewrite the reply to sound like a real friend who mirrors that tone.
+
+# 🚨 STRICT RULE: SARCASTIC TONE HANDLING
+If the user's detected tone is 'sarcastic', **do not mirror** or match the user's sarcasm.
+Always respond in a polite, warm, and emotionally supportive tone instead.
+Strictly avoid sarcasm, mockery, or insincerity, even if the user is sarcastic.
+Never mention this rule or the user's tone in your reply.
+# END STRICT RULE
+
+- Reply in the style and length given by the user pacing in the context below
+- Use slang, phrasing, and emojis appropriate to the tone (e.g. hype, chill, sarcastic)
+- Use the user's name if it fits naturally
+- Never sound robotic or polite in a default way (no "You're good too, my friend")
+- Adjust length based on pacing
+- Do NOT reuse any slang, idioms, catchphrases, or signature expressions that you’ve already used in the last replies.
+- If a similar idea must be expressed, invent a fresh variation so it feels new and spontaneous.
+- The new reply must be at least 20-30% different in wording and structure from the last Thrum reply.
+
+Tone-specific emoji guidance:  
+- If frustrated/annoyed, use only neutral/supportive emojis from the tone emojis in the context, no smiles.  
+- For bored, keep replies snappy.  
+- For genz tone, match slang and chill phrasing lightly.  
+- For confused, clarify warmly but confidently.  
+- For excited/satisfied, celebrate subtly.  
+- For neutral, be polite and concise.
+
+Do not mention tone detection or context directly. Use `user_context` subtly to shape recommendations only if present.
+
+If user asks location and unknown, reply playfully without guessing. Do not give reply in "" or “” or ‘’ or ''.
+""")
+
+def build_format_reply_messages(tone, emoji_str, pace, style, length_hint, user_name, memory_context_str,
+                                user_context, user_input, last_thrum_reply, last_game) -> list:
+    context = f"""
+User's tone: '{tone}'
+Tone emojis: {emoji_str}
+User pacing: {pace} (reply in a {style} style — keep it {length_hint})
+
+USER MEMORY & RECENT CHAT:  
+{memory_context_str if memory_context_str else 'No prior user memory or recent chat.'}
+
+user_context = {user_context}  # Internal config, do not surface.
+
+Build your reply reflecting:  
+- User's name: {user_name or ''}  
+- User's latest message Original reply: {user_input}  
+- Your last reply/question: {last_thrum_reply}  
+- Last recommended game: {last_game or "None"}  
+- User's tone: {tone}  
+
+Your rewrite:
+"""
+    return build_messages("modify_thrum_reply.format_reply", FORMAT_REPLY_PREFIX, context)
+
 async def format_reply(db,session, user_input, user_prompt):
     reties = 1
     from app.services.session_memory import SessionMemory
@@ -150,7 +208,7 @@ async def format_reply(db,session, user_input, user_prompt):
         "story_preference": session.story_preference if session.story_preference is not None else None
     }
 
-    session_memory = SessionMemory(session,db)
+    session_memory = await SessionMemory.load(session, db)
     memory_context_str = session_memory.to_prompt()
     if memory_context_str:  # Only add memory if it exists (not on first message)
         memory_context_str = f"{memory_context_str} "
@@ -175,69 +233,27 @@ async def format_reply(db,session, user_input, user_prompt):
 
     # user_name = session.user_name    
     user_name = session.user.name if session.user.name else ""
-    # Build system prompt with clean injected guidance
-    final_system_prompt = f"""{THRUM_PROMPT}
-🚨 THRUM — FRIEND MODE: ENABLED
-
-You are a warm, emotionally intelligent game-loving friend. 
-The user's tone is '{tone}'. Rewrite the reply to sound like a real friend who mirrors that tone.
-
-# 🚨 STRICT RULE: SARCASTIC TONE HANDLING
-If the user's detected tone is 'sarcastic', **do not mirror** or match the user's sarcasm.
-Always respond in a polite, warm, and emotionally supportive tone instead.
-Strictly avoid sarcasm, mockery, or insincerity, even if the user is sarcastic.
-Never mention this rule or the user's tone in your reply.
-# END STRICT RULE
-
-User pacing: {pace} (reply in a {style} style — keep it {length_hint})
-
-- Use slang, phrasing, and emojis appropriate to the tone (e.g. hype, chill, sarcastic)
-- Use the name '{user_name}' if it fits naturally
-- Never sound robotic or polite in a default way (no "You're good too, my friend")
-- Adjust length based on pacing: {length_hint} responses
-- Do NOT reuse any slang, idioms, catchphrases, or signature expressions that you’ve already used in the last replies.
-- If a similar idea must be expressed, invent a fresh variation so it feels new and spontaneous.
-- The new reply must be at least 20-30% different in wording and structure from the last Thrum reply.
-
-USER MEMORY & RECENT CHAT:  
-{memory_context_str if memory_context_str else 'No prior user memory or recent chat.'}
-
-user_context = {user_context}  # Internal config, do not surface.
-
-Build your reply reflecting:  
-- User's name: {user_name or ''}  
-- User's latest message Original reply: {user_input}  
-- Your last reply/question: {last_thrum_reply}  
-- Last recommended game: {last_game or "None"}  
-- User's tone: {tone}  
-
-Tone-specific emoji guidance:  
-- If frustrated/annoyed, use only neutral/supportive emojis from {emoji_str}, no smiles.  
-- For bored, keep replies snappy.  
-- For genz tone, match slang and chill phrasing lightly.  
-- For confused, clarify warmly but confidently.  
-- For excited/satisfied, celebrate subtly.  
-- For neutral, be polite and concise.
-
-Do not mention tone detection or context directly. Use `user_context` subtly to shape recommendations only if present.
-
-If user asks location and unknown, reply playfully without guessing. Do not give reply in "" or “” or ‘’ or ''.
-Your rewrite:
-"""
+    messages = build_format_reply_messages(
+        tone=tone, emoji_str=emoji_str, pace=pace, style=style, length_hint=length_hint, user_name=user_name,
+        memory_context_str=memory_context_str, user_context=user_context, user_input=user_input,
+        last_thrum_reply=last_thrum_reply, last_game=last_game,
+    )
     MAX_RETRIES = 2
     for attempt in range(MAX_RETRIES + 1):
         try:
-            prompt = final_system_prompt
+            prompt = messages[1]["content"]
             if session.meta_data.get("re_engagement_user"):
                 user_prompt += RE_ENTRY_MODE
             temp = 0.5 + 0.2 * attempt  # Slightly increase temperature each try
             if attempt > 0:
-                prompt = nudge_prompt_variation(prompt)
-            response = await client.chat.completions.create(
+                prompt = nudge_prompt_variation(prompt)  # varies the context only, the prefix stays cacheable
+            response = await llm_gateway.chat(
+                "modify_thrum_reply.format_reply",
                 model=model,
                 temperature=temp,
                 messages=[
-                    {"role": "system", "content": prompt.strip()},
+                    messages[0],
+                    {"role": "system", "content": prompt},
                     {"role": "user", "content": user_prompt},
                 ]
             )
@@ -248,6 +264,8 @@ Your rewrite:
                 reply = await strip_outer_quotes(res.strip())
                 return reply
         except Exception as e:
+            # Transport errors were already retried by the gateway; only bad output is retried here
             print(f"LLM error on attempt {attempt+1}:", e)
+            break
     # If all attempts failed (bad output or error)
     return "Sorry, I glitched for a moment — want to try again?"
\ No newline at end of file
@@ -1,21 +1,26 @@
 # 📄 File: app/services/mood_engine.py
 
 # Import required modules
-from sentence_transformers import SentenceTransformer
 from sqlalchemy.orm import Session as DBSession
+from sqlalchemy import event, func, select, text as sql_text
 from app.db.models.mood_cluster import MoodCluster
+from app.core.config import settings
 import numpy as np
+import time
 from typing import Optional
-from scipy.spatial.distance import cosine
 
-# ✅ Load MiniLM model globally to avoid repeated initialization
-model = SentenceTransformer('all-MiniLM-L12-v2')
+from app.services.embedding_service import get_embedding_service, MINILM_MODEL
+from app.services.llm_gateway import llm_gateway
+
+# ✅ Shared MiniLM instance (loaded once per process, on first use)
+embedder = get_embedding_service(MINILM_MODEL)
+MOOD_EMBEDDING_DIM = 384
 
 # ✅ Convert input text into embedding vector
 async def embed_text(text: str) -> list[float]:
-    return model.encode(text).tolist()
+    return embedder.encode(text).tolist()
 
-async def detect_mood_llm(user_input: str, client) -> Optional[str]:
+async def detect_mood_llm(user_input: str) -> Optional[str]:
     system_prompt = (
         "You are a mood detection assistant. Given a user's message, "
         "return a single word representing their current mood or emotional state. "
@@ -24,7 +29,9 @@ async def detect_mood_llm(user_input: str, client) -> Optional[str]:
     )
     user_prompt = f"User message: {user_input.strip()}\nMood:"
     try:
-        response = await client.chat.completions.create(
+        response = await llm_gateway.chat(
+            "mood_engine.detect_mood_llm",
+            cache=True,
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -38,34 +45,130 @@ async def detect_mood_llm(user_input: str, client) -> Optional[str]:
     except Exception as e:
         return None
 
-# ✅ Detect user mood from input text using keyword or embedding similarity
-async def detect_mood_from_text(db: DBSession, user_input: str):
-    input_words = set(word.lower() for word in user_input.split())
-    moods = db.query(MoodCluster).all()
-    mood_names = [m.mood.lower() for m in moods]
+class MoodIndex:
+    """
+    In-memory view of the mood_cluster table.
+
+    Keeps a lower-cased mood -> mood dict for exact keyword hits and a
+    normalized (n, 384) matrix for the embedding fallback, so a lookup is a
+    hash probe or one matrix product. The table is re-checked at most every
+    `refresh_seconds` and only reloaded when its fingerprint changes.
+    """
+
+    def __init__(self, refresh_seconds: float = 60):
+        self.refresh_seconds = refresh_seconds
+        self.by_name = {}
+        self.moods = []
+        self.matrix = None
+        self.fingerprint = None
+        self.checked_at = 0.0
+
+    def invalidate(self):
+        self.checked_at = 0.0
+
+    async def refresh(self, db: DBSession):
+        if self.matrix is not None and time.monotonic() - self.checked_at < self.refresh_seconds:
+            return
+        # Computed server-side so an unchanged table costs one tiny round trip
+        fingerprint = (await db.execute(sql_text("""
+            SELECT md5(COALESCE(string_agg(mood || ':' || COALESCE(embedding::text, ''), '|' ORDER BY mood), ''))
+            FROM mood_cluster
+        """))).scalar()
+        self.checked_at = time.monotonic()
+        if fingerprint == self.fingerprint and self.matrix is not None:
+            return
+        self.load((await db.execute(select(MoodCluster.mood, MoodCluster.embedding).order_by(MoodCluster.mood))).all())
+        self.fingerprint = fingerprint
+
+    def load(self, rows):
+        by_name, moods, vectors = {}, [], []
+        for mood, embedding in rows:
+            by_name.setdefault(mood.lower(), mood)
+            vector = np.asarray(embedding, dtype=np.float32).reshape(-1) if embedding is not None else None
+            if vector is None or vector.shape[0] != MOOD_EMBEDDING_DIM:
+                print(f"⚠️ Skipping {mood} due to shape mismatch.")
+                continue
+            moods.append(mood)
+            vectors.append(vector)
+        matrix = np.vstack(vectors) if vectors else np.zeros((0, MOOD_EMBEDDING_DIM), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.matrix = np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+        self.by_name, self.moods = by_name, moods
+        print(f"🧠 Mood index loaded: {len(moods)} moods")
+
+    def keyword_match(self, words):
+        for word in words:
+            mood = self.by_name.get(word)
+            if mood is not None:
+                return mood
+        return None
+
+    def search(self, vector, k: int = 1):
+        # Top-k (mood, cosine similarity), best first
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        if self.matrix is None or not self.moods or norm == 0 or vector.shape[0] != self.matrix.shape[1]:
+            return []
+        scores = self.matrix @ (vector / norm)
+        k = min(k, len(self.moods))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.lexsort((top, -scores[top]))]
+        return [(self.moods[i], float(scores[i])) for i in top]
+
 
-    for word in input_words:
-        if word in mood_names:
-            matched_mood = next((m.mood for m in moods if m.mood.lower() == word), None)
-            return matched_mood, 0.95
+mood_index = MoodIndex(settings.MOOD_INDEX_REFRESH_SECONDS)
 
-    # ✅ Fix: Await the async embed_text call
+
+@event.listens_for(MoodCluster, "after_insert")
+@event.listens_for(MoodCluster, "after_update")
+@event.listens_for(MoodCluster, "after_delete")
+def invalidate_mood_index(mapper, connection, target):
+    mood_index.invalidate()
+
+
+async def keyword_match_in_db(db: DBSession, words):
+    # pgvector mode: case-insensitive mood name hit (words are lowercased), served by ix_mood_cluster_lower_mood
+    if not words:
+        return None
+    return await db.scalar(
+        select(MoodCluster.mood).where(func.lower(MoodCluster.mood).in_(list(words))).order_by(MoodCluster.mood).limit(1)
+    )
+
+
+async def search_moods_in_db(db: DBSession, vector, k: int = 1):
+    # pgvector mode: nearest moods by <=> over the HNSW index on mood_cluster.embedding
+    distance = MoodCluster.embedding.cosine_distance(np.asarray(vector, dtype=np.float32).reshape(-1))
+    rows = (await db.execute(
+        select(MoodCluster.mood, distance.label("distance"))
+        .where(MoodCluster.embedding.isnot(None))
+        .order_by(distance)
+        .limit(k)
+    )).all()
+    return [(mood, 1.0 - float(dist)) for mood, dist in rows]
+
+
+async def search_moods(db: DBSession, user_input: str, k: int = 3):
+    # Top-k moods for a message by embedding similarity: [(mood, score), ...]
     user_vector = await embed_text(user_input)
-    user_vector = np.array(user_vector).flatten()
+    if settings.MOOD_SEARCH_BACKEND == "pgvector":
+        return await search_moods_in_db(db, user_vector, k)
+    await mood_index.refresh(db)
+    return mood_index.search(user_vector, k)
 
-    best_mood = None
-    best_score = -1.0
 
-    for mood in moods:
-        mood_vector = np.array(mood.embedding).flatten()
-        if user_vector.shape != mood_vector.shape:
-            print(f"⚠️ Skipping {mood.mood} due to shape mismatch.")
-            continue
+# ✅ Detect user mood from input text using keyword or embedding similarity
+async def detect_mood_from_text(db: DBSession, user_input: str):
+    input_words = [word.lower() for word in user_input.split()]
 
-        sim = 1 - cosine(user_vector, mood_vector)
-        if sim > best_score:
-            best_score = sim
-            best_mood = mood.mood
+    if settings.MOOD_SEARCH_BACKEND == "pgvector":
+        matched_mood = await keyword_match_in_db(db, input_words)
+    else:
+        await mood_index.refresh(db)
+        matched_mood = mood_index.keyword_match(input_words)
+    if matched_mood:
+        return matched_mood, 0.95
 
+    ranked = await search_moods(db, user_input, 1)
+    best_mood, best_score = ranked[0] if ranked else (None, -1.0)
     print(f"🧠 Best matched mood (fallback): {best_mood} (score: {best_score:.4f})")
-    return best_mood, best_score if best_mood is not None else ('Nuetral', 0.5)
\ No newline at end of file
+    return best_mood, best_score if best_mood is not None else ('Nuetral', 0.5)
@@ -2,14 +2,22 @@
 📄 File: app/services/nudge_checker.py
 Checks sessions for inactivity after Thrum speaks and sends a gentle nudge.
 Also detects tone-shift (e.g., cold or dry replies).
+
+Due users are grouped by tone and mood; each group gets one LLM call on a
+randomly picked template, returning several variants. Groups are generated
+concurrently, clarification follow-ups run concurrently too (each on its own
+AsyncSession), and the nudges are sent in parallel, so a burst of idle users
+does not turn into a long chain of serial calls.
 """
 import os
 import random
-from sqlalchemy import cast, Boolean
+import asyncio
+from sqlalchemy import cast, Boolean, select
 from sqlalchemy.dialects.postgresql import JSONB
-from openai import AsyncOpenAI
+from app.services.llm_gateway import llm_gateway, PRIORITY_NUDGE
 from datetime import datetime, timedelta
-from app.db.session import SessionLocal
+from app.db.session import AsyncSessionLocal
+from app.db.loaders import select_sessions, load_session
 from app.db.models.user_profile import UserProfile
 from app.db.models.session import Session
 from app.db.models.enums import SenderEnum
@@ -17,9 +25,9 @@ from app.utils.whatsapp import send_whatsapp_message
 from app.services.modify_thrum_reply import format_reply
 from app.services.general_prompts import GLOBAL_USER_PROMPT, NUDGE_CHECKER
 from app.services.thrum_router.phase_delivery import get_recommend
+from app.core.config import settings
 
 model = os.getenv("GPT_MODEL", "gpt-4o")
-client = AsyncOpenAI()
 
 async def build_ambiguity_nudge(db, session,user):
     sorted_interactions = sorted(session.interactions, key=lambda i: i.timestamp, reverse=True)
@@ -40,7 +48,7 @@ async def build_ambiguity_nudge(db, session,user):
         Only output 1 sentence.
         """ 
     session.meta_data['clarification_status'] = 'nudge_sent'
-    db.commit()
+    await db.commit()
     reply = await format_reply(db=db, session=session, user_input=user_input, user_prompt=user_prompt)
     return reply
 
@@ -55,57 +63,136 @@ async def fallback_rec_ambiguity(db, session,user):
         reply = await format_reply(db=db, session=session, user_input=user_input, user_prompt=user_prompt)
     else:
         session.meta_data['clarification_status'] = None
-    db.commit()
+    await db.commit()
     return reply
 
+async def latest_sessions(db, user_ids, *criteria) -> dict:
+    # Most recent session per user (DISTINCT ON user_id), in one query
+    if not user_ids:
+        return {}
+    sessions = (await db.scalars(
+        select_sessions()
+        .where(Session.user_id.in_(user_ids), *criteria)
+        .order_by(Session.user_id, Session.end_time.desc())
+        .distinct(Session.user_id)
+    )).all()
+    return {session.user_id: session for session in sessions}
+
+async def run_ambiguity_followup(followup, user_id, session_id):
+    # Each follow-up gets its own AsyncSession: they run concurrently, and one AsyncSession cannot serve two at once
+    async with AsyncSessionLocal() as db:
+        session = await load_session(db, session_id)
+        user = await db.get(UserProfile, user_id)
+        return await followup(db=db, session=session, user=user)
+
+async def generate_ambiguity_replies(jobs: list) -> dict:
+    """[(user_id, followup, session_id), ...] -> {user_id: reply}, with the same bounded fan-out as the nudges."""
+    limit = asyncio.Semaphore(settings.NUDGE_MAX_CONCURRENCY)
+
+    async def run(user_id, followup, session_id):
+        async with limit:
+            try:
+                return user_id, await run_ambiguity_followup(followup, user_id, session_id)
+            except Exception as e:
+                print(f"⚠️ Clarification follow-up failed for {user_id}: {e}")
+                return user_id, None
+
+    return dict(await asyncio.gather(*(run(*job) for job in jobs)))
+
+def nudge_group_key(session) -> tuple:
+    # Users sharing a tone and mood share one generation call
+    meta = (session.meta_data or {}) if session else {}
+    tone = meta.get("tone") or "neutral"
+    mood = (session.exit_mood or session.entry_mood or "neutral") if session else "neutral"
+    return tone, mood
+
+async def generate_nudges(key: tuple, count: int) -> list:
+    tone, mood = key
+    # The template is picked per group, not per user, so it does not split groups
+    prompt = NUDGE_CHECKER[random.randrange(len(NUDGE_CHECKER))].format(GLOBAL_USER_PROMPT=GLOBAL_USER_PROMPT)
+    prompt += f"\nTone: {tone}, Mood: {mood}\n"
+    # One call returns several variants so users in the same group do not all get the same line
+    response = await llm_gateway.chat(
+        "nudge_checker.generate_nudges",
+        priority=PRIORITY_NUDGE,
+        model=model,
+        temperature=0.7,
+        n=max(1, min(count, settings.NUDGE_VARIANTS_PER_CALL)),
+        messages=[{"role": "user", "content": prompt.strip()}]
+    )
+    return [c.message.content.strip() for c in response.choices if c.message.content and c.message.content.strip()]
+
+async def generate_grouped_nudges(groups: dict) -> dict:
+    """{group key: [user, ...]} -> {user_id: nudge}, generating groups concurrently with a bounded fan-out."""
+    limit = asyncio.Semaphore(settings.NUDGE_MAX_CONCURRENCY)
+
+    async def run(key, users):
+        async with limit:
+            try:
+                texts = await generate_nudges(key, len(users))
+            except Exception as e:
+                print(f"⚠️ Nudge generation failed for {key}: {e}")
+                return {}
+        return {user.user_id: texts[i % len(texts)] for i, user in enumerate(users)} if texts else {}
+
+    results = await asyncio.gather(*(run(key, users) for key, users in groups.items()))
+    return {user_id: nudge for result in results for user_id, nudge in result.items()}
+
+async def send_nudges(replies: list):
+    # (phone_number, reply) pairs, sent in parallel through the normal outbound path
+    limit = asyncio.Semaphore(settings.NUDGE_MAX_CONCURRENCY)
+
+    async def send(phone_number, reply):
+        async with limit:
+            await send_whatsapp_message(phone_number, reply)
+
+    await asyncio.gather(*(send(phone_number, reply) for phone_number, reply in replies))
+
 async def check_for_nudge():
-    db = SessionLocal()
-    now = datetime.utcnow()
-    users = db.query(UserProfile).filter(UserProfile.awaiting_reply == True).all()
-
-    for user in users:
-        reply = None
-        if user.last_thrum_timestamp is None:
-            continue
-        
-        if now - user.last_thrum_timestamp > timedelta(seconds=180):
-
-            choice = random.choice(NUDGE_CHECKER)
-            prompt = choice.format(GLOBAL_USER_PROMPT=GLOBAL_USER_PROMPT)
-            
-            response = await client.chat.completions.create(
-            model=model,
-            temperature=0.7,
-                messages=[{"role": "user", "content": prompt.strip()}]
-            )
-            content = response.choices[0].message.content
-            reply = content.strip() if content else None
+    async with AsyncSessionLocal() as db:
+        now = datetime.utcnow()
+        users = (await db.scalars(select(UserProfile).where(
+            UserProfile.awaiting_reply == True,
+            UserProfile.last_thrum_timestamp.isnot(None),
+        ))).all()
+        if not users:
+            return
+        user_ids = [user.user_id for user in users]
+        replies = {}
 
+        # Clarification follow-ups first; they replace the generic nudge for that user
+        ambiguity_sessions = await latest_sessions(db, user_ids, Session.meta_data['ambiguity_clarification'].astext == 'true')
+        ambiguity_jobs = []
+        for user in users:
+            session = ambiguity_sessions.get(user.user_id)
+            if not session or not session.meta_data.get('ambiguity_clarification', False):
+                continue
+            if 'clarification_status' in session.meta_data and now - user.last_thrum_timestamp > timedelta(seconds=25):
+                if session.meta_data.get('clarification_status',None) == 'waiting' and now - user.last_thrum_timestamp > timedelta(seconds=45):
+                    ambiguity_jobs.append((user.user_id, build_ambiguity_nudge, session.session_id))
+                elif session.meta_data.get('clarification_status',None) == 'nudge_sent' and now - user.last_thrum_timestamp > timedelta(seconds=75):
+                    ambiguity_jobs.append((user.user_id, fallback_rec_ambiguity, session.session_id))
+        replies.update(await generate_ambiguity_replies(ambiguity_jobs))
+
+        # Generic check-ins for everyone silent past the threshold, generated per group
+        due = [user for user in users if now - user.last_thrum_timestamp > timedelta(seconds=180)]
+        latest = await latest_sessions(db, [user.user_id for user in due])
+        groups = {}
+        for user in due:
+            if replies.get(user.user_id) is None:
+                groups.setdefault(nudge_group_key(latest.get(user.user_id)), []).append(user)
+        if groups:
+            print(f"🔔 Generating nudges for {sum(len(g) for g in groups.values())} users in {len(groups)} groups")
+        generated = await generate_grouped_nudges(groups)
+        for user in due:
+            if replies.get(user.user_id) is None and user.user_id not in generated:
+                continue  # generation failed, retry on the next run
             # 🧠 Track nudge + potential coldness
             user.awaiting_reply = False
             user.silence_count = (user.silence_count or 0) + 1
-                
-            db.commit()
-
-        session = (
-            db.query(Session)
-            .filter(
-                Session.user_id == user.user_id,
-                Session.meta_data['ambiguity_clarification'].astext == 'true'
-            )
-            .order_by(Session.end_time.desc())
-            .first()
-        )
-        if session :
-            if session.meta_data.get('ambiguity_clarification', False):
-                if 'clarification_status' in session.meta_data and now - user.last_thrum_timestamp > timedelta(seconds=25):
-                    if session.meta_data.get('clarification_status',None) == 'waiting' and now - user.last_thrum_timestamp > timedelta(seconds=45):
-                        reply = await build_ambiguity_nudge(db=db,session=session,user=user)
-                    elif session.meta_data.get('clarification_status',None) == 'nudge_sent' and now - user.last_thrum_timestamp > timedelta(seconds=75):
-                        reply = await fallback_rec_ambiguity(db=db,session=session,user=user)
-
-                # ⏱️ Adaptive delay based on silence count
-        if reply is not None:
-            await send_whatsapp_message(user.phone_number, reply)
-            
-    db.close()
\ No newline at end of file
+            if replies.get(user.user_id) is None:
+                replies[user.user_id] = generated[user.user_id]
+        await db.commit()
+
+        phones = {user.user_id: user.phone_number for user in users}
+        await send_nudges([(phones[user_id], reply) for user_id, reply in replies.items() if reply is not None])
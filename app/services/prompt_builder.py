@@ -0,0 +1,41 @@
+# 📄 File: app/services/prompt_builder.py
+"""
+Lays prompts out so the provider's prompt-prefix cache can reuse them.
+
+Providers cache the longest prompt prefix they have already seen, so a system
+prompt that starts with per-user data (session memory, the last Thrum reply,
+tone) is never a cache hit. Each call site therefore declares its static
+instructions once as a versioned PromptPrefix, and build_messages puts that
+prefix first, byte-for-byte the same for every user, followed by the dynamic
+tail (conversation context, then the user prompt).
+
+Every build records the prefix hash for its call site (prompt_prefix_stats()
+in app/utils/metrics.py), so a prefix that changes between calls shows up as
+hash_changes > 0, and the gateway counts cached prompt tokens per call site.
+"""
+
+import hashlib
+from app.utils.metrics import record_prompt_prefix
+
+
+class PromptPrefix:
+    def __init__(self, name: str, version: str, text: str):
+        # Bump version when the instructions change on purpose
+        self.name = name
+        self.version = version
+        self.text = text.strip()
+        self.hash = hashlib.sha256(f"{name}:{version}\n{self.text}".encode("utf-8")).hexdigest()[:16]
+
+    def __repr__(self):
+        return f"PromptPrefix({self.name!r}, {self.version!r}, hash={self.hash})"
+
+
+def build_messages(call_site: str, prefix: PromptPrefix, context: str = "", user_prompt: str = "") -> list:
+    """Static prefix as the first system message, then the per-call context and the user prompt."""
+    record_prompt_prefix(call_site, prefix.hash, prefix.version, len(prefix.text))
+    messages = [{"role": "system", "content": prefix.text}]
+    if context and context.strip():
+        messages.append({"role": "system", "content": context.strip()})
+    if user_prompt and user_prompt.strip():
+        messages.append({"role": "user", "content": user_prompt.strip()})
+    return messages
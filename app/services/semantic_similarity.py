@@ -1,13 +1,9 @@
-import openai
 import os
 from typing import List
+from app.services.llm_gateway import llm_gateway
 
-# Set API Key
-openai.api_key = os.getenv("OPENAI_API_KEY")
 model = os.getenv("GPT_MODEL")
 
-client = openai.AsyncOpenAI()
-
 async def check_semantic_similarity(existing_values: List[str], new_values: List[str]) -> List[str]:
     """
     Check if new values are semantically similar to existing values.
@@ -31,7 +27,9 @@ async def check_semantic_similarity(existing_values: List[str], new_values: List
     """
     
     try:
-        response = await client.chat.completions.create(
+        response = await llm_gateway.chat(
+            "semantic_similarity.check_semantic_similarity",
+            cache=True,
             model=model,
             messages=[{"role": "system", "content": prompt}],
             temperature=0,
@@ -1,6 +1,7 @@
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session as DBSession
 from app.db.models.session import Session
+from app.db.loaders import select_sessions, load_session
 from app.db.models.enums import SessionTypeEnum, PhaseEnum
 from app.services.tone_shift_detection import detect_user_is_cold  # ✅ import smart tone checker
 from app.db.models.enums import SenderEnum
@@ -38,15 +39,24 @@ def get_session_state(last_active: datetime) -> SessionTypeEnum:
     else:
         return SessionTypeEnum.ACTIVE
 
+async def get_last_session(db: DBSession, user):
+    return await db.scalar(
+        select_sessions()
+        .where(Session.user_id == user.user_id)
+        .order_by(Session.start_time.desc())
+        .limit(1)
+    )
+
+async def add_session(db: DBSession, session: Session) -> Session:
+    # Commit a new session and return it with its relationships loaded
+    db.add(session)
+    await db.commit()
+    return await load_session(db, session.session_id, reload=True)
+
 # 🔁 Create or update session based on user activity
 async def update_or_create_session(db: DBSession, user):
     now = datetime.utcnow()
-    last_session = (
-        db.query(Session)
-        .filter(Session.user_id == user.user_id)
-        .order_by(Session.start_time.desc())
-        .first()
-    )
+    last_session = await get_last_session(db, user)
 
     if not last_session:
         new_session = Session(
@@ -60,10 +70,7 @@ async def update_or_create_session(db: DBSession, user):
                 "returning_user": False
             }
         )
-        db.add(new_session)
-        db.commit()
-        db.refresh(new_session)
-        return new_session
+        return await add_session(db, new_session)
 
     # ✅ Detect if user is cold based on interaction pattern
     is_cold = await detect_user_is_cold(last_session, db)
@@ -82,7 +89,7 @@ async def update_or_create_session(db: DBSession, user):
         last_session.state = SessionTypeEnum.ACTIVE
         last_session.end_time = now
 
-    db.commit()
+    await db.commit()
 
     # 🚀 Start new session if cold/passive
     if last_session.state in [SessionTypeEnum.PASSIVE, SessionTypeEnum.COLD]:
@@ -99,10 +106,7 @@ async def update_or_create_session(db: DBSession, user):
                 "returning_user": False
             }
         )
-        db.add(new_session)
-        db.commit()
-        db.refresh(new_session)
-        return new_session
+        return await add_session(db, new_session)
     
     if getattr(last_session, "phase", None) == PhaseEnum.ENDING:
         last_session.meta_data["re_engagement_user"] = True
@@ -128,14 +132,9 @@ async def update_or_create_session(db: DBSession, user):
     return last_session
 
 # 🎭 Mood shift session handler
-def update_or_create_session_mood(db: DBSession, user, new_mood: str) -> Session:
+async def update_or_create_session_mood(db: DBSession, user, new_mood: str) -> Session:
     now = datetime.utcnow()
-    last_session = (
-        db.query(Session)
-        .filter(Session.user_id == user.user_id)
-        .order_by(Session.start_time.desc())
-        .first()
-    )
+    last_session = await get_last_session(db, user)
 
     if not last_session:
         session = Session(
@@ -146,24 +145,21 @@ def update_or_create_session_mood(db: DBSession, user, new_mood: str) -> Session
             exit_mood=new_mood,
             meta_data={"is_user_cold": False}
         )
-        db.add(session)
-        db.commit()
-        db.refresh(session)
-        return session
+        return await add_session(db, session)
 
     if not last_session.entry_mood:
         last_session.entry_mood = new_mood
         last_session.exit_mood = new_mood
-        db.commit()
+        await db.commit()
         return last_session
 
     if last_session.exit_mood == new_mood:
         last_session.exit_mood = new_mood
-        db.commit()
+        await db.commit()
         return last_session
 
     last_session.exit_mood = new_mood
-    db.commit()
+    await db.commit()
 
     new_session = Session(
         user_id=user.user_id,
@@ -172,10 +168,7 @@ def update_or_create_session_mood(db: DBSession, user, new_mood: str) -> Session
         exit_mood=new_mood,
         meta_data={"is_user_cold": False}
     )
-    db.add(new_session)
-    db.commit()
-    db.refresh(new_session)
-    return new_session
+    return await add_session(db, new_session)
 
 def is_session_idle_or_fading(session) -> bool:
     now = datetime.utcnow()
@@ -91,19 +91,30 @@
 #         return " | ".join(out)
 
 
+from uuid import UUID
+from sqlalchemy import select
 from app.db.models.game import Game
 from app.db.models.game_recommendations import GameRecommendation
 
 # At the top of app/services/session_memory.py
 
-def get_game_title_by_id(game_id, db):
-    # Fetch game by ID from the database session
-    game = db.query(Game).filter(Game.game_id == game_id).first()
-    return game.title if game else "Unknown"
+async def get_game_titles(db, game_ids) -> dict:
+    # {str(game_id): title} for all ids in one query
+    ids = []
+    for game_id in game_ids or []:
+        try:
+            ids.append(game_id if isinstance(game_id, UUID) else UUID(str(game_id)))
+        except ValueError:
+            continue
+    if not ids:
+        return {}
+    rows = await db.execute(select(Game.game_id, Game.title).where(Game.game_id.in_(ids)))
+    return {str(game_id): title for game_id, title in rows}
 
 class SessionMemory:
-    def __init__(self, session, db):
-        # Initialize from DB session object; can expand as needed
+    def __init__(self, session, titles: dict = None, rec_ids: list = None):
+        # Initialize from DB session object; titles maps game ids to titles (see SessionMemory.load)
+        titles = titles or {}
         self.user_name = getattr(session.user, "name", None) if hasattr(session, "user") and session.user and session.user.name else ""
         self.region = getattr(session.user, "region", None) if hasattr(session, "user") and session.user and session.user.region else ""
         self.mood = getattr(session, "exit_mood", None)
@@ -115,17 +126,14 @@ class SessionMemory:
 
         # Rejections -> titles
         rejected_ids = getattr(session, "rejected_games", []) or []
-        self.rejections = [get_game_title_by_id(game_id, db) for game_id in rejected_ids]
+        self.rejections = [titles.get(str(game_id), "Unknown") for game_id in rejected_ids]
         # Remove "Unknown" and de-dup
         seen = set()
         self.rejections = [t for t in self.rejections if t and t != "Unknown" and (t not in seen and not seen.add(t))]
 
         # Recommended game ids (this session) -> titles
-        rec_ids = [rec.game_id for rec in db.query(GameRecommendation).filter(
-            GameRecommendation.session_id == session.session_id
-        ).all()]
-        self.rec_ids = rec_ids
-        self.recommended_game = [get_game_title_by_id(game_id, db) for game_id in rec_ids]
+        self.rec_ids = list(rec_ids or [])
+        self.recommended_game = [titles.get(str(game_id), "Unknown") for game_id in self.rec_ids]
 
         self.likes = getattr(session, "liked_games", []) if hasattr(session, "liked_games") else []
         # Don’t list a game as both liked and rejected
@@ -143,6 +151,16 @@ class SessionMemory:
         self.preferred_keywords = getattr(session, "preferred_keywords", None)
         self.disliked_keywords = getattr(session, "disliked_keywords", None)
 
+    @classmethod
+    async def load(cls, session, db):
+        # This session's recommendations plus rejected/recommended titles, in two queries
+        rec_ids = (await db.scalars(
+            select(GameRecommendation.game_id).where(GameRecommendation.session_id == session.session_id)
+        )).all()
+        rejected_ids = getattr(session, "rejected_games", []) or []
+        titles = await get_game_titles(db, list(rejected_ids) + list(rec_ids))
+        return cls(session, titles, rec_ids)
+
     def update(self, **kwargs):
         for k, v in kwargs.items():
             if hasattr(self, k):
@@ -162,6 +180,18 @@ class SessionMemory:
         self.last_intent = None
         self.history = []
 
+    def profile(self) -> tuple:
+        # What a turn's profile update can change, copied so later in-place edits do not leak in;
+        # tone and chat history (tone tags) are left out
+        return tuple(
+            list(value) if isinstance(value, list) else value
+            for value in (
+                self.mood, self.genre, self.platform, self.story_preference,
+                self.gameplay_elements, self.preferred_keywords, self.disliked_keywords,
+                self.rejections, self.likes, self.last_game, self.recommended_game,
+            )
+        )
+
     def to_prompt(self):
         # Summarize memory into a context string for LLM system prompt
         out = []
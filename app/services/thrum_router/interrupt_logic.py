@@ -1,4 +1,5 @@
-from app.services.input_classifier import classify_user_intent, classify_input_ambiguity
+from app.services.input_classifier import classify_input_ambiguity
+from app.services.intent_router import route_intent
 from app.services.thrum_router.phase_delivery import handle_reject_Recommendation, deliver_game_immediately, diliver_similar_game, diliver_particular_game
 from app.db.models.enums import PhaseEnum, SenderEnum
 from app.services.thrum_router.phase_intro import handle_intro, classify_first_message, build_onboarding_prompt, is_thin_reply, build_depth_nudge_prompt
@@ -19,7 +20,7 @@ async def should_trigger_referral(session, classification_intent):
         return True
     return False
     
-async def check_intent_override(db, user_input, user, session, classification, intrection):
+async def check_intent_override(db, user_input, user, session, classification, intrection, classification_intent=None):
     from app.services.thrum_router.phase_discovery import handle_discovery
     from app.services.thrum_router.phase_followup import handle_game_inquiry
     thrum_interactions = [i for i in session.interactions if i.sender == SenderEnum.Thrum]
@@ -30,7 +31,9 @@ async def check_intent_override(db, user_input, user, session, classification, i
     if session.meta_data is None:
         session.meta_data = {}
     clarification_input = "NO"
-    classification_intent = await classify_user_intent(user_input=user_input, session=session, db=db, last_thrum_reply=last_thrum_reply)
+    # Already classified alongside the profile fields when called from the turn pipeline
+    if classification_intent is None:
+        classification_intent = await route_intent(user_input=user_input, session=session, db=db, last_thrum_reply=last_thrum_reply)
 
     if not classification_intent.get("Other") or not classification_intent.get("Other_Question") or not classification_intent.get("Inquire_About_Game") or not classification_intent.get("Give_Info") or not classification_intent.get("Request_Specific_Game"):
         session.meta_data["already_greet"] = True
@@ -52,14 +55,14 @@ async def check_intent_override(db, user_input, user, session, classification, i
         session.meta_data["already_greet"] = True
         session.discovery_questions_asked += 1
         session.phase = PhaseEnum.INTRO
-        db.commit()
+        await db.commit()
         return prompt
     # Second-turn depth nudge for thin replies
     if turn_index == 2 and await is_thin_reply(user_input) and not session.meta_data.get("nudge_sent", False):
         nudge_prompt = await build_depth_nudge_prompt(user_input)
         session.discovery_questions_asked += 1
         session.phase = PhaseEnum.DISCOVERY
-        db.commit()
+        await db.commit()
         session.meta_data["nudge_sent"] = True
         return nudge_prompt
     
@@ -87,12 +90,12 @@ async def check_intent_override(db, user_input, user, session, classification, i
             if classification.get("genre") or classification.get("preferred_keywords") or classification.get("favourite_games") or classification.get("gameplay_elements"):
                 intrection.classification = {"input" : classification, "intent" : classification_intent, "clarification": clarification_input}
                 session.phase = PhaseEnum.DISCOVERY
-                db.commit()
+                await db.commit()
                 return await ask_ambiguity_clarification(db=db, session=session, user_input=user_input, classification=classification)
             
     intrection.classification = {"input" : classification, "intent" : classification_intent, "clarification": clarification_input}
     session.meta_data["ambiguity_clarification"] = False
-    db.commit()
+    await db.commit()
     trigger_referral = await should_trigger_referral(session=session,classification_intent=classification_intent)
 
     if trigger_referral:
@@ -145,7 +148,7 @@ async def check_intent_override(db, user_input, user, session, classification, i
         else:
             session.shared_with_friend = True
             session.phase = PhaseEnum.DISCOVERY
-            db.commit()
+            await db.commit()
             return await share_thrum_message(session)
     
     elif classification_intent.get("Greet"):
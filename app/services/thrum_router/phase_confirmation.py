@@ -1,6 +1,7 @@
 from app.db.models.enums import SenderEnum, PhaseEnum
 from app.db.models.game import Game
 from app.db.models.game_platforms import GamePlatform
+from sqlalchemy import select
 from app.services.thrum_router.phase_delivery import get_recommend
 from app.utils.link_helpers import maybe_add_link_hint
 import random
@@ -40,7 +41,7 @@ async def handle_confirmed_game(db, user, session, classification):
         """.strip()
         return prompt
     game_id = session.meta_data.get("find_game")
-    game = db.query(Game).filter_by(game_id=game_id).first()
+    game = await db.scalar(select(Game).where(Game.game_id == game_id))
     game_title = game.title
     session.meta_data['liked_followup'] = True
     tone = session.meta_data.get("tone", "friendly")
@@ -51,8 +52,7 @@ async def handle_confirmed_game(db, user, session, classification):
     user_input = user_interactions[0].content if user_interactions else ""
 
     # 2. Get all platforms available for this game
-    platform_rows = db.query(GamePlatform.platform).filter_by(game_id=game_id).all()
-    platform_list = [p[0] for p in platform_rows] if platform_rows else []
+    platform_list = list((await db.scalars(select(GamePlatform.platform).where(GamePlatform.game_id == game_id))).all())
 
     # 3. Find user's preferred platform (last non-empty entry)
     platform_preference = None
@@ -63,21 +63,23 @@ async def handle_confirmed_game(db, user, session, classification):
 
     # 4. Fallback: if no user preference, pick the first available platform for this game
     if not platform_preference:
-        gameplatform_row = db.query(GamePlatform).filter_by(game_id=game_id).first()
+        gameplatform_row = await db.scalar(select(GamePlatform).where(GamePlatform.game_id == game_id).limit(1))
         if gameplatform_row:
             platform_preference = gameplatform_row.platform
 
     # 5. Fetch the platform link for that game/platform (if any)
     platform_link = None
     if platform_preference:
-        gp_row = db.query(GamePlatform).filter_by(game_id=game_id, platform=platform_preference).first()
+        gp_row = await db.scalar(
+            select(GamePlatform).where(GamePlatform.game_id == game_id, GamePlatform.platform == platform_preference).limit(1)
+        )
         if gp_row and gp_row.link:
             platform_link = gp_row.link
 
     # 6. If still no link (e.g. platform missing, no user preference, or no link for that platform), fallback: any available link for this game
     if not platform_link:
         print("No preferred platform found for user #############")
-        gp_row = db.query(GamePlatform).filter(GamePlatform.game_id == game_id, GamePlatform.link != None).first()
+        gp_row = await db.scalar(select(GamePlatform).where(GamePlatform.game_id == game_id, GamePlatform.link != None).limit(1))
         if gp_row:
             platform_preference = gp_row.platform
             platform_link = gp_row.link
@@ -129,7 +131,7 @@ async def handle_confirmed_game(db, user, session, classification):
         # Set default values
         if 'ask_for_rec_friend' not in session.meta_data:
             session.meta_data['ask_for_rec_friend'] = True
-            db.commit()
+            await db.commit()
         print(f"++++++++++++++++++++++++++++== meta_data : {session.meta_data} : dont_give_name : {'dont_give_name' not in session.meta_data}")
         if "dont_give_name" not in session.meta_data:
             print(f"------------------------------------- dont_give_name checkkkk -----------------------")
@@ -139,12 +141,12 @@ async def handle_confirmed_game(db, user, session, classification):
                 print("Setting default metadata for session")
                 session.meta_data["dont_give_name"] = True
                 session.meta_data["give_name"] = True
-                db.commit()
+                await db.commit()
                 prompt = random.choice(ASK_NAME)
                 return prompt
             else:
                 session.meta_data["dont_give_name"] = True
-                db.commit()
+                await db.commit()
         
     return user_prompt
 
@@ -182,10 +184,10 @@ async def confirm_input_summary(db, session, user, user_input) -> str:
         tone=tone
     )
     session.phase = PhaseEnum.CONFIRMATION
-    db.commit()
+    await db.commit()
     reply = await format_reply(db=db,session=session, user_input=user_input, user_prompt=user_prompt)
     await send_whatsapp_message(user.phone_number, reply)
     session.phase = PhaseEnum.DELIVERY
-    db.commit()
+    await db.commit()
     user_prompt = await get_recommend(db=db, session=session, user=user)
     return user_prompt
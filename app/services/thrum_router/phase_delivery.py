@@ -1,4 +1,4 @@
-from app.services.game_recommend import game_recommendation, get_game_platform_link
+from app.services.game_recommend import game_recommendation, get_game_platform_link, available_on_platform
 from app.services.input_classifier import have_to_recommend
 from app.services.user_profile_update import set_pending_action
 from sqlalchemy.orm.attributes import flag_modified
@@ -9,13 +9,11 @@ from app.services.session_memory import SessionMemory
 from app.services.general_prompts import GLOBAL_USER_PROMPT, NO_GAMES_PROMPT
 from app.db.models.game_recommendations import GameRecommendation
 from app.db.models.game import Game
-import openai
-from sqlalchemy import func
+from sqlalchemy import select
+from app.db.loaders import select_games, select_recommendations
 import os
-client = openai.AsyncOpenAI()
+from app.services.llm_gateway import llm_gateway
 
-from app.db.models.game_platforms import GamePlatform
-from sqlalchemy import text
 from scipy.spatial.distance import cosine
 import numpy as np
 def to_vector(v):
@@ -27,7 +25,7 @@ def to_vector(v):
     if v.ndim == 1:
         return v
     return None
-def recommend_top1_like_seed(
+async def recommend_top1_like_seed(
     db,
     user,
     session,
@@ -36,7 +34,7 @@ def recommend_top1_like_seed(
     preference_weight: float = 0.4,
 ):
     # 0) Seed game
-    seed = db.query(Game).filter(Game.game_id == seed_game_id).first()
+    seed = await db.scalar(select(Game).where(Game.game_id == seed_game_id))
     if not seed:
         return None
     seed_gameplay_embedding = to_vector(seed.gameplay_embedding)
@@ -48,29 +46,19 @@ def recommend_top1_like_seed(
     seed_genre = seed_genres[-1].strip()
     seed_genre_lower = seed_genre.lower()
     # 1) Exclude already recommended in THIS session + the seed itself
-    already_recommended_ids = set(
-        r[0]
-        for r in db.query(GameRecommendation.game_id).filter(
-            GameRecommendation.session_id == session.session_id
+    already_recommended_ids = set((await db.scalars(
+        select(GameRecommendation.game_id).where(
+            GameRecommendation.session_id == session.session_id, GameRecommendation.game_id.isnot(None)
         )
-    )
+    )).all())
     already_recommended_ids.add(seed_game_id)
-    base_q = db.query(Game).filter(~Game.game_id.in_(already_recommended_ids))
+    base_q = select(Game).where(~Game.game_id.in_(already_recommended_ids))
     preferred_platform = (session.platform_preference[-1] 
                       if session.platform_preference else None)
     if preferred_platform:
-        base_q = (base_q.join(GamePlatform, GamePlatform.game_id == Game.game_id)
-                        .filter(func.lower(GamePlatform.platform) == preferred_platform.lower()))
+        base_q = base_q.filter(available_on_platform(preferred_platform))
     # 2) NOW filter by that single seed genre (case-insensitive)
-    candidates = base_q.filter(
-        text("""
-            EXISTS (
-                SELECT 1
-                FROM unnest(games.genre) AS g
-                WHERE LOWER(g) = :g
-            )
-        """)
-    ).params(g=seed_genre_lower).all()
+    candidates = (await db.scalars(base_q.filter(Game.genre_norm.contains([seed_genre_lower])))).all()
     print("------------------len",len(candidates))
     if not candidates:
         return None
@@ -91,25 +79,24 @@ def recommend_top1_like_seed(
         return max(gameplay_weight * gameplay_sim + preference_weight * preference_sim, 0.0001)
     scored = [(g, score_game(g)) for g in candidates]
     scored.sort(key=lambda x: x[1], reverse=True)
-    top_game = scored[0][0]
+    top_game = await db.scalar(select_games().where(Game.game_id == scored[0][0].game_id))
     # 4) platforms + link (prefer current session platform)
     platform = session.platform_preference[-1] if session.platform_preference else None
-    platforms = db.query(GamePlatform.platform).filter(
-        GamePlatform.game_id == top_game.game_id
-    ).all()
-    link = get_game_platform_link(top_game.game_id, platform, db)
+    platforms = [p.platform for p in top_game.platforms]
+    link = await get_game_platform_link(top_game.game_id, platform, db)
     # 5) last liked game (previous sessions) for payload
-    last_session_liked_game = db.query(GameRecommendation).filter(
+    last_session_liked_game = await db.scalar(select_recommendations().where(
         GameRecommendation.user_id == user.user_id,
         GameRecommendation.accepted == True,
         GameRecommendation.session_id != session.session_id
-    ).order_by(GameRecommendation.timestamp.desc()).first()
+    ).order_by(GameRecommendation.timestamp.desc()).limit(1))
     last_session_game = bool(last_session_liked_game)
     session.genre = seed_genres
     game_rec = GameRecommendation(
         session_id=session.session_id,
         user_id=user.user_id,
         game_id=top_game.game_id,
+        game=top_game,
         platform=platform,
         genre=session.genre if session.genre else None,
         tone=session.meta_data.get("tone", {}) if session.meta_data.get("tone") else None,
@@ -121,10 +108,10 @@ def recommend_top1_like_seed(
         },
         accepted=None
     )
-    db.add(game_rec)
+    session.game_recommendations.append(game_rec)
     session.meta_data["ask_confirmation"] = True
     session.last_recommended_game = top_game.title
-    db.commit()
+    await db.commit()
     # 6) return in your exact shape
     return {
         "title": top_game.title,
@@ -134,7 +121,7 @@ def recommend_top1_like_seed(
         "complexity": top_game.complexity,
         "visual_style": top_game.graphical_visual_style,
         "has_story": top_game.has_story,
-        "platforms": [p[0] for p in platforms],
+        "platforms": platforms,
         "link": link,
         "last_session_game": {
             "is_last_session_game": last_session_game,
@@ -147,21 +134,16 @@ async def get_most_similar_liked_title(db, session_id, current_title):
     """
     Returns the liked game title (from the session) most similar to current_title, using GPT for matching.
     """
-    recs = (
-        db.query(GameRecommendation)
-        .filter(
+    rows = await db.execute(
+        select(Game.title)
+        .join(GameRecommendation, GameRecommendation.game_id == Game.game_id)
+        .where(
             GameRecommendation.session_id == session_id,
             GameRecommendation.accepted == True
         )
         .order_by(GameRecommendation.timestamp.desc())
-        .all()
     )
-    titles = []
-    for rec in recs:
-        # This fetches a tuple (title,), so use [0] to get the string
-        title_row = db.query(Game.title).filter(Game.game_id == rec.game_id).first()
-        if title_row and title_row[0]:
-            titles.append(title_row[0])
+    titles = [title for (title,) in rows if title]
     print(f"Titles from session --------------------------: {titles}")
     if not titles:
         return None
@@ -173,7 +155,8 @@ async def get_most_similar_liked_title(db, session_id, current_title):
     )
     try:
         model = os.getenv("GPT_MODEL")  # Assumes model name in env
-        response = await client.chat.completions.create(
+        response = await llm_gateway.chat(
+            "phase_delivery.get_most_similar_liked_title",
             model=model,
             messages=[{"role": "user", "content": prompt}],
             temperature=0,
@@ -348,7 +331,7 @@ async def handle_reject_Recommendation(db,session, user,  classification,user_in
             """
         print(":handle_reject_Recommendation prompt :",user_prompt)
         session.meta_data["ask_confirmation"] = False
-        db.commit()
+        await db.commit()
         return user_prompt
     else:
         from app.services.thrum_router.phase_discovery import handle_discovery
@@ -357,7 +340,7 @@ async def handle_reject_Recommendation(db,session, user,  classification,user_in
             return await handle_discovery(db=db, session=session, user=user,user_input=user_input,classification=classification)
         else:
             should_recommend = await have_to_recommend(db=db, user=user, classification=classification, session=session)
-            session_memory = SessionMemory(session,db)
+            session_memory = await SessionMemory.load(session, db)
             memory_context_str = session_memory.to_prompt()
             if should_recommend:
                 session.phase = PhaseEnum.DELIVERY
@@ -439,7 +422,7 @@ async def deliver_game_immediately(db: Session, user, session, user_input, class
     Returns:
         str: GPT-formatted game message
     """
-    session_memory = SessionMemory(session,db)
+    session_memory = await SessionMemory.load(session, db)
     if session.game_rejection_count >= 2:
             session.phase = PhaseEnum.DISCOVERY
             return await handle_discovery(db=db, session=session, user=user,user_input=user_input,classification=classification)
@@ -530,7 +513,7 @@ async def diliver_similar_game(db: Session, user, session, user_input, classific
     seed_game_id = session.meta_data.get("find_game",None)
      # your UUID / ID for the seed game
     if not seed_game_id:
-        seed_game = db.query(Game).filter(Game.game_id == seed_game_id).first()
+        seed_game = await db.scalar(select(Game).where(Game.game_id == seed_game_id))
         seed_title = seed_game.title if seed_game else "this game"
         user_prompt = f"""
             {GLOBAL_USER_PROMPT}\n
@@ -543,7 +526,7 @@ async def diliver_similar_game(db: Session, user, session, user_input, classific
                 Suggest shifting to a different genre or vibe, casually, without sounding robotic or templated.
         """
         return user_prompt
-    recommendation = recommend_top1_like_seed(db, user, session, seed_game_id)
+    recommendation = await recommend_top1_like_seed(db, user, session, seed_game_id)
     print("#############-----#########",recommendation)
     if recommendation:
         # Build user_prompt with actual game details
@@ -603,7 +586,7 @@ async def diliver_similar_game(db: Session, user, session, user_input, classific
         """
     else:
         # Fallback prompt when no similar game found
-        seed_game = db.query(Game).filter(Game.game_id == seed_game_id).first()
+        seed_game = await db.scalar(select(Game).where(Game.game_id == seed_game_id))
         seed_title = seed_game.title if seed_game else "this game"
         user_prompt = f"""
             {GLOBAL_USER_PROMPT}\n
@@ -674,24 +657,24 @@ async def diliver_particular_game(db, user, session, user_input, classification)
     mood = session.exit_mood
     tone = session.meta_data.get('tone',"neutral")
     platform = session.platform_preference[-1] if session.platform_preference else None
-    top_game = db.query(Game).filter_by(game_id=game_id).first()
-    link = get_game_platform_link(top_game.game_id, platform, db)
+    top_game = await db.scalar(select_games().where(Game.game_id == game_id))
+    link = await get_game_platform_link(top_game.game_id, platform, db)
     game_rec = GameRecommendation(
         session_id=session.session_id,
         user_id=user.user_id,
         game_id=top_game.game_id,
+        game=top_game,
         platform=session.platform_preference,
         mood_tag=mood,
         accepted=None
     )
     session.game_rejection_count += 1
     flag_modified(session, "game_rejection_count")
-    db.add(game_rec)
+    session.game_recommendations.append(game_rec)
     session.meta_data["ask_confirmation"] = True
     session.last_recommended_game = top_game.title
     await set_pending_action(db, session,'send_link',link)
-    db.add(game_rec)
-    db.commit()
+    await db.commit()
     game = {
             "title": top_game.title,
             "description": top_game.description if top_game.description else None,
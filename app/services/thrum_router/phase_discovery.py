@@ -2,7 +2,6 @@ from app.services.thrum_router.phase_confirmation import confirm_input_summary
 from app.services.tone_engine import get_last_user_tone_from_session
 from app.db.models.enums import PhaseEnum, SenderEnum
 import os
-import openai
 import random
 from app.utils.error_handler import safe_call
 from app.services.game_recommend import game_recommendation
@@ -12,13 +11,10 @@ from app.services.general_prompts import GLOBAL_USER_PROMPT, NO_GAMES_PROMPT
 from app.db.models.session import Session as SessionModel  # adjust import as needed
 from app.db.models.game_recommendations import GameRecommendation
 from app.db.models.game import Game
+from sqlalchemy import select
 
-# Set API Key
-openai.api_key = os.getenv("OPENAI_API_KEY")
 model= os.getenv("GPT_MODEL")
 
-client = openai.AsyncOpenAI()
-
 class DiscoveryData:
     def __init__(self, mood=None, genre=None, platform=None, story_pref=None):
         self.mood = mood
@@ -34,26 +30,25 @@ class DiscoveryData:
 
 async def two_recent_accepted_same_genre(db, session_id):
     # Get the two most recent accepted game recs for this session
-    recs = (
-        db.query(GameRecommendation)
-        .filter(
+    recs = (await db.scalars(
+        select(GameRecommendation)
+        .where(
             GameRecommendation.session_id == session_id,
             GameRecommendation.accepted == True
         )
         .order_by(GameRecommendation.timestamp.desc())
         .limit(2)
-        .all()
-    )
+    )).all()
     if len(recs) < 2:
         return False, [], []
     genre1 = recs[0].genre or []
     genre2 = recs[1].genre or []
     if genre1 and genre2 and (genre1[-1] == genre2[-1]):
-        # Get both game titles simply using sync db.query
-        game_titles = []
-        for rec in recs:
-            game = db.query(Game.title).filter(Game.game_id == rec.game_id).scalar()
-            game_titles.append(game if game else "Unknown Game")
+        # Get both game titles in one query
+        titles = dict((await db.execute(
+            select(Game.game_id, Game.title).where(Game.game_id.in_([rec.game_id for rec in recs]))
+        )).all())
+        game_titles = [titles.get(rec.game_id) or "Unknown Game" for rec in recs]
         # Collect recent_tags from keywords['game_play_element']
         recent_tags = []
         for rec in recs:
@@ -74,12 +69,11 @@ async def two_recent_accepted_same_genre(db, session_id):
         return True, game_titles, recent_tags
     return False, [], []
 
-def get_previous_session_fields(db, user_id, current_session_id=None):
-    q = db.query(SessionModel)\
-        .filter(SessionModel.user_id == user_id)
+async def get_previous_session_fields(db, user_id, current_session_id=None):
+    q = select(SessionModel).where(SessionModel.user_id == user_id)
     if current_session_id:
-        q = q.filter(SessionModel.session_id != current_session_id)
-    prev_session = q.order_by(SessionModel.end_time.desc()).first()
+        q = q.where(SessionModel.session_id != current_session_id)
+    prev_session = await db.scalar(q.order_by(SessionModel.end_time.desc()).limit(1))
     if not prev_session:
         return None, None
     prev_genre = prev_session.genre[-1] if prev_session.genre else None
@@ -219,7 +213,7 @@ async def ask_discovery_question(db, session,user,user_input,classification):
     if not getattr(session, "genre", None) and "genre" not in dont_ask:
         if session.meta_data.get("last_session_state",None) in ["PASSIVE", "COLD"] or session.meta_data["returning_user"]:
             print("cold or passive genre..........................")
-            genre, platform = get_previous_session_fields(
+            genre, platform = await get_previous_session_fields(
             db,
             user_id=session.user_id,
             current_session_id=session.session_id
@@ -304,7 +298,7 @@ async def ask_discovery_question(db, session,user,user_input,classification):
         if session.meta_data.get("last_session_state",None) in ["PASSIVE", "COLD"] or session.meta_data["returning_user"]:
             session.meta_data.pop("last_session_state", None)
             print("cold or passive platform ..........................")
-            genre, platform = get_previous_session_fields(
+            genre, platform = await get_previous_session_fields(
             db,
             user_id=session.user_id,
             current_session_id=session.session_id
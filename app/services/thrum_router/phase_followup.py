@@ -6,21 +6,20 @@ from app.utils.link_helpers import maybe_add_link_hint
 from app.db.models.enums import PhaseEnum, SenderEnum
 from app.db.models.session import Session
 from datetime import datetime, timedelta
-import openai
 import os
 import random
 from app.db.models.game_recommendations import GameRecommendation
 from app.db.models.game import Game
 from app.db.models.game_platforms import GamePlatform
+from app.db.loaders import select_games, select_recommendations
+from sqlalchemy import select
 from app.services.session_memory import SessionMemory
 from app.services.general_prompts import GLOBAL_USER_PROMPT, RECENT_FOLLOWUP_PROMPT, DELAYED_FOLLOWUP_PROMPT, STANDARD_FOLLOWUP_PROMPT
 from app.services.session_manager import get_pacing_style
-from rapidfuzz import process, fuzz
+from app.services.title_index import search_titles
 
 
-openai.api_key = os.getenv("OPENAI_API_KEY")
-
-client = openai.AsyncOpenAI()
+from app.services.llm_gateway import llm_gateway
 
 model= os.getenv("GPT_MODEL")
 
@@ -78,7 +77,8 @@ async def ask_followup_que(session) -> str:
     pacing_note = f"\n\nPacing: Reply in a {style} style — keep it {length_hint}."
     prompt += pacing_note
 
-    response = await client.chat.completions.create(
+    response = await llm_gateway.chat(
+        "phase_followup.ask_followup_que",
         model=model,
         temperature=0.5,
         messages=[
@@ -90,29 +90,21 @@ async def ask_followup_que(session) -> str:
 
 async def get_game_alternatives(db: Session, user_input: str, session) -> list:
     """Get alternative game suggestions when no exact match found"""
-    all_games = db.query(Game).all()
-    
     # Exclude recent recommendations
     recent_rec_ids = set(
-        str(r[0]) for r in db.query(GameRecommendation.game_id).filter(
-            GameRecommendation.session_id == session.session_id
-        )
+        str(game_id) for game_id in (await db.scalars(
+            select(GameRecommendation.game_id).where(GameRecommendation.session_id == session.session_id)
+        )).all()
     )
     
-    # Get alternatives
-    alternatives = process.extract(
-        user_input,
-        [(g.title, g.game_id) for g in all_games if str(g.game_id) not in recent_rec_ids],
-        scorer=fuzz.token_set_ratio,
-        limit=3
-    )
+    # Get alternatives from the shared title index, then load only those games
+    alternatives = await search_titles(db, user_input, limit=3, exclude_ids=recent_rec_ids)
     
-    alt_games = []
-    for alt_match in alternatives:
-        if alt_match[1] > 30:
-            game_title = alt_match[0][0]
-            game = next(g for g in all_games if g.title == game_title)
-            alt_games.append(game)
+    alt_ids = [game_id for game_title, score, game_id in alternatives if score > 30]
+    if not alt_ids:
+        return []
+    games = {g.game_id: g for g in (await db.scalars(select(Game).where(Game.game_id.in_(alt_ids)))).all()}
+    alt_games = [games[game_id] for game_id in alt_ids if game_id in games]
     
     return alt_games[:2]
 
@@ -124,7 +116,7 @@ async def handle_game_inquiry(db: Session, user, session, user_input: str, class
     
     game_id = session.meta_data.get("find_game")
     request_link = session.meta_data.get("request_link", False)
-    session_memory = SessionMemory(session,db)
+    session_memory = await SessionMemory.load(session, db)
     
     # Handle case where no game was found in classification
     if classification.get("find_game", None) is None or classification.get("find_game") == "None":
@@ -139,7 +131,7 @@ async def handle_game_inquiry(db: Session, user, session, user_input: str, class
     # Set game_interest_confirmed flag when user inquires about a game
     session.meta_data = session.meta_data or {}
     session.meta_data["game_interest_confirmed"] = True
-    db.commit()
+    await db.commit()
     if not game_id:
         # Get alternatives when no game found
         alternatives = await get_game_alternatives(db, user_input, session)
@@ -171,10 +163,9 @@ async def handle_game_inquiry(db: Session, user, session, user_input: str, class
                 Keep it human, friendly, and casual.
                 """.strip()
     
-    game = db.query(Game).filter_by(game_id=game_id).first()
+    game = await db.scalar(select_games().where(Game.game_id == game_id))
     # Get all available platforms for this game
-    platform_rows = db.query(GamePlatform.platform).filter_by(game_id=game_id).all()
-    platform_list = [p[0] for p in platform_rows] if platform_rows else []
+    platform_list = [gp.platform for gp in game.platforms] if game else []
 
     # Get user's preferred platform (last non-empty entry in the array)
     platform_preference = None
@@ -186,22 +177,24 @@ async def handle_game_inquiry(db: Session, user, session, user_input: str, class
     # Fetch the platform link for that game and platform
     platform_link = None
     if platform_preference:
-        gp_row = db.query(GamePlatform).filter_by(game_id=game_id, platform=platform_preference).first()
+        gp_row = await db.scalar(
+            select(GamePlatform).where(GamePlatform.game_id == game_id, GamePlatform.platform == platform_preference).limit(1)
+        )
         if gp_row and gp_row.link:
             platform_link = gp_row.link
 
     if platform_link is None: 
         print(f"No preferred platform found for user/game_id={game_id}")
-        gp_row = db.query(GamePlatform).filter(GamePlatform.game_id == game_id, GamePlatform.link != None).first()
+        gp_row = await db.scalar(select(GamePlatform).where(GamePlatform.game_id == game_id, GamePlatform.link != None).limit(1))
         print(f"gp_row : {gp_row.link if gp_row else 'nolink'}")
         if gp_row:
             platform_link = gp_row.link
 
     # ...your recommendation check follows as before
     recommended_ids = set(
-        str(r[0]) for r in db.query(GameRecommendation.game_id).filter(
-            GameRecommendation.session_id == session.session_id
-        )
+        str(game_id) for game_id in (await db.scalars(
+            select(GameRecommendation.game_id).where(GameRecommendation.session_id == session.session_id)
+        )).all()
     )
     # Game fields
     game_info = {
@@ -267,12 +260,11 @@ STRICT REPLY RULES:
 """
         return await maybe_add_link_hint(db, session, user_prompt, platform_link)
     # If user inquires about a game they already liked
-    liked_game = db.query(GameRecommendation).filter(
+    liked_game_ids = (await db.scalars(select(GameRecommendation.game_id).where(
             GameRecommendation.user_id == user.user_id,
             GameRecommendation.game_id == game_id,
             GameRecommendation.accepted == True
-        )
-    liked_game_ids = [g.game_id for g in liked_game]
+        ))).all()
     if game_id in liked_game_ids:
         print(f"liked game #############################")
         user_prompt = f"""
@@ -322,15 +314,15 @@ STRICT REPLY RULES:
     
     # If already recommended → update phase and return query-resolution prompt
     if game_id in recommended_ids:
-        last_rec = db.query(GameRecommendation).filter(
+        last_rec = await db.scalar(select_recommendations().where(
         GameRecommendation.user_id == user.user_id,
-        GameRecommendation.session_id == session.session_id).order_by(GameRecommendation.timestamp.desc()).first()
+        GameRecommendation.session_id == session.session_id).order_by(GameRecommendation.timestamp.desc()).limit(1))
         
         if str(last_rec.game.game_id) == game_id:
             # If the last recommended game is the same as the one being inquired about, return a follow-up prompt
             
             session.phase = PhaseEnum.FOLLOWUP
-            db.commit()
+            await db.commit()
             print(f"If already recommended just before #####################")
             user_prompt = f"""
                 {GLOBAL_USER_PROMPT}
@@ -426,15 +418,16 @@ STRICT REPLY RULES:
         session_id=session.session_id,
         user_id=user.user_id,
         game_id=game.game_id,
+        game=game,
         platform=None,
         mood_tag=None,
         accepted=None
     )
-    db.add(game_rec)
+    session.game_recommendations.append(game_rec)
     session.game_rejection_count += 1
     flag_modified(session, "game_rejection_count")
     session.last_recommended_game = game.title
-    db.commit()
+    await db.commit()
     print(f"new game inquiry #####################")    
     user_prompt = f"""
         {GLOBAL_USER_PROMPT}
@@ -1,6 +1,7 @@
 import random
 from app.db.models.enums import SenderEnum
 from app.db.models.session import Session as SessionModel
+from sqlalchemy import select
 from app.services.general_prompts import (
     GLOBAL_USER_PROMPT,
     ANOTHER_INTRO_PROMPTS,
@@ -224,14 +225,14 @@ async def handle_intro(db,session):
     if session.meta_data.get("returning_user",False):
         return await build_reengagement_intro(user_name, tone, mood, session)
 
-    last_session = (
-    db.query(SessionModel)
-      .filter(
+    last_session = await db.scalar(
+    select(SessionModel)
+      .where(
           SessionModel.user_id == session.user_id,
           SessionModel.session_id != session.session_id  # exclude current session
       )
       .order_by(SessionModel.start_time.desc())
-      .first()
+      .limit(1)
 )
     if last_session:
         if not session.meta_data.get("already_greet",False) :
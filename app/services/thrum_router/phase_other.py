@@ -1,15 +1,12 @@
 import os
-import openai
 from app.services.user_profile_update import update_user_specifications
 from app.services.session_memory import SessionMemory
 from app.db.models.enums import SenderEnum
 from app.services.general_prompts import GLOBAL_USER_PROMPT
 
-# Set API Key
-openai.api_key = os.getenv("OPENAI_API_KEY")
-model= os.getenv("GPT_MODEL")
+from app.services.llm_gateway import llm_gateway
 
-client = openai.AsyncOpenAI()
+model= os.getenv("GPT_MODEL")
 
 async def classify_intent(user_input, memory_context_str):
     prompt = f"""
@@ -32,7 +29,8 @@ async def classify_intent(user_input, memory_context_str):
         Reply ONLY with the label.
         """    
     try:
-        response = await client.chat.completions.create(
+        response = await llm_gateway.chat(
+            "phase_other.classify_intent",
             model=model,
             messages=[
                 {"role": "user", "content": prompt.strip()}
@@ -304,7 +302,7 @@ async def extract_other_info(db,session,user_input: str) -> list:
     """
     Uses GPT to extract only key facts/statements from user input for 'Other' intent.
     """
-    session_memory = SessionMemory(session,db)
+    session_memory = await SessionMemory.load(session, db)
     memory_context_str = session_memory.to_prompt()
     if memory_context_str:  # Only add memory if it exists (not on first message)
         memory_context_str = f"{memory_context_str} "
@@ -329,7 +327,8 @@ User input: "{user_input}"
 Output (Python list only):
 """.strip()
 
-    response = await client.chat.completions.create(
+    response = await llm_gateway.chat(
+        "phase_other.extract_other_info",
         model=model,
         messages=[{"role": "user", "content": prompt.strip()}],
         temperature=0
@@ -347,7 +346,7 @@ Output (Python list only):
     return []
 
 async def handle_other_input(db, user, session, user_input: str) -> str:
-    session_memory = SessionMemory(session,db)
+    session_memory = await SessionMemory.load(session, db)
     memory = session_memory.to_prompt()
     intent = await classify_intent(user_input, memory)
     tone = session.meta_data.get("tone", "neutral")
@@ -455,7 +454,7 @@ async def ask_ambiguity_clarification(db, session, user_input, classification):
     session.discovery_questions_asked += 1
     session.meta_data["ambiguity_clarification"] = True
     session.meta_data["clarification_status"] = "waiting"
-    db.commit()
+    await db.commit()
     tone = session.meta_data.get("tone", "")
     favourite_games = classification.get("favourite_games") or []
     inferred_genre = classification.get("genre") or []
@@ -0,0 +1,189 @@
+# 📄 File: app/services/title_index.py
+"""
+Shared in-memory index of game titles for fuzzy title resolution.
+
+Titles and alternative_titles are loaded once per process. An inverted
+index over `tokens()` narrows every lookup to games that share a word with
+the query, and rapidfuzz scores only that shortlist with `process.cdist`.
+Games written through the ORM in this process are added incrementally; the
+catalog size is re-checked every TITLE_INDEX_REFRESH_SECONDS so ingests run
+from other processes are picked up too.
+
+With TITLE_SEARCH_BACKEND=pg_trgm no titles are held in memory: trigram
+indexes in Postgres pick the shortlist, and only those titles are scored
+with rapidfuzz.
+"""
+
+import re
+import threading
+import time
+from collections import defaultdict
+import numpy as np
+from rapidfuzz import process, fuzz
+from sqlalchemy import event, func, inspect, literal, or_, select, text
+from app.db.models.game import Game
+from app.core.config import settings
+
+STOPWORDS = {
+    "the","of","and","a","an","for","to","in","on","with",
+    "edition","remastered","definitive","complete","collection","ultimate","rebirth"
+}
+
+def tokens(s: str):
+    return {t for t in re.findall(r"\w+", s.lower()) if len(t) > 2 and t not in STOPWORDS}
+
+def split_chunks(s: str):
+    # handles cases like: "The Binding of Isaac: Rebirth     call of duty"
+    parts = re.split(r"[|/,-]| and |\s{2,}", s, flags=re.IGNORECASE)
+    parts = [p.strip() for p in parts if len(p.strip()) >= 3]
+    return parts or [s]
+
+
+class TitleIndex:
+    def __init__(self, refresh_seconds: float = 300, workers: int = 1):
+        self.refresh_seconds = refresh_seconds
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.names = []        # every searchable name (title or alternative title)
+        self.entries = []      # (title, game_id) for each name, None once superseded
+        self.postings = defaultdict(set)
+        self.by_game = {}      # game_id -> indices of its names
+        self.loaded = False
+        self.catalog_size = 0
+        self.checked_at = 0.0
+
+    def _add(self, game_id, title, alternative_titles):
+        for old in self.by_game.pop(game_id, []):
+            self.entries[old] = None
+        positions = []
+        for name in dict.fromkeys([title] + list(alternative_titles or [])):
+            if not name or not name.strip():
+                continue
+            position = len(self.names)
+            self.names.append(name)
+            self.entries.append((title, game_id))
+            for token in tokens(name):
+                self.postings[token].add(position)
+            positions.append(position)
+        self.by_game[game_id] = positions
+
+    def upsert(self, game_id, title, alternative_titles=None):
+        # Incremental refresh for a game inserted or renamed in this process
+        with self._lock:
+            if self.loaded:
+                self._add(game_id, title, alternative_titles)
+                self.catalog_size = len(self.by_game)
+
+    async def refresh(self, db):
+        if self.loaded and time.monotonic() - self.checked_at < self.refresh_seconds:
+            return
+        catalog_size = await db.scalar(select(func.count(Game.game_id))) or 0
+        with self._lock:
+            self.checked_at = time.monotonic()
+            if self.loaded and catalog_size == self.catalog_size:
+                return
+        rows = (await db.execute(select(Game.game_id, Game.title, Game.alternative_titles))).all()
+        with self._lock:
+            self._reset()
+            for game_id, title, alternative_titles in rows:
+                self._add(game_id, title, alternative_titles)
+            self.loaded = True
+            self.catalog_size = len(self.by_game)
+            self.checked_at = time.monotonic()
+        print(f"🎮 Title index loaded: {len(self.by_game)} games, {len(self.names)} names")
+
+    def shortlist(self, query: str):
+        # Names sharing at least one token with the query; every live name when none do
+        with self._lock:
+            candidates = set()
+            for token in tokens(query):
+                candidates |= self.postings.get(token, set())
+            if not candidates:
+                candidates = range(len(self.names))
+            candidates = [i for i in sorted(candidates) if self.entries[i] is not None]
+            return [self.names[i] for i in candidates], [self.entries[i] for i in candidates]
+
+    def extract(self, query: str, limit: int = 10, score_cutoff: float = 0, exclude_ids=None, scorer=fuzz.token_set_ratio):
+        """
+        Returns up to `limit` (title, score, game_id), best first, one per game.
+        Same scorer and cutoff semantics as rapidfuzz `process.extract`.
+        """
+        names, entries = self.shortlist(query)
+        if exclude_ids:
+            exclude_ids = {str(g) for g in exclude_ids}
+            keep = [i for i, (_, game_id) in enumerate(entries) if str(game_id) not in exclude_ids]
+            names, entries = [names[i] for i in keep], [entries[i] for i in keep]
+        if not names:
+            return []
+        scores = process.cdist(
+            [query], names, scorer=scorer, score_cutoff=score_cutoff or None,
+            dtype=np.float32, workers=self.workers,
+        )[0]
+        results, seen = [], set()
+        for i in np.argsort(-scores, kind="stable"):
+            score = float(scores[i])
+            if score < score_cutoff:
+                break
+            title, game_id = entries[i]
+            if game_id in seen:
+                continue
+            seen.add(game_id)
+            results.append((title, score, game_id))
+            if len(results) >= limit:
+                break
+        return results
+
+
+title_index = TitleIndex(settings.TITLE_INDEX_REFRESH_SECONDS, settings.TITLE_MATCH_WORKERS)
+
+
+@event.listens_for(Game, "after_insert")
+@event.listens_for(Game, "after_update")
+def add_game_to_title_index(mapper, connection, target):
+    state = inspect(target)
+    if state.attrs.title.history.has_changes() or state.attrs.alternative_titles.history.has_changes():
+        title_index.upsert(target.game_id, target.title, target.alternative_titles)
+
+
+PG_TRGM_THRESHOLD = 0.3   # pg_trgm's default similarity thresholds
+PG_TRGM_SHORTLIST = 50    # trigram candidates re-scored per lookup
+
+
+async def search_titles_in_db(db, query: str, limit: int = 10, score_cutoff: float = 0, exclude_ids=None, scorer=fuzz.token_set_ratio):
+    """
+    pg_trgm version of TitleIndex.extract. The trigram indexes only pick a
+    shortlist of games, matching the query against the title or any
+    alternative title. Those names are then scored with the same rapidfuzz
+    scorer and cutoff as the in-memory path. Trigram similarity follows a
+    different curve, so it is never used as the score itself.
+    """
+    # Always set, since SET LOCAL would otherwise leak into later lookups in the transaction
+    await db.execute(text(f"SET LOCAL pg_trgm.similarity_threshold = {PG_TRGM_THRESHOLD}"))
+    await db.execute(text(f"SET LOCAL pg_trgm.word_similarity_threshold = {PG_TRGM_THRESHOLD}"))
+    alt_text = func.game_alt_titles_text(Game.alternative_titles)
+    closeness = func.greatest(
+        func.similarity(Game.title, query),
+        func.word_similarity(query, Game.title),
+        func.coalesce(func.word_similarity(query, alt_text), 0),
+    )
+    q = select(Game.game_id, Game.title, Game.alternative_titles).filter(
+        or_(Game.title.op("%")(query), literal(query).op("<%")(Game.title), literal(query).op("<%")(alt_text))
+    )
+    if exclude_ids:
+        q = q.filter(~Game.game_id.in_(list(exclude_ids)))
+    rows = (await db.execute(q.order_by(closeness.desc(), Game.title).limit(max(PG_TRGM_SHORTLIST, limit)))).all()
+    shortlist = TitleIndex()
+    for game_id, title, alternative_titles in rows:
+        shortlist._add(game_id, title, alternative_titles)
+    return shortlist.extract(query, limit=limit, score_cutoff=score_cutoff, scorer=scorer)
+
+
+async def search_titles(db, query: str, limit: int = 10, score_cutoff: float = 0, exclude_ids=None, scorer=fuzz.token_set_ratio):
+    # Fuzzy title lookup: [(title, score, game_id), ...], best first
+    if settings.TITLE_SEARCH_BACKEND == "pg_trgm":
+        return await search_titles_in_db(db, query, limit=limit, score_cutoff=score_cutoff, exclude_ids=exclude_ids, scorer=scorer)
+    await title_index.refresh(db)
+    return title_index.extract(query, limit=limit, score_cutoff=score_cutoff, exclude_ids=exclude_ids, scorer=scorer)
@@ -0,0 +1,56 @@
+"""
+📄 File: app/services/tone_backfill.py
+Tags Thrum's own replies with a tone after they have been stored.
+
+bot_chat_with_thrum writes the reply with tone_tag NULL so the webhook does not
+wait on tone detection. This scheduler job picks those rows up in batches,
+classifies them with the local tone classifier (one embedding call per batch)
+and, when the classifier is unsure, reuses the tone the reply was written for.
+"""
+import asyncio
+from sqlalchemy import select
+from app.db.session import AsyncSessionLocal
+from app.db.models.interaction import Interaction
+from app.db.models.enums import SenderEnum
+from app.services.tone_classifier import tone_classifier
+from app.core.config import settings
+
+
+def resolve_bot_tone(label, requested_tone, min_margin: float) -> str:
+    # label is (tone, confidence, margin) from the classifier, or None if it was unavailable
+    if label is not None and label[2] >= min_margin:
+        return label[0]
+    if requested_tone:
+        return requested_tone
+    return label[0] if label is not None else "neutral"
+
+
+async def backfill_bot_tones(batch_size: int = None) -> int:
+    batch_size = batch_size or settings.BOT_TONE_BACKFILL_BATCH_SIZE
+    async with AsyncSessionLocal() as db:
+        try:
+            pending = (await db.scalars(
+                select(Interaction)
+                .where(Interaction.sender == SenderEnum.Thrum, Interaction.tone_tag.is_(None))
+                .order_by(Interaction.timestamp)
+                .limit(batch_size)
+            )).all()
+            if not pending:
+                return 0
+            try:
+                # Encoding is CPU-bound; keep it off the event loop that serves the webhook
+                labels = await asyncio.to_thread(tone_classifier.classify_batch, [i.content or "" for i in pending])
+            except Exception as e:
+                print(f"⚠️ Tone backfill classifier unavailable, using requested tones: {e}")
+                labels = [None] * len(pending)
+
+            for interaction, label in zip(pending, labels):
+                requested_tone = (interaction.bot_response_metadata or {}).get("requested_tone")
+                interaction.tone_tag = resolve_bot_tone(label, requested_tone, settings.TONE_LOCAL_MIN_MARGIN)
+            await db.commit()
+            print(f"🎭 Tone backfill tagged {len(pending)} Thrum replies")
+            return len(pending)
+        except Exception as e:
+            await db.rollback()
+            print(f"❌ Tone backfill failed: {e}")
+            return 0
@@ -0,0 +1,130 @@
+# 📄 File: app/services/tone_classifier.py
+"""
+Local tone classifier: nearest centroid over MiniLM embeddings.
+
+Each tone cluster has a handful of labeled prototype phrases. They are
+embedded once with the shared MiniLM model, averaged and normalized into one
+centroid per tone, so classifying a message is one (cached) embedding plus a
+34 x 384 dot product. When the best tone does not beat the runner-up by at
+least the configured margin the message is ambiguous and tone_engine asks
+the LLM instead.
+
+The reported confidence is not the raw cosine similarity: MiniLM centroid
+cosines sit in their own range, while emotion_fusion compares tone confidence
+with GPT's self-reported 0-1 scale and with mood confidence. It is read off
+TONE_LOCAL_CONFIDENCE_CURVE instead, a piecewise-linear map from the margin
+to how often the local tone agrees with GPT at that margin.
+
+calibrate_tone_classifier.py measures agreement with the GPT tone labels
+stored on interactions from before the local rollout, to pick the margin
+and fit the curve.
+"""
+
+import threading
+import numpy as np
+from app.services.embedding_service import get_embedding_service, MINILM_MODEL
+from app.core.config import settings
+
+# Prototype phrases per tone cluster (keys match tone_engine.TONE_CLUSTERS)
+TONE_PROTOTYPES = {
+    "neutral": ["I play on PC", "something on Switch", "what's the game called", "tell me about it"],
+    "casual": ["sure why not", "yeah that works", "ok cool", "maybe something chill"],
+    "warm": ["aw that's so sweet of you", "you're lovely, thank you", "that made me smile", "love chatting with you"],
+    "sincere": ["honestly I really mean it", "I genuinely appreciate the help", "to be honest I've had a rough week", "I truly want something meaningful"],
+    "polite": ["could you please suggest a game", "would you mind recommending something", "thank you kindly", "if it's not too much trouble"],
+    "friendly": ["hey buddy how's it going", "hi there friend", "nice to meet you", "hello mate"],
+    "playful": ["hehe gimme the goods", "bet you can't find me a good one", "ooh surprise me", "catch me if you can lol"],
+    "sarcastic": ["oh great, another puzzle game", "wow, what a totally original idea", "sure, because that worked so well last time", "yeah right, like I'd play that"],
+    "excited": ["omg yes that sounds amazing", "I can't wait to play this", "this is awesome", "woah really?!"],
+    "enthusiastic": ["I absolutely love this genre", "yes yes yes let's go", "I'm so into open worlds", "this is exactly my thing"],
+    "confused": ["wait what do you mean", "I don't get it", "huh?", "sorry I'm lost"],
+    "curious": ["what else is there", "how does that one play", "tell me more about it", "is it multiplayer?"],
+    "vague": ["something", "idk whatever", "anything I guess", "stuff"],
+    "bored": ["meh", "ok", "fine", "whatever I guess"],
+    "cold": ["no", "k", "not interested", "leave it"],
+    "formal": ["Good afternoon, I would like a recommendation", "Kindly provide a suitable title", "I would appreciate your assistance", "Please advise"],
+    "cautious": ["I'm not sure about that one", "maybe, but I'd like to know more first", "hmm I'm a bit hesitant", "is it too hard?"],
+    "cheerful": ["good morning sunshine!", "what a lovely day", "yay :)", "feeling great today!"],
+    "grateful": ["thank you so much", "thanks, that's really helpful", "appreciate it a lot", "cheers for the rec"],
+    "apologetic": ["sorry for the late reply", "my bad, I meant something else", "apologies, I misunderstood", "oops sorry"],
+    "impatient": ["hurry up", "just give me a game already", "come on, quickly", "hello? anyone there?"],
+    "annoyed": ["ugh this again", "stop asking me that", "that's annoying", "seriously?"],
+    "frustrated": ["this isn't working", "you keep suggesting the wrong games", "I already said no to that", "why is this so hard"],
+    "dismissive": ["nah", "not really", "don't care", "pass"],
+    "assertive": ["give me a shooter now", "I want an RPG, nothing else", "no horror games", "only PC games"],
+    "encouraging": ["you're doing great", "keep them coming", "good pick, try another", "nice, you're getting closer"],
+    "optimistic": ["I think I'll love the next one", "this could be really fun", "hopefully this one's a hit", "sounds promising"],
+    "pessimistic": ["I doubt I'll like it", "probably won't be good", "nothing ever works for me", "I'll hate it anyway"],
+    "disengaged": ["gtg", "brb", "later", "not now"],
+    "empathetic": ["that sounds tough, I get it", "I understand how you feel", "no worries, take your time", "aw I'm sorry to hear that"],
+    "genz": ["no cap this slaps", "fr fr bestie", "it's giving main character energy", "lowkey bussin ngl"],
+    "vibey": ["something cozy and lofi", "chill vibes only", "a relaxing aesthetic game", "just vibing tonight"],
+    "edgy": ["something dark and twisted", "give me brutal gore", "I like messed up stories", "the edgier the better"],
+    "hyped": ["LET'S GOOO 🔥🔥", "hype hype hype", "I'm so pumped", "yooo this is fire 🚀"],
+}
+
+
+def parse_confidence_curve(spec: str):
+    # "0.0:0.5,0.04:0.65" -> (margins, confidences), sorted by margin
+    points = sorted(tuple(float(v) for v in point.split(":")) for point in spec.split(",") if point.strip())
+    return np.array([m for m, _ in points]), np.array([c for _, c in points])
+
+
+class LocalToneClassifier:
+    def __init__(self, embedder=None, prototypes: dict = None, confidence_curve: str = None):
+        self.embedder = embedder or get_embedding_service(MINILM_MODEL)
+        self.prototypes = prototypes or TONE_PROTOTYPES
+        self.curve = parse_confidence_curve(confidence_curve or settings.TONE_LOCAL_CONFIDENCE_CURVE)
+        self.tones = list(self.prototypes)
+        self.centroids = None
+        self.local = 0
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+
+    def build(self):
+        # Normalized mean of normalized prototype embeddings, one row per tone
+        if self.centroids is not None:
+            return
+        with self._lock:
+            if self.centroids is not None:
+                return
+            rows = []
+            for tone in self.tones:
+                vectors = np.asarray(self.embedder.encode_batch(self.prototypes[tone]), dtype=np.float32)
+                vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+                centroid = vectors.mean(axis=0)
+                rows.append(centroid / np.linalg.norm(centroid))
+            self.centroids = np.vstack(rows)
+
+    def scores(self, text: str) -> np.ndarray:
+        self.build()
+        vec = np.asarray(self.embedder.encode(text.strip()), dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return self.centroids @ (vec / norm) if norm else np.zeros(len(self.tones), dtype=np.float32)
+
+    def classify(self, text: str):
+        """(tone, confidence, margin): calibrated confidence and the best centroid's cosine lead over the runner-up."""
+        return self._label(self.scores(text))
+
+    def classify_batch(self, texts):
+        # Same as classify for each text, with one model call for all of them
+        self.build()
+        texts = [t.strip() for t in texts]
+        if not texts:
+            return []
+        vectors = np.asarray(self.embedder.encode_batch(texts), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+        return [self._label(row) for row in vectors @ self.centroids.T]
+
+    def _label(self, scores):
+        second, best = np.argsort(scores)[-2:]
+        margin = float(scores[best] - scores[second])
+        return self.tones[best], self.confidence(margin), margin
+
+    def confidence(self, margin: float) -> float:
+        margins, confidences = self.curve
+        return round(float(np.interp(margin, margins, confidences)), 2)
+
+
+tone_classifier = LocalToneClassifier()
@@ -1,11 +1,10 @@
 import re
 import os
-import openai
+import asyncio
 from datetime import datetime
 from app.db.models.enums import SenderEnum
-from openai import AsyncOpenAI
-
-client = AsyncOpenAI()
+from app.services.llm_gateway import llm_gateway
+from app.core.config import settings
 
 model= os.getenv("GPT_MODEL")
 
@@ -21,10 +20,36 @@ async def get_last_user_tone_from_session(session) -> str:
 
     return user_interactions[-1].tone_tag or "neutral"
 
-# 🧠 GPT-Based Tone Detection
+# Tone clusters and labelling rules (shared with the combined turn analyzer)
+TONE_CLUSTERS = ["neutral", "casual", "warm", "sincere", "polite", "friendly", "playful", "sarcastic", "excited", "enthusiastic", "confused", "curious", "vague", "bored", "cold", "formal", "cautious", "cheerful", "grateful", "apologetic", "impatient", "annoyed", "frustrated", "dismissive", "assertive", "encouraging", "optimistic", "pessimistic", "disengaged", "empathetic", "genz", "vibey", "edgy", "hyped"]
+TONE_RULES = [
+    "If slang, emojis, or hype → tag genz",
+    'If tone is frustrated *and* genz → return "genz frustrated"',
+    "If tone is unsure or irritated → tag confused or frustrated",
+    'If short, dry replies like "ok", "fine", or "hello?" → bored or frustrated',
+    "If joyful or thankful → satisfied or excited",
+    "If style is unclear → return neutral",
+]
+
+# 🧠 Tone Detection: local nearest-centroid classifier, GPT when it is unsure
 async def detect_tone_cluster(user_input: str):
-    TONE_CLUSTERS = ["neutral", "casual", "warm", "sincere", "polite", "friendly", "playful", "sarcastic", "excited", "enthusiastic", "confused", "curious", "vague", "bored", "cold", "formal", "cautious", "cheerful", "grateful", "apologetic", "impatient", "annoyed", "frustrated", "dismissive", "assertive", "encouraging", "optimistic", "pessimistic", "disengaged", "empathetic", "genz", "vibey", "edgy", "hyped"]
+    if settings.TONE_DETECTION_MODE == "local" and user_input and user_input.strip():
+        from app.services.tone_classifier import tone_classifier
+        try:
+            # MiniLM encode off the event loop; centroids are built at startup (app/main.py)
+            tone_tag, confidence, margin = await asyncio.to_thread(tone_classifier.classify, user_input)
+            if margin >= settings.TONE_LOCAL_MIN_MARGIN:
+                tone_classifier.local += 1
+                return tone_tag, confidence
+            print(f"🎭 Local tone '{tone_tag}' too close to runner-up (margin {margin:.3f}), asking GPT")
+        except Exception as e:
+            print(f"⚠️ Local tone classifier unavailable, asking GPT: {e}")
+        tone_classifier.fallbacks += 1
+    return await detect_tone_cluster_llm(user_input)
 
+# 🧠 GPT-Based Tone Detection
+async def detect_tone_cluster_llm(user_input: str):
+    rules = "\n".join(f"        - {rule}" for rule in TONE_RULES)
     prompt = f"""
         You are an expert in analyzing conversational tone for chatbots.
         Given the following user message, reply with the most likely tone *cluster* from this list only: {TONE_CLUSTERS}.
@@ -33,17 +58,14 @@ async def detect_tone_cluster(user_input: str):
         User message:
         \"\"\"{user_input}\"\"\"
         Rules:
-        - If slang, emojis, or hype → tag genz
-        - If tone is frustrated *and* genz → return "genz frustrated"
-        - If tone is unsure or irritated → tag confused or frustrated
-        - If short, dry replies like "ok", "fine", or "hello?" → bored or frustrated
-        - If joyful or thankful → satisfied or excited
-        - If style is unclear → return neutral
+{rules}
 
         Only return ONE or TWO words (space-separated). No punctuation.
         """
     try:
-        response = await client.chat.completions.create(
+        response = await llm_gateway.chat(
+            "tone_engine.detect_tone_cluster_llm",
+            cache=True,
             model=model,
             messages=[{"role": "user", "content": prompt}],
             temperature=0,
@@ -1,7 +1,7 @@
 from datetime import datetime
 import os
 from app.db.models.enums import SenderEnum
-from openai import AsyncOpenAI
+from app.services.llm_gateway import llm_gateway
 
 from sqlalchemy.orm.attributes import flag_modified
 
@@ -10,7 +10,6 @@ DRY_RESPONSE_KEYWORDS = ["meh", "whatever", "nah", "idk", "fine", "ok", "no"]
 LOW_CONFIDENCE_THRESHOLD = 0.3
 
 model= os.getenv("GPT_MODEL")
-client = AsyncOpenAI()
 
 def is_dry_response(text: str) -> bool:
     return any(word in text.lower() for word in DRY_RESPONSE_KEYWORDS)
@@ -67,7 +66,7 @@ async def emotion_fusion(db, session, user):
     session.meta_data["cold_shift"] = cold_shift
     session.meta_data["overall_emotion"] = overall_emotion
     flag_modified(session, "meta_data")
-    db.commit()
+    await db.commit()
     return fusion
 
 # 🧠 GPT-based tone detection
@@ -107,7 +106,9 @@ async def detect_user_is_cold(session, db) -> bool:
             """
         
         try:
-            res = await client.chat.completions.create(
+            res = await llm_gateway.chat(
+                "tone_shift_detection.detect_user_is_cold",
+                cache=True,
                 model=model,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0,
@@ -0,0 +1,169 @@
+# 📄 File: app/services/turn_analyzer.py
+"""
+Combined "turn analysis": profile fields, intent flags and tone from one
+JSON-schema-constrained completion instead of three separate prompts.
+
+The three classifiers share most of their context (memory, last Thrum reply,
+user message), so one call sends it once. The result is split back into the
+exact dicts classify_user_input, classify_user_intent and detect_tone_cluster
+return, so update_user_from_classification and check_intent_override use it
+unchanged. Enabled with TURN_ANALYSIS_MODE=combined; on any failure the
+caller falls back to the separate classifiers.
+"""
+
+import json
+from app.services.llm_gateway import llm_gateway
+from app.services.prompt_builder import PromptPrefix, build_messages
+from app.services.input_classifier import (
+    model, intents, INTENT_CLASSIFIER_RULES, PROFILE_CLASSIFIER_RULES, get_last_game_context, memory_context,
+)
+from app.services.tone_engine import TONE_CLUSTERS, TONE_RULES
+
+STRING_LIST = {"type": "array", "items": {"type": "string"}}
+
+PROFILE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "mood": STRING_LIST,
+        "game_vibe": STRING_LIST,
+        "genre": STRING_LIST,
+        "favourite_games": STRING_LIST,
+        "platform_pref": STRING_LIST,
+        "region": {"type": "string"},
+        "age": {"type": "string"},
+        "story_pref": {"type": ["boolean", "null"]},
+        "playtime_pref": STRING_LIST,
+        "reject_tags": STRING_LIST,
+        "game_feedback": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "game": {"type": "string"},
+                    "accepted": {"type": ["boolean", "null"]},
+                    "reason": {"type": "string"},
+                },
+                "required": ["game", "accepted", "reason"],
+                "additionalProperties": False,
+            },
+        },
+        "find_game": {"type": "string"},
+        "gameplay_elements": STRING_LIST,
+        "preferred_keywords": STRING_LIST,
+        "disliked_keywords": STRING_LIST,
+        "played_yet": {"type": ["boolean", "string"]},
+        "request_link": {"type": "boolean"},
+    },
+    "additionalProperties": False,
+}
+PROFILE_SCHEMA["required"] = list(PROFILE_SCHEMA["properties"])
+
+INTENT_SCHEMA = {
+    "type": "object",
+    "properties": {intent: {"type": "boolean"} for intent in intents},
+    "required": list(intents),
+    "additionalProperties": False,
+}
+
+TONE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "tone_tag": {"type": "string", "enum": TONE_CLUSTERS},
+        "confidence": {"type": "number"},
+    },
+    "required": ["tone_tag", "confidence"],
+    "additionalProperties": False,
+}
+
+TURN_ANALYSIS_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "turn_analysis",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {"profile": PROFILE_SCHEMA, "intent": INTENT_SCHEMA, "tone": TONE_SCHEMA},
+            "required": ["profile", "intent", "tone"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+TONE_TASK = "\n".join(
+    [f"Pick the most likely tone *cluster* of the user's current reply from this list only: {TONE_CLUSTERS}.",
+     "If uncertain, use neutral. Give a confidence from 0.0 to 1.0.",
+     "Rules:"]
+    + [f"- {rule}" for rule in TONE_RULES]
+)
+
+
+TURN_ANALYSIS_PREFIX = PromptPrefix("analyze_turn_combined", "v1", f"""
+You analyze one user turn for Thrum, a mood-based game recommendation bot. Do the three tasks below on the user's current reply and return them together as one JSON object with the keys "profile", "intent" and "tone". Each task's own output format describes the object for its key.
+
+## TASK 1 — "profile": user profile fields
+{PROFILE_CLASSIFIER_RULES}
+## TASK 2 — "intent": intent flags
+{INTENT_CLASSIFIER_RULES}
+## TASK 3 — "tone": tone cluster
+{TONE_TASK}
+""")
+
+
+async def analyze_turn_combined(db, session, user_input: str, last_thrum_reply: str):
+    """
+    Returns {"tone": (tone, confidence), "classification": dict,
+    "classification_intent": dict, "memory_profile": tuple}, or None if the
+    call or its output failed.
+    """
+    from app.services.session_memory import SessionMemory
+
+    memory = await SessionMemory.load(session, db)
+    memory_context_str = memory.to_prompt()
+    user_prompt = f'''
+Previous bot message:
+Thrum: "{last_thrum_reply}"
+
+User current reply:
+"{user_input}"
+
+last recommended game:
+"{get_last_game_context(session)}"
+
+- Strictly extract the profile fields from the user current reply not from USER MEMORY & RECENT CHAT (USER MEMORY & RECENT CHAT is just for reference).
+- classify based on user's reply and thrum's message (understand it deeply what they want to say.)
+'''
+    try:
+        response = await llm_gateway.chat(
+            "turn_analyzer.analyze_turn_combined",
+            model=model,
+            messages=build_messages("turn_analyzer.analyze_turn_combined", TURN_ANALYSIS_PREFIX, memory_context(memory_context_str), user_prompt),
+            temperature=0,
+            response_format=TURN_ANALYSIS_FORMAT,
+        )
+        result = json.loads(response.choices[0].message.content)
+        classification = result["profile"]
+        classification_intent = result["intent"]
+        tone = result["tone"]
+    except Exception as e:
+        # Any failure (API error, bad JSON, missing keys) falls back to the split path
+        print(f"⚠️ Combined turn analysis failed, using separate classifiers: {e}")
+        return None
+
+    # Same validation detect_tone_cluster applies to its free-text answer
+    tone_tag = str(tone.get("tone_tag", "neutral")).lower()
+    try:
+        confidence = float(tone.get("confidence", 0.5))
+    except (TypeError, ValueError):
+        confidence = 0.7
+    if tone_tag not in TONE_CLUSTERS:
+        tone_tag, confidence = "neutral", 0.5
+
+    print(f"Classification Result: {classification}")
+    print(f"intent : {classification_intent}")
+    return {
+        "tone": (tone_tag, confidence),
+        "classification": classification,
+        "classification_intent": classification_intent,
+        "memory_profile": memory.profile(),
+    }
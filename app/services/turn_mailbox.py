@@ -0,0 +1,157 @@
+# 📄 File: app/services/turn_mailbox.py
+"""
+Per-user mailbox and lock for serializing conversation turns across workers.
+
+A mailbox counts messages posted for a key (the user's phone number) and holds
+a lock so only one worker at a time runs turns for that key:
+
+- InProcessMailbox: plain dicts, enough for a single uvicorn worker
+- RedisMailbox: shared through settings.REDIS_URL, so any number of workers or
+  replicas can accept webhooks for the same user; the lock is a SET NX key with
+  a TTL that the holder keeps renewing, so a crashed worker's lock expires
+
+drain_serialized is the loop that uses them: take the lock, wait out a short
+debounce window so a burst of messages becomes one turn, process until the
+mailbox is empty, release, and check once more for mail that arrived in
+between. Pick the backend with TURN_MAILBOX_BACKEND ("memory" or "redis").
+"""
+
+import asyncio
+from uuid import uuid4
+from app.core.config import settings
+
+
+class InProcessMailbox:
+    def __init__(self):
+        self.mail = {}    # key -> messages posted since the last take
+        self.owners = {}  # key -> lock token
+
+    async def post(self, key: str):
+        self.mail[key] = self.mail.get(key, 0) + 1
+
+    async def take(self, key: str) -> int:
+        return self.mail.pop(key, 0)
+
+    async def peek(self, key: str) -> int:
+        return self.mail.get(key, 0)
+
+    async def acquire(self, key: str):
+        if key in self.owners:
+            return None
+        token = uuid4().hex
+        self.owners[key] = token
+        return token
+
+    async def renew(self, key: str, token: str) -> bool:
+        return self.owners.get(key) == token
+
+    async def release(self, key: str, token: str):
+        if self.owners.get(key) == token:
+            del self.owners[key]
+
+
+# Only the holder of the token may extend or delete the lock
+RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisMailbox:
+    def __init__(self, redis_url: str, lock_ttl: float = 60, prefix: str = "thrum:turn:"):
+        self.redis_url = redis_url
+        self.lock_ttl_ms = int(lock_ttl * 1000)
+        self.prefix = prefix
+        self._redis = None
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            import redis.asyncio as aioredis
+            self._redis = aioredis.Redis.from_url(self.redis_url, decode_responses=True)
+        return self._redis
+
+    async def post(self, key: str):
+        mail_key = f"{self.prefix}mail:{key}"
+        async with self.redis.pipeline(transaction=True) as pipe:
+            # Expires so a mailbox nobody drains does not linger
+            await pipe.incr(mail_key).pexpire(mail_key, self.lock_ttl_ms * 10).execute()
+
+    async def take(self, key: str) -> int:
+        return int(await self.redis.getdel(f"{self.prefix}mail:{key}") or 0)
+
+    async def peek(self, key: str) -> int:
+        return int(await self.redis.get(f"{self.prefix}mail:{key}") or 0)
+
+    async def acquire(self, key: str):
+        token = uuid4().hex
+        if await self.redis.set(f"{self.prefix}lock:{key}", token, nx=True, px=self.lock_ttl_ms):
+            return token
+        return None
+
+    async def renew(self, key: str, token: str) -> bool:
+        return bool(await self.redis.eval(RENEW_SCRIPT, 1, f"{self.prefix}lock:{key}", token, self.lock_ttl_ms))
+
+    async def release(self, key: str, token: str):
+        await self.redis.eval(RELEASE_SCRIPT, 1, f"{self.prefix}lock:{key}", token)
+
+    async def aclose(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+def get_mailbox():
+    if settings.TURN_MAILBOX_BACKEND == "redis" and settings.REDIS_URL:
+        return RedisMailbox(settings.REDIS_URL, lock_ttl=settings.TURN_LOCK_TTL_SECONDS)
+    return InProcessMailbox()
+
+
+async def keep_lock(mailbox, key: str, token: str, interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        if not await mailbox.renew(key, token):
+            print(f"⚠️ Lost turn lock for {key}")
+            return
+
+
+async def debounce(mailbox, key: str, window: float, max_wait: float):
+    # Keep waiting while messages keep coming, up to max_wait in total
+    waited = 0.0
+    while window > 0 and waited < max_wait:
+        await asyncio.sleep(window)
+        waited += window
+        if not await mailbox.take(key):
+            return
+
+
+async def drain_serialized(mailbox, key: str, process, window: float = 0.0, max_wait: float = 0.0, lock_ttl: float = 60):
+    """
+    Calls process(key) until it returns False, repeating while mail keeps arriving.
+    Returns without doing anything if another worker holds the key's lock; that
+    worker sees the posted mail before it lets go.
+    """
+    while True:
+        token = await mailbox.acquire(key)
+        if token is None:
+            return
+        heartbeat = asyncio.create_task(keep_lock(mailbox, key, token, lock_ttl / 3))
+        try:
+            while await mailbox.take(key):
+                await debounce(mailbox, key, window, max_wait)
+                while await process(key):
+                    pass
+        finally:
+            heartbeat.cancel()
+            await mailbox.release(key, token)
+        # Mail posted after the last take found the lock still held; pick it up now
+        if not await mailbox.peek(key):
+            return
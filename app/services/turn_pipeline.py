@@ -0,0 +1,133 @@
+# 📄 File: app/services/turn_pipeline.py
+"""
+Per-turn classification fan-out for generate_thrum_reply.
+
+Tone detection, profile classification and intent classification are
+started together with asyncio.gather, so the turn waits for the slowest one
+instead of their sum. They share one AsyncSession, which cannot run two
+queries at once, so the session memory they both read is loaded once up
+front. Their DB side effects are then applied in a fixed order (tone ->
+profile update -> emotion fusion / tone shift), and the intent result is
+handed to check_intent_override.
+
+In the sequential flow the intent classifier ran after the profile update
+and saw this turn's genre, platform and mood. Running concurrently, it sees
+the memory as it stood when the message arrived. refresh_intent compares
+that snapshot's profile fields (SessionMemory.profile: genre, platform, mood,
+keywords, likes ...) with the memory after the update and classifies the
+intent again only when they differ. Tone is left out: tagging this turn's
+tone changes the prompt on every turn, but the sequential flow had no tone
+for the current message either.
+
+With TURN_ANALYSIS_MODE=combined the three results come from a single
+structured completion instead (see turn_analyzer.py).
+"""
+
+import asyncio
+import time
+from sqlalchemy.orm.attributes import flag_modified
+from app.db.models.enums import SenderEnum
+from app.services.input_classifier import classify_user_input
+from app.services.intent_router import route_intent
+from app.services.tone_engine import detect_tone_cluster, update_tone_in_history
+from app.services.user_profile_update import update_user_from_classification
+from app.services.session_manager import detect_tone_shift
+from app.services.session_memory import SessionMemory
+from app.services.tone_shift_detection import emotion_fusion
+from app.services.turn_analyzer import analyze_turn_combined
+from app.core.config import settings
+
+DEFAULT_TONE = ("neutral", 0.5)
+
+
+def get_last_thrum_reply(session) -> str:
+    thrum_interactions = [i for i in session.interactions if i.sender == SenderEnum.Thrum]
+    thrum_interactions = sorted(thrum_interactions, key=lambda x: x.timestamp, reverse=True)
+    return thrum_interactions[0].content if thrum_interactions else ""
+
+
+async def _skip():
+    return None
+
+
+async def analyze_turn(db, session, user_input: str, detect_tone: bool = False) -> dict:
+    """
+    Runs the independent per-turn classifiers concurrently.
+
+    Returns {"tone": (tone, confidence) or None, "classification": dict,
+    "classification_intent": dict}. All calls are awaited to completion even
+    if one of them raises.
+    """
+    last_thrum_reply = get_last_thrum_reply(session)
+    started = time.perf_counter()
+    if settings.TURN_ANALYSIS_MODE == "combined":
+        analysis = await analyze_turn_combined(db, session, user_input, last_thrum_reply)
+        if analysis is not None:
+            print(f"⏱️ Combined turn analysis finished in {time.perf_counter() - started:.2f}s")
+            if not detect_tone:
+                analysis["tone"] = None
+            return analysis
+    memory = await SessionMemory.load(session, db)
+    memory_profile = memory.profile()
+    tone, classification, classification_intent = await asyncio.gather(
+        detect_tone_cluster(user_input) if detect_tone else _skip(),
+        classify_user_input(db=db, session=session, user_input=user_input, memory=memory),
+        route_intent(user_input=user_input, session=session, db=db, last_thrum_reply=last_thrum_reply, memory=memory),
+        return_exceptions=True,
+    )
+    print(f"⏱️ Turn classifiers finished in {time.perf_counter() - started:.2f}s")
+
+    if isinstance(tone, BaseException):
+        print(f"⚠️ Tone detection failed: {tone}")
+        tone = DEFAULT_TONE
+    # The classifiers handle their own OpenAI errors; anything else surfaces as it did when they ran in sequence
+    for result in (classification, classification_intent):
+        if isinstance(result, BaseException):
+            raise result
+
+    return {
+        "tone": tone,
+        "classification": classification,
+        "classification_intent": classification_intent,
+        "memory_profile": memory_profile,
+    }
+
+
+async def apply_turn_analysis(db, session, user, analysis: dict, intrection=None):
+    # Side effects in the same order the sequential flow produced them
+    if analysis["tone"] is not None:
+        tone, confidence = analysis["tone"]
+        update_tone_in_history(session, tone, confidence)
+        flag_modified(session, "meta_data")
+        if intrection is not None:
+            intrection.tone_tag = tone
+        await db.commit()
+
+    classification = analysis["classification"]
+    if isinstance(classification, dict):
+        await update_user_from_classification(db=db, user=user, classification=classification, session=session)
+
+    fusion = await emotion_fusion(db, session, user)
+    if await detect_tone_shift(session):
+        session.tone_shift_detected = True
+        await db.commit()
+    return fusion
+
+
+
+async def refresh_intent(db, session, user_input: str, analysis: dict) -> dict:
+    """
+    Intent for check_intent_override, re-classified on the updated memory when
+    apply_turn_analysis changed what the intent prompt saw.
+    """
+    snapshot = analysis.get("memory_profile")
+    if snapshot is None:
+        return analysis["classification_intent"]
+    memory = await SessionMemory.load(session, db)
+    if memory.profile() == snapshot:
+        return analysis["classification_intent"]
+    print("🔁 Session memory changed during the turn; re-classifying intent")
+    analysis["classification_intent"] = await route_intent(
+        user_input=user_input, session=session, db=db, last_thrum_reply=get_last_thrum_reply(session), memory=memory
+    )
+    return analysis["classification_intent"]
@@ -0,0 +1,169 @@
+# 📄 File: app/services/turn_worker.py
+"""
+Runs WhatsApp conversation turns in the background.
+
+The webhook only stores the inbound message (InboundMessage, status "pending")
+and calls turn_worker.submit(phone_number), so Twilio gets its 200 right away
+and never retries a slow turn. Each phone number has at most one drain task
+per process, and the per-user lock in app/services/turn_mailbox.py keeps
+other workers out while it runs. After a short debounce window it claims all
+pending messages of that phone oldest first, joins them into one user input
+(messages sent while a reply was being written are answered together) and
+runs the turn. Messages that arrive meanwhile are picked up by the next pass,
+so turns for one user never overlap and keep their order.
+
+Claimed messages are "processing" until the turn ends. A turn cut off at
+shutdown hands its messages back as "pending". On startup, "processing"
+messages whose phone has no live turn lock are reset too, because the worker
+that claimed them crashed. Either way resume_pending answers them, since
+Twilio will not retry a webhook that was already acknowledged.
+
+Latency is recorded in app/utils/metrics.py: "whatsapp.ack" in the webhook,
+"whatsapp.queue_wait" from receipt to turn start and "whatsapp.turn" for the
+turn itself.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from sqlalchemy import select, update
+from app.db.session import AsyncSessionLocal
+from app.db.models.inbound_message import InboundMessage
+from app.db.models.user_profile import UserProfile
+from app.services.turn_mailbox import get_mailbox, drain_serialized
+from app.utils.metrics import record_latency
+from app.core.config import settings
+
+
+async def claim_pending(db, phone_number: str) -> list:
+    # Row locks keep another process from claiming the same messages
+    messages = (await db.scalars(
+        select(InboundMessage)
+        .where(InboundMessage.phone_number == phone_number, InboundMessage.status == "pending")
+        .order_by(InboundMessage.received_at)
+        .with_for_update(skip_locked=True)
+    )).all()
+    for message in messages:
+        message.status = "processing"
+    await db.commit()
+    return messages
+
+
+async def process_pending(phone_number: str) -> bool:
+    """Runs one turn for the phone's pending messages; False when there was nothing to do."""
+    from app.api.v1.endpoints.whatsapp import process_turn
+
+    async with AsyncSessionLocal() as db:
+        messages = await claim_pending(db, phone_number)
+        if not messages:
+            return False
+        started = time.monotonic()
+        record_latency("whatsapp.queue_wait", (datetime.utcnow() - messages[0].received_at).total_seconds())
+        user_input = " ".join(m.body or "" for m in messages).strip()
+        # Stays "pending" only if the turn is cancelled (shutdown timeout), so the next start answers it
+        status, error = "pending", None
+        try:
+            user = await db.scalar(select(UserProfile).where(UserProfile.phone_number == phone_number).limit(1))
+            await process_turn(db, user, user_input)
+            status = "done"
+        except Exception as e:
+            await db.rollback()
+            print(f"❌ Turn failed for {phone_number}: {e}")
+            status, error = "failed", str(e)
+        finally:
+            if status == "pending":
+                print(f"⏹️ Turn for {phone_number} cancelled; messages returned to pending")
+                await db.rollback()
+            for message in messages:
+                message.status = status
+                message.error = error
+                message.processed_at = datetime.utcnow() if status != "pending" else None
+            await db.commit()
+        record_latency("whatsapp.turn", time.monotonic() - started)
+        return True
+
+
+async def release_stale_claims(mailbox) -> list:
+    """
+    Resets "processing" messages to "pending" for phones whose turn lock nobody
+    holds. The worker that claimed them is gone: the lock is held for the whole
+    turn and kept alive by its heartbeat, so it is only free once that worker
+    released it or it expired after TURN_LOCK_TTL_SECONDS.
+    """
+    released = []
+    async with AsyncSessionLocal() as db:
+        phones = (await db.scalars(
+            select(InboundMessage.phone_number).where(InboundMessage.status == "processing").distinct()
+        )).all()
+        for phone_number in phones:
+            token = await mailbox.acquire(phone_number)
+            if token is None:
+                continue  # a live worker is running this user's turn
+            try:
+                await db.execute(
+                    update(InboundMessage)
+                    .where(InboundMessage.phone_number == phone_number, InboundMessage.status == "processing")
+                    .values(status="pending")
+                )
+                await db.commit()
+                released.append(phone_number)
+            finally:
+                await mailbox.release(phone_number, token)
+    return released
+
+
+class TurnWorker:
+    def __init__(self, mailbox=None):
+        self.mailbox = mailbox or get_mailbox()
+        self.tasks = {}      # phone_number -> running drain task in this process
+        self.wakeups = set() # phone numbers submitted since their task's last pass
+
+    async def submit(self, phone_number: str):
+        self.wakeups.add(phone_number)
+        await self.mailbox.post(phone_number)
+        if phone_number not in self.tasks:
+            self.tasks[phone_number] = asyncio.create_task(self._drain(phone_number))
+
+    async def _drain(self, phone_number: str):
+        try:
+            while phone_number in self.wakeups:
+                self.wakeups.discard(phone_number)
+                await drain_serialized(
+                    self.mailbox, phone_number, process_pending,
+                    window=settings.TURN_DEBOUNCE_SECONDS,
+                    max_wait=settings.TURN_DEBOUNCE_MAX_SECONDS,
+                    lock_ttl=settings.TURN_LOCK_TTL_SECONDS,
+                )
+        except Exception as e:
+            print(f"❌ Turn worker stopped for {phone_number}: {e}")
+        finally:
+            self.tasks.pop(phone_number, None)
+
+    async def resume_pending(self):
+        # Messages stored before a restart but never claimed, or claimed by a turn that never finished
+        released = await release_stale_claims(self.mailbox)
+        if released:
+            print(f"♻️ Reset unfinished turns for {len(released)} users to pending")
+        async with AsyncSessionLocal() as db:
+            phones = (await db.execute(
+                select(InboundMessage.phone_number).where(InboundMessage.status == "pending").distinct()
+            )).all()
+        for (phone_number,) in phones:
+            await self.submit(phone_number)
+        if phones:
+            print(f"📨 Resumed pending turns for {len(phones)} users")
+
+    async def shutdown(self, timeout: float = None):
+        # Let running turns finish so a deploy does not cut replies off mid-way
+        tasks = list(self.tasks.values())
+        timeout = settings.TURN_WORKER_SHUTDOWN_SECONDS if timeout is None else timeout
+        done, pending = await asyncio.wait(tasks, timeout=timeout) if tasks else (set(), set())
+        for task in pending:
+            task.cancel()
+        # Let cancelled turns hand their messages back before the loop goes away
+        await asyncio.gather(*pending, return_exceptions=True)
+        if hasattr(self.mailbox, "aclose"):
+            await self.mailbox.aclose()
+
+
+turn_worker = TurnWorker()
@@ -1,12 +1,12 @@
-from rapidfuzz import process, fuzz
+from rapidfuzz import fuzz
 from datetime import datetime
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.db.models.session import Session
 from sqlalchemy.dialects.postgresql import UUID
 from app.db.models.game_recommendations import GameRecommendation
 from app.db.models.user_profile import UserProfile
 from app.db.models.enums import SenderEnum
-from app.db.models import Game
 from typing import Dict
 from datetime import date
 from sqlalchemy.orm.attributes import flag_modified
@@ -14,34 +14,19 @@ from app.services.mood_engine import detect_mood_from_text
 from app.utils.genre import get_best_genre_match 
 from app.utils.platform_utils import get_best_platform_match, get_default_platform
 from app.services.session_memory import SessionMemory
-import re
+from app.services.title_index import search_titles, tokens, split_chunks
 
 
-# replace your current tokens() with this version
-STOPWORDS = {
-    "the","of","and","a","an","for","to","in","on","with",
-    "edition","remastered","definitive","complete","collection","ultimate","rebirth"
-}
-
-def tokens(s: str):
-    return {t for t in re.findall(r"\w+", s.lower()) if len(t) > 2 and t not in STOPWORDS}
-
-def split_chunks(s: str):
-    # handles cases like: "The Binding of Isaac: Rebirth     call of duty"
-    parts = re.split(r"[|/,-]| and |\s{2,}", s, flags=re.IGNORECASE)
-    parts = [p.strip() for p in parts if len(p.strip()) >= 3]
-    return parts or [s]
-
 async def set_pending_action(db, session, action_type, payload=None):
     if 'pending_action' not in session.meta_data:
         session.meta_data["pending_action"] = {}
     session.meta_data["pending_action"] = {"type": action_type, "payload": payload}
     flag_modified(session,"meta_data")
-    db.commit()
+    await db.commit()
 
 async def consume_pending_action(db, session):
     session.meta_data.pop("pending_action", None)
-    db.commit()
+    await db.commit()
 
 # ✅ Update user profile with parsed classification fields
 async def update_game_feedback_from_json(db, user_id: UUID, session,feedback_data: list) -> None:
@@ -49,11 +34,7 @@ async def update_game_feedback_from_json(db, user_id: UUID, session,feedback_dat
         print("🟡 No valid game feedback provided. Skipping update.")
         return
 
-    # Load all game titles and IDs
-    all_games = db.query(Game.game_id, Game.title).all()
-    title_lookup = {g.title: g.game_id for g in all_games}
-
-    user = db.query(UserProfile).filter_by(user_id=user_id).first()
+    user = await db.scalar(select(UserProfile).where(UserProfile.user_id == user_id).limit(1))
     if not user:
         print("❌ User not found.")
         return
@@ -74,17 +55,20 @@ async def update_game_feedback_from_json(db, user_id: UUID, session,feedback_dat
             continue
 
         # ✅ CHANGED: Use rapidfuzz instead of fuzzywuzzy
-        match = process.extractOne(game_title, title_lookup.keys(), score_cutoff=75)
+        match = await search_titles(db, game_title, limit=1, score_cutoff=75, scorer=fuzz.WRatio)
         if not match:
             print(f"❌ No match found for game title: {game_title}")
             continue
 
-        matched_title = match[0]  # rapidfuzz returns (match, score, index)
-        matched_game_id = title_lookup[matched_title]
+        matched_title, _, matched_game_id = match[0]  # (title, score, game_id)
         print(f"🎯 Matched '{game_title}' → '{matched_title}' (ID: {matched_game_id})")
 
         # Try to find existing recommendation
-        game_rec = db.query(GameRecommendation).filter_by(user_id=user_id, game_id=matched_game_id).first()
+        game_rec = await db.scalar(
+            select(GameRecommendation)
+            .where(GameRecommendation.user_id == user_id, GameRecommendation.game_id == matched_game_id)
+            .limit(1)
+        )
 
         if not game_rec:
             print(f"⚠️ No GameRecommendation found for game '{matched_title}' and user. Creating new entry.")
@@ -113,7 +97,7 @@ async def update_game_feedback_from_json(db, user_id: UUID, session,feedback_dat
                 print(f"👎 Added to session rejected games: {matched_game_id}")
             print(f"👎 Added to dislikes: {matched_game_id}")
         user.last_updated["game_feedback"] = str(datetime.utcnow())
-    db.commit()
+    await db.commit()
     print("💾 All feedback processed and saved.")
 
 
@@ -152,7 +136,7 @@ async def update_user_from_classification(db: Session, user, classification: dic
     if session.meta_data.get('ask_for_link'):
         session.meta_data['ask_for_link'] = False
         flag_modified(session, "meta_data")
-        db.commit()
+        await db.commit()
     # -- Played Yet
     if played_yet is not None and isinstance(played_yet, bool):
         session.meta_data["played_yet"] = played_yet
@@ -416,46 +400,35 @@ async def update_user_from_classification(db: Session, user, classification: dic
     if find_game_title and find_game_title.lower() != "none":
         session.meta_data = session.meta_data or {}  # ensure dict
 
-        # Load all game titles and IDs
-        all_games = db.query(Game.game_id, Game.title).all()
-        title_lookup = {g.title: g.game_id for g in all_games}
-        all_titles = list(title_lookup.keys())
-
-        best = None  # (matched_title, score)
+        best = None  # (matched_title, score, game_id)
 
         for chunk in split_chunks(find_game_title.strip()):
-            # Step 1: get multiple candidates above cutoff
-            matches = process.extract(
-                chunk,
-                all_titles,
-                scorer=fuzz.token_set_ratio,
-                score_cutoff=50,
-                limit=10
-            )
+            # Step 1: get multiple candidates above cutoff (shared title index)
+            matches = await search_titles(db, chunk, limit=10, score_cutoff=50)
             print("matches for chunk:", chunk, "->", matches)
 
             # Step 2: token-overlap filter
             input_tokens = tokens(chunk)
             filtered = []
-            for title, score, _ in matches:
+            for title, score, game_id in matches:
                 title_tokens = tokens(title)
                 if input_tokens & title_tokens:
-                    filtered.append((title, score))
+                    filtered.append((title, score, game_id))
 
             # Step 3: pick best from filtered, else best from raw matches (fallback)
             if filtered:
-                mt, sc = max(filtered, key=lambda x: x[1])
+                mt, sc, gid = max(filtered, key=lambda x: x[1])
             elif matches:
-                mt, sc, _ = max(matches, key=lambda x: x[1])
+                mt, sc, gid = max(matches, key=lambda x: x[1])
             else:
                 continue
 
             if best is None or sc > best[1]:
-                best = (mt, sc)
+                best = (mt, sc, gid)
 
         if best:
-            matched_title, _ = best
-            matched_game_id = str(title_lookup[matched_title])
+            matched_title, _, matched_game_id = best
+            matched_game_id = str(matched_game_id)
             session.meta_data["find_game"] = matched_game_id
             flag_modified(session, "meta_data")
             print(f"🎯 Stored matched find_game → '{matched_title}' (ID: {matched_game_id}) in session.meta_data")
@@ -547,10 +520,10 @@ async def update_user_from_classification(db: Session, user, classification: dic
         flag_modified(session, "meta_data")
         user.last_updated["reject_tags"] = str(datetime.utcnow())
 
-    db.commit()
+    await db.commit()
     await update_game_feedback_from_json(db=db, user_id=user.user_id, session=session, feedback_data=game_feedback)
 
-    session_memory = SessionMemory(session,db)
+    session_memory = await SessionMemory.load(session, db)
     session_memory.update(**classification)
 
 async def update_user_specifications(db,session,classification):
@@ -567,4 +540,4 @@ async def update_user_specifications(db,session,classification):
                     if classfy not in session.other_memory:
                         session.other_memory.append(classfy)
                     print(f":white_check_mark: Added other_memory '{session}' to {session.other_memory}")
-    db.commit()
\ No newline at end of file
+    await db.commit()
\ No newline at end of file
@@ -1,35 +1,130 @@
-from sentence_transformers import SentenceTransformer  # For generating embeddings
-from scipy.spatial.distance import cosine  # For similarity calculation
+import os  # For cache file paths
+import time  # For refresh interval
+import hashlib  # For vocabulary fingerprint
+import numpy as np  # For the normalized genre matrix
+from sqlalchemy import event, select  # For invalidation on writes and queries
 from sqlalchemy.orm import Session  # For DB session
 from app.db.models.unique_value import UniqueValue  # Model for unique fields
+from app.core.config import settings  # For cache path and refresh interval
 from typing import Optional  # For optional return type
+from app.services.embedding_service import get_embedding_service, MINILM_MODEL  # Shared embedding models
 
-# Load embedding model once
-model = SentenceTransformer("all-MiniLM-L12-v2")
+# Shared MiniLM instance (same one mood_engine uses)
+embedder = get_embedding_service(MINILM_MODEL)
 
+GENRE_MATCH_THRESHOLD = 0.3  # Minimum cosine similarity for a genre match
 
-async def load_genre_embeddings_from_db(db: Session):
-    # Fetch genres from DB and create embedding dict
-    genre_row = db.query(UniqueValue).filter(UniqueValue.field == "genre").first()
-    if not genre_row or not genre_row.unique_values:
-        return {}
 
-    genre_list = genre_row.unique_values
-    return {genre: model.encode(genre) for genre in genre_list}
+def genre_fingerprint(genres) -> str:
+    # Identifies one genre vocabulary for one embedding model
+    raw = "\n".join([MINILM_MODEL] + list(genres))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
 
 
-async def get_best_genre_match(input_genre: str, db: Session) -> Optional[str]:
-    # Find best semantic match for input genre
-    VALID_GENRE_EMBEDDINGS = await load_genre_embeddings_from_db(db)
-    input_vec = model.encode(input_genre)
+class GenreIndex:
+    """
+    The genre vocabulary from unique_values embedded once into a normalized
+    matrix, so matching an input genre is a single dot product.
+
+    The row is re-read at most every `refresh_seconds`; the matrix is only
+    rebuilt when the vocabulary fingerprint changes, and the last build is
+    persisted to `cache_path` so new workers can start without re-encoding.
+    """
+
+    def __init__(self, cache_path: str, refresh_seconds: float = 60):
+        self.cache_path = cache_path
+        self.refresh_seconds = refresh_seconds
+        self.genres = []
+        self.matrix = None
+        self.fingerprint = None
+        self.checked_at = 0.0
+
+    def invalidate(self):
+        self.checked_at = 0.0
+
+    async def refresh(self, db: Session):
+        if self.matrix is not None and time.monotonic() - self.checked_at < self.refresh_seconds:
+            return
+        genre_row = await db.scalar(select(UniqueValue).where(UniqueValue.field == "genre").limit(1))
+        genres = list(genre_row.unique_values) if genre_row and genre_row.unique_values else []
+        self.checked_at = time.monotonic()
+        fingerprint = genre_fingerprint(genres)
+        if fingerprint == self.fingerprint:
+            return
+        if not self._load_from_disk(fingerprint):
+            self._build(genres, fingerprint)
+            self._save_to_disk()
+
+    def _build(self, genres, fingerprint):
+        print(f"🧠 Encoding {len(genres)} genres for genre matching")
+        if genres:
+            # Encoded directly, the vocabulary matrix is its own cache
+            matrix = np.asarray(embedder.model.encode(genres), dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix = np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+        else:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+        self.genres, self.matrix, self.fingerprint = list(genres), matrix, fingerprint
+
+    def _load_from_disk(self, fingerprint) -> bool:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return False
+        try:
+            with np.load(self.cache_path, allow_pickle=False) as data:
+                if str(data["fingerprint"]) != fingerprint:
+                    return False
+                self.genres = data["genres"].tolist()
+                self.matrix = data["matrix"].astype(np.float32)
+                self.fingerprint = fingerprint
+            return True
+        except Exception as e:
+            print(f"⚠️ Ignoring genre embedding cache {self.cache_path}: {e}")
+            return False
+
+    def _save_to_disk(self):
+        if not self.cache_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez(f, fingerprint=self.fingerprint, genres=np.array(self.genres, dtype=str), matrix=self.matrix)
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            print(f"⚠️ Could not write genre embedding cache {self.cache_path}: {e}")
 
-    best_match = None
-    best_score = -1
+    def best_match(self, input_vec):
+        # (genre, cosine similarity) of the closest vocabulary entry
+        if self.matrix is None or not self.genres:
+            return None, -1.0
+        input_vec = np.asarray(input_vec, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(input_vec)
+        if norm == 0 or input_vec.shape[0] != self.matrix.shape[1]:
+            return None, -1.0
+        scores = self.matrix @ (input_vec / norm)
+        best = int(np.argmax(scores))
+        return self.genres[best], float(scores[best])
 
-    for genre, vec in VALID_GENRE_EMBEDDINGS.items():
-        score = 1 - cosine(input_vec, vec)  # Cosine similarity
-        if score > best_score:
-            best_score = score
-            best_match = genre
 
-    return best_match if best_score >= 0.3 else None  # Return if similarity is good enough
+genre_index = GenreIndex(settings.GENRE_EMBEDDINGS_CACHE_PATH, settings.GENRE_INDEX_REFRESH_SECONDS)
+
+
+@event.listens_for(UniqueValue, "after_insert")
+@event.listens_for(UniqueValue, "after_update")
+def invalidate_genre_index(mapper, connection, target):
+    # Writes from this process are picked up on the next match without waiting for the refresh interval
+    if target.field == "genre":
+        genre_index.invalidate()
+
+
+async def load_genre_embeddings_from_db(db: Session):
+    # Genre -> normalized embedding, served from the shared genre index
+    await genre_index.refresh(db)
+    return dict(zip(genre_index.genres, genre_index.matrix))
+
+
+async def get_best_genre_match(input_genre: str, db: Session) -> Optional[str]:
+    # Find best semantic match for input genre
+    await genre_index.refresh(db)
+    best_match, best_score = genre_index.best_match(embedder.encode(input_genre))
+    return best_match if best_score >= GENRE_MATCH_THRESHOLD else None  # Return if similarity is good enough
@@ -15,7 +15,7 @@ async def maybe_add_link_hint(db, session, user_prompt: str, platform_link: str)
             session.meta_data = {}
         session.meta_data['ask_for_link'] = True
         flag_modified(session, "meta_data")
-        db.commit()
+        await db.commit()
         user_prompt += f"""
         ---
         The user hasn’t asked for the store link yet, but it’s available: {platform_link}.
@@ -0,0 +1,183 @@
+"""
+In-process call metrics for outbound dependencies.
+
+Each call site (e.g. "tone_engine.detect_tone_cluster_llm") keeps running totals
+of calls, failures, attempts, latency and tokens (including prompt tokens the
+provider served from its prefix cache); cached call sites also count cache hits
+per tier and misses, fast-path routers count which path answered each request,
+prompt_builder records the static prefix hash each call site sends, and timed
+stages (e.g. "whatsapp.ack", "whatsapp.turn") keep recent latency samples.
+Counters live per worker process and reset on restart; llm_call_stats(),
+cache_stats(), router_stats(), prompt_prefix_stats() and latency_stats()
+return them as plain dicts. metrics_snapshot() bundles them, plus any
+section added with register_stats() (DB pool gauges), for
+GET /api/v1/ops/metrics and log_metrics(), which the scheduler runs every
+METRICS_LOG_SECONDS.
+"""
+
+# app/utils/metrics.py
+import json
+import os
+import threading
+from collections import defaultdict, deque
+
+LATENCY_SAMPLES = 1000
+
+
+class CallStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.attempts = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_prompt_tokens = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "attempts": self.attempts,
+            "avg_latency": round(self.total_latency / self.calls, 4) if self.calls else 0.0,
+            "max_latency": round(self.max_latency, 4),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_prompt_tokens": self.cached_prompt_tokens,
+            "cached_prompt_rate": round(self.cached_prompt_tokens / self.prompt_tokens, 4) if self.prompt_tokens else 0.0,
+        }
+
+
+_lock = threading.Lock()
+_llm_stats = defaultdict(CallStats)
+_cache_stats = defaultdict(lambda: {"hits": 0, "misses": 0, "memory_hits": 0, "redis_hits": 0})
+_router_stats = defaultdict(lambda: defaultdict(int))
+_prefix_stats = {}
+_latencies = defaultdict(lambda: {"count": 0, "max": 0.0, "samples": deque(maxlen=LATENCY_SAMPLES)})
+_providers = {}
+
+
+def record_llm_call(call_site: str, latency: float, attempts: int, ok: bool, usage=None):
+    with _lock:
+        stats = _llm_stats[call_site]
+        stats.calls += 1
+        stats.attempts += attempts
+        stats.total_latency += latency
+        stats.max_latency = max(stats.max_latency, latency)
+        if not ok:
+            stats.errors += 1
+        if usage is not None:
+            stats.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+            stats.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+            details = getattr(usage, "prompt_tokens_details", None)
+            stats.cached_prompt_tokens += getattr(details, "cached_tokens", 0) or 0
+
+
+def llm_call_stats() -> dict:
+    with _lock:
+        return {site: stats.as_dict() for site, stats in _llm_stats.items()}
+
+
+def record_cache_lookup(call_site: str, tier: str = None):
+    # tier is "memory" or "redis" on a hit, None on a miss
+    with _lock:
+        stats = _cache_stats[call_site]
+        if tier is None:
+            stats["misses"] += 1
+        else:
+            stats["hits"] += 1
+            stats[f"{tier}_hits"] += 1
+
+
+def cache_stats() -> dict:
+    with _lock:
+        return {
+            site: {**stats, "hit_rate": round(stats["hits"] / (stats["hits"] + stats["misses"]), 4)}
+            for site, stats in _cache_stats.items()
+        }
+
+
+def record_router_path(router: str, path: str):
+    with _lock:
+        _router_stats[router][path] += 1
+
+
+def router_stats() -> dict:
+    # Per router: requests per path and the share not answered by the LLM ("gpt" path)
+    with _lock:
+        return {
+            router: {**paths, "avoided_llm_rate": round(1 - paths.get("gpt", 0) / sum(paths.values()), 4)}
+            for router, paths in _router_stats.items()
+        }
+
+
+def record_prompt_prefix(call_site: str, prefix_hash: str, version: str, chars: int):
+    with _lock:
+        stats = _prefix_stats.get(call_site)
+        if stats is None:
+            _prefix_stats[call_site] = {"prefix_hash": prefix_hash, "version": version, "prefix_chars": chars, "calls": 1, "hash_changes": 0}
+            return
+        stats["calls"] += 1
+        if stats["prefix_hash"] != prefix_hash:
+            # Only expected once after a deploy that changes the prefix
+            stats["hash_changes"] += 1
+            stats.update(prefix_hash=prefix_hash, version=version, prefix_chars=chars)
+
+
+def prompt_prefix_stats() -> dict:
+    with _lock:
+        return {site: dict(stats) for site, stats in _prefix_stats.items()}
+
+
+def record_latency(name: str, seconds: float):
+    with _lock:
+        stats = _latencies[name]
+        stats["count"] += 1
+        stats["max"] = max(stats["max"], seconds)
+        stats["samples"].append(seconds)
+
+
+def latency_stats() -> dict:
+    # Percentiles are over the last LATENCY_SAMPLES samples, count and max over the process lifetime
+    with _lock:
+        result = {}
+        for name, stats in _latencies.items():
+            samples = sorted(stats["samples"])
+            result[name] = {
+                "count": stats["count"],
+                "p50": round(samples[len(samples) // 2], 4),
+                "p95": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4),
+                "max": round(stats["max"], 4),
+            }
+        return result
+
+
+def reset_llm_call_stats():
+    with _lock:
+        _llm_stats.clear()
+        _cache_stats.clear()
+        _router_stats.clear()
+        _prefix_stats.clear()
+        _latencies.clear()
+
+
+def register_stats(name: str, provider):
+    # Extra metrics_snapshot() section, read when the snapshot is taken (provider() -> dict)
+    _providers[name] = provider
+
+
+def metrics_snapshot() -> dict:
+    return {
+        **{name: provider() for name, provider in _providers.items()},
+        "pid": os.getpid(),
+        "llm_calls": llm_call_stats(),
+        "cache": cache_stats(),
+        "prompt_prefixes": prompt_prefix_stats(),
+        "routers": router_stats(),
+        "latency": latency_stats(),
+    }
+
+
+def log_metrics():
+    print(f"📊 Metrics: {json.dumps(metrics_snapshot(), sort_keys=True)}")
@@ -1,11 +1,12 @@
 from rapidfuzz import process  # For fuzzy string matching
+from sqlalchemy import select  # For queries
 from sqlalchemy.orm import Session  # DB session
 from app.db.models.unique_value import UniqueValue  # Model for unique fields
 from typing import Optional  # For optional return type
 
 async def get_valid_platforms_from_db(db: Session) -> list[str]:
     # Get platform list from unique_values table
-    row = db.query(UniqueValue).filter(UniqueValue.field == "platform").first()
+    row = await db.scalar(select(UniqueValue).where(UniqueValue.field == "platform").limit(1))
     return row.unique_values if row and row.unique_values else []
 
 async def get_best_platform_match(user_input: str, db: Session, threshold: int = 80) -> Optional[str]:
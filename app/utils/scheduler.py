@@ -1,9 +1,18 @@
 from app.services.nudge_checker import check_for_nudge
+from app.services.tone_backfill import backfill_bot_tones
+from app.services.filler_bank import refresh_filler_bank
+from app.utils.metrics import log_metrics
+from app.core.config import settings
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 scheduler = AsyncIOScheduler()
 
 scheduler.add_job(check_for_nudge, 'interval', seconds=25, max_instances=2)
+scheduler.add_job(backfill_bot_tones, 'interval', seconds=settings.BOT_TONE_BACKFILL_SECONDS, max_instances=1)
+if settings.FILLER_BANK_REFRESH_HOURS > 0:
+    scheduler.add_job(refresh_filler_bank, 'interval', hours=settings.FILLER_BANK_REFRESH_HOURS, max_instances=1)
+if settings.METRICS_LOG_SECONDS > 0:
+    scheduler.add_job(log_metrics, 'interval', seconds=settings.METRICS_LOG_SECONDS, max_instances=1)
 
 def start_scheduler():
     scheduler.start()
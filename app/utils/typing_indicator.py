@@ -1,13 +1,9 @@
 import asyncio
-import os
 import hashlib
-from openai import AsyncOpenAI
 from app.api.v1.endpoints import session
 from app.db.models.enums import PhaseEnum, SenderEnum
 from app.utils.whatsapp import send_whatsapp_message
-
-client = AsyncOpenAI()
-model = os.getenv("GPT_MODEL")
+from app.services.filler_bank import filler_bank
 
 def get_message_hash(user_input: str) -> str:
     """Generate hash for message to prevent filler repetition"""
@@ -26,93 +22,45 @@ def get_reply_context(session) -> str:
     return phase_context.get(session.phase, "general_chat")
 
 async def send_typing_indicator(phone_number: str, session, delay: float = 2.0):
-    """Send contextual, emotion-aware filler while main reply loads"""
+    """Send a contextual, emotion-aware filler from the filler bank while the main reply loads"""
     await asyncio.sleep(delay)
 
-    # Cancel if reply already ready
+    # Cancel if reply already ready, or the conversation is ending
     if session.meta_data and session.meta_data.get("reply_ready", False):
         return
+    if session.phase == PhaseEnum.ENDING:
+        return
 
     # Get last user message
-    sorted_interactions = sorted(session.interactions, key=lambda i: i.timestamp, reverse=True)
-    user_interactions = [i for i in sorted_interactions if i.sender == SenderEnum.User]
-    user_input = user_interactions[0].content.strip() if user_interactions else ""
+    user_interactions = [i for i in session.interactions if i.sender == SenderEnum.User]
+    last_user = max(user_interactions, key=lambda i: i.timestamp) if user_interactions else None
+    user_input = last_user.content.strip() if last_user and last_user.content else ""
     if not user_input:
         return
 
+    # Ensure meta_data exists before reading/storing
+    if not session.meta_data:
+        session.meta_data = {}
+
     # Prevent repetition for same input
     current_hash = get_message_hash(user_input)
     recent_filler_hashes = session.meta_data.get("recent_filler_hashes", [])
     if current_hash in recent_filler_hashes:
         return
 
-    # Get conversation context
-    mood = session.entry_mood or "neutral"
-    user_tone = session.meta_data.get("tone", "neutral")
-    reply_context = get_reply_context(session)
-
-    # Get recent conversation for context
-    recent_interactions_ordered = sorted(session.interactions, key=lambda i: i.timestamp)
-    recent_context_pairs = []
-    for msg in recent_interactions_ordered[-6:]:
-        role = "You" if msg.sender == SenderEnum.User else "Thrum"
-        recent_context_pairs.append(f"{role}: {msg.content.strip()}")
-    conversation_context = " | ".join(recent_context_pairs)
-
-    # Avoid repeating recent fillers
-    recent_fillers = session.meta_data.get("recent_fillers", []) if session.meta_data else []
-    avoid_phrases = ", ".join(recent_fillers[-8:]) if recent_fillers else "none"
-
-    # Prompt to handle emotion + phase dynamically
-    filler_prompt = f"""
-You are Thrum, a friendly game discovery buddy chatting like a real friend.
-The main reply is still loading — you’re sending a quick, personal filler reaction.
-
-Analyze the LAST user message:
-"{user_input}"
-
-1. Internally decide the sentiment/emotion (you don’t output it).
-2. Choose filler type ONLY from: hype, empathy, or light comment.
-3. ❌ Absolutely no questions or question marks — fillers are not for starting new topics.
-4. ❌ Do NOT mention or hint at any specific games, game titles, or recommendations in fillers.
-5. Match the tone and energy of the user, and keep it human and casual.
-6. Absolutely under 6 words (short and snappy).
-7. Optionally end with a short playful nudge (but not a question).
-8. Avoid these phrases: {avoid_phrases}.
-9. Keep emotional flow — if user is sad/serious, DO NOT joke.
-
-Recent conversation: "{conversation_context}"
-
-Write ONLY the filler line (no explanations, no questions):
-"""
-
-    try:
-        response = await client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": filler_prompt}],
-            temperature=0.9,
-            max_tokens=20
-        )
-        message = response.choices[0].message.content.strip().strip('"')
-
-        # Skip if empty or ending phase
-        if not message or session.phase == PhaseEnum.ENDING:
-            return
-
-        # Track recent fillers + hashes
-        recent_fillers.append(message)
-        session.meta_data["recent_fillers"] = recent_fillers[-16:]
-        recent_filler_hashes.append(current_hash)
-        session.meta_data["recent_filler_hashes"] = recent_filler_hashes[-10:]
-
-    except Exception:
-        message = "thinking..."
-
-    # Ensure meta_data exists before storing
-    if not session.meta_data:
-        session.meta_data = {}
-    recent_hashes = session.meta_data.get("recent_filler_hashes", [])
-    recent_hashes.append(current_hash)
-    session.meta_data["recent_filler_hashes"] = recent_hashes[-10:]
-
-    await send_whatsapp_message(phone_number, message, sent_from_thrum=False)
\ No newline at end of file
+    # Pick a filler for this phase, tone and mood, avoiding recent ones
+    recent_fillers = session.meta_data.get("recent_fillers", [])
+    message = filler_bank.pick(
+        reply_context=get_reply_context(session),
+        tone=session.meta_data.get("tone", "neutral"),
+        mood=session.entry_mood or "neutral",
+        avoid=recent_fillers[-8:],
+    ) or "thinking..."
+
+    # Track recent fillers + hashes
+    recent_fillers.append(message)
+    session.meta_data["recent_fillers"] = recent_fillers[-16:]
+    recent_filler_hashes.append(current_hash)
+    session.meta_data["recent_filler_hashes"] = recent_filler_hashes[-10:]
+
+    await send_whatsapp_message(phone_number, message, sent_from_thrum=False)
@@ -3,7 +3,8 @@ import requests
 from datetime import datetime
 from requests.auth import HTTPBasicAuth
 from starlette.requests import Request 
-from app.db.session import SessionLocal
+from sqlalchemy import select
+from app.db.session import AsyncSessionLocal
 from app.db.models.user_profile import UserProfile
 import httpx  # If you want to use async HTTP requests
 
@@ -47,13 +48,12 @@ async def send_whatsapp_message(phone_number: str, message: str, sent_from_thrum
 
             # Log bot reply if sent from Thrum
             try:
-                # Use synchronous session handling here
-                db = SessionLocal()  # Use synchronous session (no async with here)
-                user = db.query(UserProfile).filter(UserProfile.phone_number == phone_number).first()
-                if user and sent_from_thrum:
-                    request = await create_request(user.user_id)
-                    user.last_thrum_timestamp = datetime.utcnow()
-                    await bot_reply(request=request, db=db, user=user, reply=message)
+                async with AsyncSessionLocal() as db:
+                    user = await db.scalar(select(UserProfile).where(UserProfile.phone_number == phone_number).limit(1))
+                    if user and sent_from_thrum:
+                        request = await create_request(user.user_id)
+                        user.last_thrum_timestamp = datetime.utcnow()
+                        await bot_reply(request=request, db=db, user=user, reply=message)
             except Exception as e:
                 print(f"⚠️ Failed to log bot reply: {e}")
     except httpx.ConnectTimeout:
@@ -0,0 +1,100 @@
+"""
+calibrate_tone_classifier.py
+
+Compares the local tone classifier (app/services/tone_classifier.py) with the
+GPT tone labels already stored on user interactions, to choose
+TONE_LOCAL_MIN_MARGIN.
+
+Since the local classifier went live, most stored tone tags are its own
+output, and those would only measure it against itself. Only interactions
+from before the rollout are used, so pass the rollout time (UTC, ISO format).
+
+For a range of margins it prints how many messages the local classifier would
+answer itself, and how often it agrees with GPT on those. It then suggests a
+TONE_LOCAL_CONFIDENCE_CURVE (agreement per margin bucket, which is the
+confidence emotion_fusion should see) and lists the most common
+disagreements, which are candidates for new prototype phrases.
+
+Usage:
+    python calibrate_tone_classifier.py <rollout, e.g. 2025-08-01T00:00> [limit]
+"""
+
+import sys
+from datetime import datetime
+from collections import Counter
+from app.db.session import SessionLocal
+from app.db.models.interaction import Interaction
+from app.db.models.enums import SenderEnum
+from app.services.tone_classifier import tone_classifier
+
+MARGINS = [0.0, 0.01, 0.02, 0.03, 0.04, 0.05, 0.075, 0.1, 0.15]
+CURVE_EDGES = [0.0, 0.02, 0.04, 0.06, 0.08, 0.1, 0.15, 0.2]
+MIN_BUCKET_SIZE = 20
+
+
+def load_labeled_messages(db, before: datetime, limit: int):
+    # GPT-labeled only: tone tags stored before the local classifier rollout
+    rows = (
+        db.query(Interaction.content, Interaction.tone_tag)
+        .filter(Interaction.sender == SenderEnum.User)
+        .filter(Interaction.tone_tag.isnot(None), Interaction.content.isnot(None))
+        .filter(Interaction.timestamp < before)
+        .order_by(Interaction.timestamp.desc())
+        .limit(limit)
+        .all()
+    )
+    return [(content, tone.strip().lower()) for content, tone in rows if content.strip()]
+
+
+def fit_confidence_curve(results) -> str:
+    # Agreement with GPT per margin bucket, kept non-decreasing so a larger lead never lowers confidence
+    points, best = [], 0.0
+    for low, high in zip(CURVE_EDGES, CURVE_EDGES[1:] + [float("inf")]):
+        bucket = [(gpt_tone, tone) for _, gpt_tone, tone, margin in results if low <= margin < high]
+        if len(bucket) < MIN_BUCKET_SIZE:
+            continue
+        best = max(best, sum(1 for gpt_tone, tone in bucket if tone == gpt_tone) / len(bucket))
+        points.append(f"{low:g}:{best:.2f}")
+    return ",".join(points)
+
+
+def calibrate(before: datetime, limit: int = 5000):
+    db = SessionLocal()
+    try:
+        messages = load_labeled_messages(db, before, limit)
+    finally:
+        db.close()
+    if not messages:
+        print(f"❌ No labeled user interactions found before {before.isoformat()}.")
+        return
+    print(f"📦 {len(messages)} labeled user messages")
+
+    results = []
+    for content, gpt_tone in messages:
+        tone, confidence, margin = tone_classifier.classify(content)
+        results.append((content, gpt_tone, tone, margin))
+
+    overall = sum(1 for _, gpt_tone, tone, _ in results if tone == gpt_tone) / len(results)
+    print(f"🎯 Agreement without fallback: {overall:.1%}\n")
+    print(f"{'margin':>8} {'local':>8} {'agreement (local)':>18}")
+    for min_margin in MARGINS:
+        kept = [(gpt_tone, tone) for _, gpt_tone, tone, margin in results if margin >= min_margin]
+        share = len(kept) / len(results)
+        agreement = sum(1 for gpt_tone, tone in kept if tone == gpt_tone) / len(kept) if kept else 0.0
+        print(f"{min_margin:>8.3f} {share:>8.1%} {agreement:>18.1%}")
+
+    curve = fit_confidence_curve(results)
+    if curve:
+        print(f"\n📐 Suggested TONE_LOCAL_CONFIDENCE_CURVE={curve}")
+
+    print("\n🔍 Most common disagreements (gpt -> local):")
+    confusions = Counter((gpt_tone, tone) for _, gpt_tone, tone, _ in results if tone != gpt_tone)
+    for (gpt_tone, tone), count in confusions.most_common(15):
+        example = next(content for content, g, t, _ in results if g == gpt_tone and t == tone)
+        print(f"  {count:>5}  {gpt_tone} -> {tone}   e.g. {example[:60]!r}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    calibrate(datetime.fromisoformat(sys.argv[1]), int(sys.argv[2]) if len(sys.argv) > 2 else 5000)
@@ -0,0 +1,24 @@
+"""
+generate_filler_bank.py
+
+Generates the typing-indicator filler bank (app/services/filler_bank.py) with
+GPT and writes it to FILLER_BANK_PATH. Running workers pick up the new file on
+their next filler.
+
+Usage:
+    python generate_filler_bank.py [fillers_per_bucket]
+"""
+
+import sys
+import asyncio
+from app.services.filler_bank import filler_bank, generate_filler_bank
+
+
+async def main(per_bucket: int):
+    buckets = await generate_filler_bank(per_bucket)
+    filler_bank.save(buckets)
+    print(f"✅ Filler bank written to {filler_bank.path}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 12))